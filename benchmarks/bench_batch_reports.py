@@ -0,0 +1,96 @@
+"""
+对比逐个生成与批量并发生成多个 GitHub 项目报告的耗时。
+
+使用本地 Ollama 替身服务，每次生成人为增加固定延迟，运行方式：
+    python benchmarks/bench_batch_reports.py --repos 16 --latency 0.5 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from stub_server import StubServer  # 本地 HTTP 替身服务
+from http_session import create_session
+from llm import LLM
+from report_generator import ReportGenerator
+from logger import LOG
+
+
+def make_handler(latency):
+    def handler(method, path, query, headers, body):
+        payload = json.loads(body)
+        time.sleep(latency)  # 模拟模型生成耗时
+        message = {"role": "assistant", "content": f"# Report\n\n{payload['messages'][1]['content'][:40]}"}
+        if payload.get("stream"):
+            return 200, {'Content-Type': 'application/x-ndjson'}, json.dumps({"message": message, "done": True}) + "\n"
+        return 200, {}, {"message": message, "done": True}
+    return handler
+
+
+def make_report_generator(server_url, concurrency):
+    config = SimpleNamespace(llm_model_type='ollama', ollama_model_name='llama3', ollama_api_url=f"{server_url}/api/chat",
+                             llm_cache_dir=None, llm_concurrency={'ollama': concurrency},
+                             llm_context_tokens={'ollama': 8192}, llm_max_output_tokens=4000,
+                             ollama_keep_alive=None, llm_request_timeout=60, llm_metrics_file=None)
+    llm = LLM(config, session=create_session(pool_maxsize=concurrency))
+    report_generator = ReportGenerator(llm, [])
+    report_generator.prompts = {"github": "Summarize the progress."}
+    return report_generator
+
+
+def run_sequential(report_generator, paths):
+    start = time.perf_counter()
+    for path in paths:
+        report_generator.generate_github_report(path)
+    return time.perf_counter() - start
+
+
+def run_batch(report_generator, paths):
+    async def collect():
+        return [result async for result in report_generator.generate_github_reports(paths)]
+
+    start = time.perf_counter()
+    results = asyncio.run(collect())
+    elapsed = time.perf_counter() - start
+    assert sorted(path for path, _, _ in results) == sorted(paths)
+    assert all(report is not None for _, report, _ in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repos', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    LOG.remove()  # 基准测试时关闭日志输出
+    os.chdir(tempfile.mkdtemp())
+    paths = []
+    for i in range(args.repos):
+        path = f"repo{i}.md"
+        with open(path, 'w') as file:
+            file.write(f"# Progress for owner/repo{i}\n\n## Issues Closed Today\n- Fix bug #{i}\n")
+        paths.append(path)
+
+    with StubServer(make_handler(args.latency)) as server:
+        report_generator = make_report_generator(server.url, args.concurrency)
+        sequential = run_sequential(report_generator, paths)
+        batch = run_batch(report_generator, paths)
+
+    print(f"报告数 {args.repos}，单次生成延迟 {args.latency * 1000:.0f} ms")
+    print(f"逐个生成：{sequential:.2f} s")
+    print(f"批量生成（{args.concurrency} 并发）：{batch:.2f} s")
+    print(f"加速比：{sequential / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
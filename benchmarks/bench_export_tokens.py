@@ -0,0 +1,119 @@
+"""
+对比导出 Markdown 在去重与归并前后的 token 数与覆盖的信息量。
+
+使用固定种子生成的 GitHub 响应 fixture（/issues 中混有 PR，提交多为 squash 合并），
+通过本地替身服务分别得到：
+  - 仅 Issues：改造前的导出，只写出 /issues 的全部条目，PR 混在其中，没有提交；
+  - 未归并：直接写出 /issues、已合并 PR 与全部提交，PR 会出现两到三次；
+  - 改造后：Issues / Pull Requests / Commits 三个章节，去重并把提交归入 PR。
+运行方式：
+    python benchmarks/bench_export_tokens.py --issues 60 --pulls 80 --commits 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from stub_server import StubServer  # 本地 HTTP 替身服务
+from github_client import GitHubClient
+from token_counter import count_tokens
+from logger import LOG
+
+WORDS = ["parser", "cache", "docs", "timeout", "retry", "client", "config", "tests", "memory", "streaming", "auth", "CLI"]
+VERBS = ["Fix", "Add", "Update", "Refactor", "Remove", "Improve"]
+
+
+def make_fixture(issues, pulls, commits, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    def timestamp():
+        return (now - timedelta(hours=rng.randint(1, 20))).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def title():
+        return f"{rng.choice(VERBS)} {' '.join(rng.sample(WORDS, rng.randint(2, 5)))}"
+
+    pull_requests = [{"number": 1000 + n, "title": title(), "updated_at": timestamp(), "merged_at": timestamp(),
+                      "html_url": f"https://github.com/owner/repo/pull/{1000 + n}"} for n in range(pulls)]
+    # /issues 接口同时返回 Issues 与 PR
+    issue_items = [{"number": n, "title": title(), "state": "closed", "updated_at": timestamp(), "closed_at": timestamp(),
+                    "html_url": f"https://github.com/owner/repo/issues/{n}"} for n in range(issues)]
+    issue_items += [dict(pr, state="closed", closed_at=pr["merged_at"], pull_request={"url": pr["html_url"]})
+                    for pr in pull_requests]
+    issue_items.sort(key=lambda item: item["updated_at"], reverse=True)
+    commit_items = []
+    for n in range(commits):
+        pr = rng.choice(pull_requests) if rng.random() < 0.8 else None
+        message = f"{pr['title']} (#{pr['number']})" if pr else title()
+        commit_items.append({"sha": f"{n:040x}", "commit": {"message": message, "committer": {"date": timestamp()}}})
+    return {'/commits': commit_items, '/issues': issue_items, '/pulls': pull_requests}
+
+
+def make_handler(fixture):
+    def handler(method, path, query, headers, body):
+        return 200, {}, next(items for suffix, items in fixture.items() if path.endswith(suffix))
+    return handler
+
+
+def export_issues_only(client, repo, days):
+    # 改造前的导出格式：/issues 的全部条目写入同一个列表
+    since, today = client._date_range(days)
+    lines = [f"# Progress for {repo} ({since} to {today})\n\n", f"\n## Issues Closed in the Last {days} Days\n"]
+    lines += [f"- {issue.title} #{issue.number}\n"
+              for issue in client.iter_issues(repo, since=since.isoformat(), until=today.isoformat())]
+    return "".join(lines)
+
+
+def export_unmerged(client, repo, days):
+    # 不做去重与归并，直接写出三个数据流
+    since, today = client._date_range(days)
+    updates = client.fetch_updates(repo, since=since.isoformat(), until=today.isoformat())
+    lines = [f"# Progress for {repo} ({since} to {today})\n\n", f"\n## Issues Closed in the Last {days} Days\n"]
+    lines += [f"- {issue.title} #{issue.number}\n" for issue in updates['issues']]
+    lines.append(f"\n## Pull Requests Merged in the Last {days} Days\n")
+    lines += [f"- {pr.title} #{pr.number}\n" for pr in updates['pull_requests'] if pr.merged_at]
+    lines.append(f"\n## Commits in the Last {days} Days\n")
+    lines += [f"- {commit.message}\n" for commit in updates['commits']]
+    return "".join(lines)
+
+
+def report(label, text, events):
+    tokens = count_tokens(text)
+    print(f"{label}：{tokens} tokens，{len(text.splitlines())} 行，覆盖 {events} 个事件，"
+          f"每千 token {events / tokens * 1000:.1f} 个事件")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--issues', type=int, default=60)
+    parser.add_argument('--pulls', type=int, default=80)
+    parser.add_argument('--commits', type=int, default=200)
+    args = parser.parse_args()
+
+    LOG.remove()  # 基准测试时关闭日志输出
+    os.chdir(tempfile.mkdtemp())
+    fixture = make_fixture(args.issues, args.pulls, args.commits)
+
+    with StubServer(make_handler(fixture)) as server:
+        client = GitHubClient("fake_token", base_url=server.url)
+        issues_only = export_issues_only(client, "owner/repo", 1)
+        unmerged = export_unmerged(client, "owner/repo", 1)
+        with open(client.export_progress_by_date_range("owner/repo", 1)) as file:
+            merged = file.read()
+
+    # 覆盖的事件数：每个 Issue、PR 与不属于任何 PR 的提交只计一次
+    standalone = sum(1 for line in merged.split("## Commits")[1].splitlines() if line.startswith('- '))
+    print(f"fixture：{args.issues} 个 Issue，{args.pulls} 个 PR，{args.commits} 个提交")
+    report("仅 Issues", issues_only, args.issues + args.pulls)
+    report("未归并", unmerged, args.issues + args.pulls + standalone)
+    report("改造后", merged, args.issues + args.pulls + standalone)
+
+
+if __name__ == '__main__':
+    main()
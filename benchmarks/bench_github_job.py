@@ -0,0 +1,63 @@
+"""
+对比 github_job 中顺序导出与并发导出多个仓库的耗时。
+
+使用本地 GitHub 替身服务，每个请求人为增加固定延迟，运行方式：
+    python benchmarks/bench_github_job.py --repos 40 --latency 0.05 --concurrency 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from stub_server import StubServer  # 本地 HTTP 替身服务
+from github_client import GitHubClient
+from http_session import create_session
+from logger import LOG
+
+
+def make_handler(latency):
+    def handler(method, path, query, headers, body):
+        time.sleep(latency)  # 模拟 GitHub API 的网络往返延迟
+        number = abs(hash(path)) % 1000
+        return 200, {}, [{"number": number, "title": f"Issue for {path}", "updated_at": "2099-01-01T00:00:00Z"}]
+    return handler
+
+
+def run(client, repos, concurrency):
+    start = time.perf_counter()
+    results = client.export_progress_for_repos(repos, days=1, max_workers=concurrency)
+    elapsed = time.perf_counter() - start
+    assert [repo for repo, _ in results] == repos  # 输出顺序与订阅顺序一致
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repos', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    LOG.remove()  # 基准测试时关闭日志输出
+    repos = [f"owner/repo{i}" for i in range(args.repos)]
+    os.chdir(tempfile.mkdtemp())
+
+    with StubServer(make_handler(args.latency)) as server:
+        session = create_session(pool_maxsize=args.concurrency)
+        client = GitHubClient("fake_token", session=session, base_url=server.url)
+        sequential = run(client, repos, 1)
+        concurrent = run(client, repos, args.concurrency)
+
+    print(f"仓库数 {args.repos}，单请求延迟 {args.latency * 1000:.0f} ms")
+    print(f"顺序导出：{sequential:.2f} s")
+    print(f"并发导出（{args.concurrency} 并发）：{concurrent:.2f} s")
+    print(f"加速比：{sequential / concurrent:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
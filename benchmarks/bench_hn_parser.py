@@ -0,0 +1,41 @@
+"""
+对比 Hacker News 首页各解析后端的耗时，并校验输出与 BeautifulSoup 完全一致。
+
+使用 tests/fixtures 下保存的首页 HTML，运行方式：
+    python benchmarks/bench_hn_parser.py --repeat 50
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from hn_parser import PARSERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(os.path.join(ROOT, 'tests', 'fixtures', 'hn_*.html'))):
+        with open(path, encoding='utf-8') as file:
+            html_content = file.read()
+        expected = PARSERS['bs4'](html_content)
+        timings = {}
+        for name, parse in PARSERS.items():
+            assert parse(html_content) == expected, f"{name} 与 bs4 输出不一致：{path}"
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                parse(html_content)
+            timings[name] = (time.perf_counter() - start) / args.repeat
+        print(f"{os.path.basename(path)}（{len(expected)} 条，输出一致）")
+        for name, seconds in timings.items():
+            print(f"  {name}：每页 {seconds * 1000:.2f} ms（{timings['bs4'] / seconds:.1f}x）")
+
+
+if __name__ == '__main__':
+    main()
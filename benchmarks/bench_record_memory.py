@@ -0,0 +1,129 @@
+"""
+对比保留 GitHub 原始 JSON 与逐页投影为紧凑记录时的内存占用。
+
+fixture 为 10k 条与 GitHub REST issues 接口结构一致的数据（含 user、labels、reactions 等嵌套对象，每行一页），
+首次运行时按固定种子生成并写入 --fixture 指定的文件（默认文件名包含条目数），之后重复使用同一份数据；
+已有文件的条目数与 --items 不一致时重新生成。
+每种模式在独立子进程中按 100 条一页解析，报告峰值 RSS 与 Python 堆峰值，运行方式：
+    python benchmarks/bench_record_memory.py --items 10000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+PAGE_SIZE = 100
+
+
+def make_user(rng):
+    login = f"user{rng.randrange(5000)}"
+    return {
+        "login": login, "id": rng.randrange(10 ** 8), "node_id": "MDQ6VXNlcj" + login,
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{login}?v=4",
+        "url": f"https://api.github.com/users/{login}", "html_url": f"https://github.com/{login}",
+        "followers_url": f"https://api.github.com/users/{login}/followers",
+        "repos_url": f"https://api.github.com/users/{login}/repos",
+        "type": "User", "site_admin": False,
+    }
+
+
+def make_issue(rng, number):
+    # 字段与 GitHub REST issues 接口一致，约三分之一为 PR
+    base = f"https://api.github.com/repos/owner/repo/issues/{number}"
+    item = {
+        "url": base, "repository_url": "https://api.github.com/repos/owner/repo",
+        "labels_url": base + "/labels{/name}", "comments_url": base + "/comments", "events_url": base + "/events",
+        "html_url": f"https://github.com/owner/repo/issues/{number}", "id": rng.randrange(10 ** 9),
+        "node_id": f"I_kwDO{number:08d}", "number": number,
+        "title": " ".join(rng.choice(["Fix", "Add", "Update", "crash", "docs", "parser", "timeout", "cache"])
+                          for _ in range(rng.randint(4, 10))),
+        "user": make_user(rng),
+        "labels": [{"id": rng.randrange(10 ** 6), "name": name, "color": "d73a4a", "default": False}
+                   for name in rng.sample(["bug", "enhancement", "docs", "good first issue", "wontfix"], rng.randint(0, 3))],
+        "state": "closed", "locked": False, "assignee": None, "assignees": [make_user(rng)], "comments": rng.randrange(50),
+        "created_at": "2099-01-01T00:00:00Z", "updated_at": f"2099-01-{number % 28 + 1:02d}T12:00:00Z",
+        "closed_at": f"2099-01-{number % 28 + 1:02d}T12:00:00Z", "author_association": "CONTRIBUTOR",
+        "body": "Steps to reproduce:\n" + "lorem ipsum dolor sit amet " * rng.randint(5, 40),
+        "reactions": {"url": base + "/reactions", "total_count": 3, "+1": 2, "-1": 0, "laugh": 0, "hooray": 1,
+                      "confused": 0, "heart": 0, "rocket": 0, "eyes": 0},
+        "timeline_url": base + "/timeline", "state_reason": "completed",
+    }
+    if number % 3 == 0:
+        item["pull_request"] = {"url": f"https://api.github.com/repos/owner/repo/pulls/{number}",
+                                "html_url": f"https://github.com/owner/repo/pull/{number}",
+                                "merged_at": item["closed_at"]}
+    return item
+
+
+def ensure_fixture(path, items):
+    if os.path.exists(path) and sum(len(json.loads(body)) for body in iter_pages(path)) == items:
+        return
+    rng = random.Random(42)
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        for start in range(0, items, PAGE_SIZE):
+            page = [make_issue(rng, number) for number in range(start, min(start + PAGE_SIZE, items))]
+            file.write(json.dumps(page) + '\n')  # 每行是一页原始响应体
+
+
+def iter_pages(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            yield line
+
+
+def measure(mode, path):
+    from github_records import normalize_issue
+
+    tracemalloc.start()
+    kept = []
+    for body in iter_pages(path):
+        page = json.loads(body)
+        if mode == 'raw':
+            kept.extend(page)  # 保留完整 JSON，与改造前一致
+        else:
+            kept.extend(normalize_issue(item) for item in page)  # 逐页投影，原始页面随即释放
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux 下单位为 KB
+    print(json.dumps({'items': len(kept), 'peak_heap': peak, 'max_rss_kb': rss}))
+
+
+def run(mode, path):
+    output = subprocess.run([sys.executable, __file__, '--measure', mode, '--fixture', path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--fixture', help="fixture 文件路径，默认为临时目录下按条目数命名的文件")
+    parser.add_argument('--measure', choices=['raw', 'records'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.fixture is None:
+        args.fixture = os.path.join(tempfile.gettempdir(), f'github_issues_fixture_{args.items}.json.gz')
+
+    if args.measure:
+        measure(args.measure, args.fixture)
+        return
+
+    ensure_fixture(args.fixture, args.items)
+    raw = run('raw', args.fixture)
+    records = run('records', args.fixture)
+    print(f"条目数 {raw['items']}，fixture：{args.fixture}")
+    print(f"原始 JSON：Python 堆峰值 {raw['peak_heap'] / 2 ** 20:.1f} MB，峰值 RSS {raw['max_rss_kb'] / 1024:.1f} MB")
+    print(f"紧凑记录：Python 堆峰值 {records['peak_heap'] / 2 ** 20:.1f} MB，峰值 RSS {records['max_rss_kb'] / 1024:.1f} MB")
+    print(f"堆峰值降低：{raw['peak_heap'] / records['peak_heap']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
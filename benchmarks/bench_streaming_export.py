@@ -0,0 +1,108 @@
+"""
+对比先在内存中收集全部条目再写出，与流式写出 GitHub 进展 Markdown 的耗时和内存峰值。
+
+输入为按固定种子合成的 100k 条记录流（提交、Issues 与 PR，Issues 中混有 PR，多数提交带 PR 编号），
+两种方式写出的文件内容一致，运行方式：
+    python benchmarks/bench_streaming_export.py --items 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from github_client import GitHubClient
+from github_records import CommitRecord, IssueRecord, PullRequestRecord, pull_request_reference
+from markdown_writer import open_atomic
+from logger import LOG
+
+
+def make_streams(items, seed=42):
+    # 约 60% 提交、35% Issues、5% PR，均为惰性生成
+    pulls = max(items // 20, 1)
+    issues = items * 35 // 100
+    commits = items - pulls - issues
+    rng = random.Random(seed)
+
+    def iter_pull_requests():
+        for n in range(pulls):
+            yield PullRequestRecord(number=100000 + n, title=f"Improve module {n} performance", merged_at="2099-01-01T00:00:00Z")
+
+    def iter_issues():
+        for n in range(issues):
+            is_pull_request = n % 10 == 0
+            number = 100000 + n % pulls if is_pull_request else n
+            yield IssueRecord(number=number, title=f"Crash when loading file {n}", is_pull_request=is_pull_request)
+
+    def iter_commits():
+        for n in range(commits):
+            suffix = f" (#{100000 + rng.randrange(pulls)})" if n % 5 else ""
+            yield CommitRecord(sha=f"{n:040x}", message=f"Refactor component {n}{suffix}")
+
+    return {'commits': iter_commits(), 'issues': iter_issues(), 'pull_requests': iter_pull_requests()}
+
+
+def write_materialized(file, streams, period):
+    # 对照组：先把三个数据流全部读入内存，再分组写出
+    updates = {stream: list(items) for stream, items in streams.items()}
+    numbers = {pr.number for pr in updates['pull_requests']}
+    counts, others = {}, []
+    for commit in updates['commits']:
+        number, is_merge = pull_request_reference(commit)
+        if number in numbers:
+            if not is_merge:
+                counts[number] = counts.get(number, 0) + 1
+        else:
+            others.append(commit)
+    file.write(f"\n## Issues Closed {period}\n")
+    for issue in updates['issues']:
+        if not issue.is_pull_request and issue.number not in numbers:
+            file.write(f"- {issue.title} #{issue.number}\n")
+    file.write(f"\n## Pull Requests Merged {period}\n")
+    for pr in updates['pull_requests']:
+        suffix = f" ({counts[pr.number]} commits)" if counts.get(pr.number, 0) > 1 else ""
+        file.write(f"- {pr.title} #{pr.number}{suffix}\n")
+    file.write(f"\n## Commits {period}\n")
+    for commit in others:
+        file.write(f"- {commit.message}\n")
+
+
+def measure(label, write, path, items):
+    start = time.perf_counter()
+    with open_atomic(path) as file:
+        write(file, make_streams(items), "Today")
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc 会显著拖慢执行，内存峰值单独再跑一遍统计
+    tracemalloc.start()
+    with open_atomic(path) as file:
+        write(file, make_streams(items), "Today")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}：{elapsed:.2f} s，Python 堆峰值 {peak / 2 ** 20:.1f} MB，文件 {os.path.getsize(path) / 2 ** 20:.1f} MB")
+    with open(path) as file:
+        return file.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    LOG.remove()  # 基准测试时关闭日志输出
+    work_dir = tempfile.mkdtemp()
+    client = GitHubClient("fake_token")
+
+    print(f"记录数 {args.items}")
+    materialized = measure("全部读入后写出", write_materialized, os.path.join(work_dir, 'materialized.md'), args.items)
+    streamed = measure("流式写出", client._write_updates, os.path.join(work_dir, 'streamed.md'), args.items)
+    assert materialized == streamed  # 两种方式输出一致
+
+
+if __name__ == '__main__':
+    main()
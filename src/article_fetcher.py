@@ -0,0 +1,191 @@
+# src/article_fetcher.py
+
+import re  # 导入re模块压缩空白字符
+import threading  # 导入threading模块实现按主机的并发限制
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池，用于并发抓取文章
+from html.parser import HTMLParser  # 导入标准库的HTML分词器提取正文
+from urllib.parse import urlsplit  # 导入urlsplit从URL中取出协议与主机名
+from disk_cache import DiskCache  # 导入磁盘缓存，保存提取后的正文
+from http_session import create_session  # 导入共享HTTP会话工厂
+from logger import LOG  # 导入日志模块
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class _ReadableTextExtractor(HTMLParser):
+    """
+    提取网页中的可读文本：跳过脚本、样式、导航等区域，优先收集标题、段落与列表项中的文字。
+    """
+
+    SKIP_TAGS = {'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'svg', 'iframe', 'template'}
+    BLOCK_TAGS = {'title', 'h1', 'h2', 'h3', 'h4', 'p', 'li', 'pre', 'blockquote'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []  # 段落等正文块中的文字
+        self.loose = []  # 不在正文块中的其他可见文字，没有正文块时使用
+        self._skip_depth = 0
+        self._block_depth = 0
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._block_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in self.BLOCK_TAGS and self._block_depth:
+            self._block_depth -= 1
+            if not self._block_depth:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._block_depth:
+            self._current.append(data)
+        else:
+            self.loose.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = WHITESPACE_PATTERN.sub(' ', ''.join(self._current)).strip()
+        if text:
+            self.blocks.append(text)
+        self._current = []
+
+
+def extract_text(html_content):
+    """
+    从 HTML 中提取可读正文，各正文块以换行分隔。
+    """
+    extractor = _ReadableTextExtractor()
+    extractor.feed(html_content)
+    extractor.close()
+    if extractor.blocks:
+        return '\n'.join(extractor.blocks)
+    return WHITESPACE_PATTERN.sub(' ', ''.join(extractor.loose)).strip()
+
+
+class ArticleFetcher:
+    """
+    并发抓取新闻链接指向的文章并提取正文，提取结果按 URL 缓存在磁盘上，过期后重新下载。
+    同一篇文章出现在多个小时的快照中时只下载一次。
+    """
+
+    def __init__(self, session=None, cache=None, max_workers=8, per_host_limit=2, max_bytes=1024 * 1024,
+                 timeout=10, max_chars=1000, max_stories=30):
+        """
+        :param cache: 保存提取结果的 DiskCache，其 max_age 即缓存有效期；为 None 时不缓存。
+        :param max_workers: 并发抓取的最大文章数。
+        :param per_host_limit: 同一主机同时进行的最大请求数。
+        :param max_bytes: 每篇文章最多读取的字节数，超出部分直接丢弃。
+        :param timeout: 单次请求的超时时间（秒）。
+        :param max_chars: 提取正文保留的最大字符数。
+        :param max_stories: 每次最多为排名靠前的多少条新闻附加摘录。
+        """
+        self.session = session or create_session()
+        self.cache = cache
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.max_stories = max_stories
+        self._host_slots = {}  # 每个主机的并发信号量
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, session=None):
+        """
+        根据 hacker_news.articles 配置创建抓取器，未启用时返回 None。
+        """
+        if not config.hn_articles_enabled:
+            return None
+        cache = DiskCache(config.hn_article_cache_dir, max_entries=config.hn_article_cache_max_entries,
+                          max_age=config.hn_article_ttl_hours * 3600)
+        return cls(session=session, cache=cache, max_workers=config.hn_article_concurrency,
+                   per_host_limit=config.hn_article_per_host_limit, max_bytes=config.hn_article_max_bytes,
+                   timeout=config.hn_article_timeout, max_chars=config.hn_article_max_chars,
+                   max_stories=config.hn_article_max_stories)
+
+    def fetch(self, url):
+        """
+        返回 url 对应文章的正文，非 HTTP 链接或抓取失败时返回 None。
+        非网页内容记为空正文并缓存，避免每小时重复下载。
+        """
+        parts = urlsplit(url or '')
+        if parts.scheme not in ('http', 'https'):
+            return None
+        cache_key = DiskCache.make_key('article', url)
+        if self.cache is not None:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return entry['text'] or None
+
+        try:
+            with self._host_slot(parts.netloc):
+                text = self._download(url)
+        except Exception as e:
+            LOG.warning(f"抓取文章失败 {url}：{str(e)}")
+            return None
+
+        if self.cache is not None:
+            self.cache.set(cache_key, {'url': url, 'text': text})
+        return text or None
+
+    def fetch_many(self, urls):
+        """
+        并发抓取多篇文章，返回 {url: 正文或 None}，重复的 URL 只抓取一次。
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='article-fetch') as executor:
+            return dict(zip(unique_urls, executor.map(self.fetch, unique_urls)))
+
+    def enrich(self, stories):
+        """
+        为排名前 max_stories 的新闻附加文章正文摘录，返回新的新闻字典列表，未抓取或抓取失败的新闻不带 excerpt 字段。
+        """
+        texts = self.fetch_many(story['link'] for story in stories[:self.max_stories])
+        enriched = []
+        for story in stories:
+            text = texts.get(story['link'])
+            enriched.append(dict(story, excerpt=text) if text else story)
+        LOG.info(f"为 {sum(1 for story in enriched if 'excerpt' in story)}/{len(stories)} 条新闻附加了文章摘录")
+        return enriched
+
+    def _host_slot(self, host):
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _download(self, url):
+        response = self.session.get(url, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if 'html' not in content_type and not content_type.startswith('text/'):
+                LOG.debug(f"跳过非网页内容 {url}（{content_type}）")
+                return ''
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+        finally:
+            response.close()
+        # 未声明字符集时 requests 会按 ISO-8859-1 解码，这里改用 UTF-8
+        encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+        content = b''.join(chunks)[:self.max_bytes].decode(encoding or 'utf-8', errors='replace')
+        text = extract_text(content) if 'html' in content_type else content.strip()
+        return text[:self.max_chars]
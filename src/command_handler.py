@@ -2,7 +2,9 @@
 
 import argparse  # 导入argparse库，用于处理命令行参数解析
 import os
+import time  # 导入time模块计算指标统计的起始时间
 from datetime import datetime  # 导入 datetime 模块用于获取当前日期
+from llm_metrics import format_summary, summarize  # 导入LLM调用指标的汇总与格式化
 
 class CommandHandler:
     def __init__(self, github_client, subscription_manager, report_generator, hacker_news_client):
@@ -27,10 +29,12 @@ class CommandHandler:
         parser_export_hn.set_defaults(func=self.export_hn_topics)
 
         parser_generate_hn_report = subparsers.add_parser('generate-hn', help='generate hacknews topics report for today')
+        parser_generate_hn_report.add_argument('--no-cache', action='store_true', help='Regenerate the report instead of reusing a cached one')
         parser_generate_hn_report.set_defaults(func=self.generate_hn_daily_report)
         
         parser_generate_hn_topic_report = subparsers.add_parser('generate-hn-topic', help='generate hacknews topics report')
         parser_generate_hn_topic_report.add_argument('mdfile', type=str, help='The markdown file path for generateing report')
+        parser_generate_hn_topic_report.add_argument('--no-cache', action='store_true', help='Regenerate the report instead of reusing a cached one')
         parser_generate_hn_topic_report.set_defaults(func=self.generate_hn_topic_report)
 
         # 添加订阅命令
@@ -61,8 +65,14 @@ class CommandHandler:
         # 生成日报命令
         parser_generate = subparsers.add_parser('generate', help='Generate daily report from markdown file')
         parser_generate.add_argument('file', type=str, help='The markdown file to generate report from')
+        parser_generate.add_argument('--no-cache', action='store_true', help='Regenerate the report instead of reusing a cached one')
         parser_generate.set_defaults(func=self.generate_daily_report)
 
+        # LLM 调用指标汇总命令
+        parser_llm_stats = subparsers.add_parser('llm-stats', help='Summarize LLM call latency, tokens and throughput')
+        parser_llm_stats.add_argument('--days', type=float, default=7, help='Only include calls from the last N days (default: 7)')
+        parser_llm_stats.set_defaults(func=self.show_llm_stats)
+
         # 帮助命令
         parser_help = subparsers.add_parser('help', help='Show help message')
         parser_help.set_defaults(func=self.print_help)
@@ -93,7 +103,7 @@ class CommandHandler:
         print(f"Exported progress for the last {args.days} days for repository: {args.repo}")
 
     def generate_daily_report(self, args):
-        self.report_generator.generate_github_report(args.file)
+        self.report_generator.generate_github_report(args.file, use_cache=not args.no_cache)
         print(f"Generated daily report from file: {args.file}")
 
     def print_help(self, args=None):
@@ -109,10 +119,21 @@ class CommandHandler:
         date = datetime.now().strftime('%Y-%m-%d')
         # 生成每日汇总报告的目录路径
         directory_path = os.path.join('hacker_news', date)
+        # 根据当天的快照导出上升的新闻，作为每日汇总报告的输入
+        self.hacker_news_client.export_rising_stories(date)
         # 生成每日汇总报告并保存
-        report, _ = self.report_generator.generate_hn_daily_report(directory_path)
+        report, _ = self.report_generator.generate_hn_daily_report(directory_path, use_cache=not args.no_cache)
         print("Generated daily report for Hacker News.")
 
     def generate_hn_topic_report(self, args):
-        _, _ = self.report_generator.generate_hn_topic_report(args.mdfile)
-        print("Generated topic report for Hacker News.")
\ No newline at end of file
+        _, _ = self.report_generator.generate_hn_topic_report(args.mdfile, use_cache=not args.no_cache)
+        print("Generated topic report for Hacker News.")
+
+    def show_llm_stats(self, args):
+        metrics = self.report_generator.llm.metrics
+        if metrics is None:
+            print("LLM call metrics are disabled (llm.metrics_file is not set).")
+            return
+        records = metrics.load(since=time.time() - args.days * 86400)
+        print(f"LLM calls in the last {args.days:g} days ({metrics.path}):")
+        print(format_summary(summarize(records)))
@@ -3,10 +3,11 @@ import shlex  # 导入shlex库，用于正确解析命令行输入
 from config import Config  # 从config模块导入Config类，用于配置管理
 from github_client import GitHubClient  # 从github_client模块导入GitHubClient类，用于GitHub API操作
 from report_generator import ReportGenerator  # 从report_generator模块导入ReportGenerator类，用于报告生成
-from llm import LLM  # 从llm模块导入LLM类，可能用于语言模型相关操作
+from llm_router import create_llm  # 从llm_router模块导入create_llm，按配置创建单个模型或多后端路由
 from subscription_manager import SubscriptionManager  # 从subscription_manager模块导入SubscriptionManager类，管理订阅
 from command_handler import CommandHandler  # 从command_handler模块导入CommandHandler类，处理命令行命令
 from logger import LOG  # 从logger模块导入LOG对象，用于日志记录
+from http_session import create_session_from_config  # 从http_session模块导入共享HTTP会话工厂
 
 from hacker_news_client import HackerNewsClient #add support
 
@@ -15,13 +16,14 @@ def main():
     
     LOG.info("tst token." + config.github_token)
 
-    github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    llm = LLM(config)  # 创建语言模型实例
+    session = create_session_from_config(config)  # 创建所有客户端共享的HTTP会话
+    github_client = GitHubClient.from_config(config, session=session)  # 创建GitHub客户端实例
+    llm = create_llm(config, session=session)  # 创建语言模型实例，配置了多个后端时按延迟路由
     report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
 
     ''' add hacker news support'''
-    hacker_news_client = HackerNewsClient()
+    hacker_news_client = HackerNewsClient.from_config(config, session=session)
 
     command_handler = CommandHandler(github_client, subscription_manager, report_generator,hacker_news_client)  # 创建命令处理器实例
     
@@ -18,14 +18,73 @@ class Config:
             self.subscriptions_file = github_config.get('subscriptions_file')
             self.freq_days = github_config.get('progress_frequency_days', 1)
             self.exec_time = github_config.get('progress_execution_time', "08:00")
+            self.github_concurrency = github_config.get('concurrency', 1)  # 并发导出仓库的数量
+            self.github_cache_dir = github_config.get('cache_dir')  # 条件请求缓存目录，未配置时不启用
+            self.github_cache_max_entries = github_config.get('cache_max_entries', 2000)
+            self.github_rate_limit_reserve = github_config.get('rate_limit_reserve', 50)  # 为交互式请求预留的配额
+            self.github_backend = github_config.get('backend', 'rest')  # rest 或 graphql
+            self.github_graphql_batch_size = github_config.get('graphql_batch_size', 20)  # 单次 GraphQL 查询包含的仓库数
+            self.github_event_store_path = github_config.get('event_store_path')  # 本地事件存储，未配置时每次拉取完整窗口
+            self.github_history_retention_days = github_config.get('history_retention_days', 30)
+            self.github_repo_deadline_seconds = github_config.get('repo_deadline_seconds')  # 单个仓库拉取的最长耗时，未配置时不限制
+
+            # 加载 Hacker News 抓取配置
+            hn_config = config.get('hacker_news', {})
+            self.hn_pages = hn_config.get('pages', 1)  # 每个列表抓取的页数
+            self.hn_feeds = hn_config.get('feeds', [])  # 首页之外额外抓取的列表，如 newest、best、show、ask
+            self.hn_concurrency = hn_config.get('concurrency', 4)
+            self.hn_request_interval = hn_config.get('request_interval', 1.0)  # 同一主机两次请求的最小间隔（秒）
+            self.hn_snapshot_dir = hn_config.get('snapshot_dir')  # 列式快照存储目录，未配置时不记录快照
+            article_config = hn_config.get('articles', {})  # 抓取新闻链接的文章正文，为报告提供摘录
+            self.hn_articles_enabled = article_config.get('enabled', False)
+            self.hn_article_cache_dir = article_config.get('cache_dir', 'cache/articles')
+            self.hn_article_cache_max_entries = article_config.get('cache_max_entries', 5000)
+            self.hn_article_ttl_hours = article_config.get('ttl_hours', 48)  # 正文缓存的有效期（小时）
+            self.hn_article_concurrency = article_config.get('concurrency', 8)
+            self.hn_article_per_host_limit = article_config.get('per_host_limit', 2)  # 同一站点的最大并发请求数
+            self.hn_article_max_bytes = article_config.get('max_bytes', 1048576)  # 每篇文章最多读取的字节数
+            self.hn_article_timeout = article_config.get('timeout', 10)
+            self.hn_article_max_chars = article_config.get('max_chars', 1000)  # 每篇摘录保留的最大字符数
+            self.hn_article_max_stories = article_config.get('max_stories', 30)  # 附加摘录的新闻条数
 
             # 加载 LLM 相关配置
             llm_config = config.get('llm', {})
             self.llm_model_type = llm_config.get('model_type', 'openai')
             self.openai_model_name = llm_config.get('openai_model_name', 'gpt-4o-mini')
+            self.openai_base_url = llm_config.get('openai_base_url')  # 兼容 OpenAI 接口的服务地址，为空时使用官方服务
             self.ollama_model_name = llm_config.get('ollama_model_name', 'llama3')
             self.ollama_api_url = llm_config.get('ollama_api_url', 'http://localhost:11434/api/chat')
+            self.ollama_keep_alive = llm_config.get('ollama_keep_alive', '30m')  # 模型在 Ollama 中保持常驻的时长，如 30m、-1（永久）
+            self.ollama_warm_up_timeout = llm_config.get('ollama_warm_up_timeout', 300)  # 预热加载模型的超时时间（秒）
+            self.llm_cache_dir = llm_config.get('cache_dir')  # 报告缓存目录，未配置时每次都调用模型
+            self.llm_cache_max_entries = llm_config.get('cache_max_entries', 500)
+            self.llm_cache_max_age_hours = llm_config.get('cache_max_age_hours', 168)  # 缓存报告的最长保留时间（小时）
+            self.llm_concurrency = llm_config.get('concurrency', {'openai': 8, 'ollama': 2})  # 各后端批量生成时的最大并发请求数
+            self.llm_context_tokens = llm_config.get('context_tokens', {'openai': 128000, 'ollama': 8192})  # 各后端的上下文窗口（token）
+            self.llm_max_output_tokens = llm_config.get('max_output_tokens', 4000)  # 单次生成的最大输出 token 数
+            self.llm_request_timeout = llm_config.get('request_timeout', 300)  # 单次模型请求的超时时间（秒）
+            self.llm_metrics_file = llm_config.get('metrics_file', 'logs/llm_metrics.jsonl')  # 每次模型调用的耗时与 token 指标，为空时不记录
+            batch_config = llm_config.get('batch', {})
+            self.llm_batch_enabled = batch_config.get('enabled', False)  # 定时生成 GitHub 报告时使用 OpenAI Batch API
+            self.llm_batch_poll_interval = batch_config.get('poll_interval', 60)  # 轮询批处理状态的间隔（秒）
+            self.llm_batch_timeout_hours = batch_config.get('timeout_hours', 24)
+            # 多个模型后端，如 [{"name": "local", "model_type": "ollama", "api_url": "..."}]；为空时只使用 model_type 指定的后端
+            self.llm_backends = llm_config.get('backends', [])
+            routing_config = llm_config.get('routing', {})
+            # 主请求超过该秒数仍未返回时向次优后端发起对冲请求；"p95" 表示取主后端的 p95 延迟，null 表示不对冲
+            self.llm_hedge_after = routing_config.get('hedge_after', 'p95')
+            self.llm_latency_window = routing_config.get('latency_window', 50)  # 统计延迟与错误率的最近请求数
+            self.llm_max_error_rate = routing_config.get('max_error_rate', 0.5)  # 错误率达到该值的后端暂停使用
+            self.llm_unhealthy_cooldown = routing_config.get('unhealthy_cooldown', 300)  # 暂停使用的时长（秒）
             
+            # 加载 HTTP 连接池与重试配置
+            http_config = config.get('http', {})
+            self.http_pool_connections = http_config.get('pool_connections', 10)
+            self.http_pool_maxsize = http_config.get('pool_maxsize', 10)
+            self.http_max_retries = http_config.get('max_retries', 3)
+            self.http_backoff_factor = http_config.get('backoff_factor', 0.5)
+            self.http_backoff_jitter = http_config.get('backoff_jitter', 0.5)
+
             # 加载报告类型配置
             self.report_types = config.get('report_types', ["github", "hacker_news"])  # 默认报告类型
             
@@ -1,16 +1,19 @@
+import asyncio  # 导入asyncio并发生成各仓库的报告
 import schedule # 导入 schedule 实现定时任务执行器
 import time  # 导入time库，用于控制时间间隔
 import os   # 导入os模块用于文件和目录操作
 import signal  # 导入signal库，用于信号处理
 import sys  # 导入sys库，用于执行系统相关的操作
+import threading  # 导入threading模块，在后台线程中等待批处理完成
 from datetime import datetime  # 导入 datetime 模块用于获取当前日期
 
 from config import Config  # 导入配置管理类
 from github_client import GitHubClient  # 导入GitHub客户端类，处理GitHub API请求
 from hacker_news_client import HackerNewsClient
+from http_session import create_session_from_config  # 导入共享HTTP会话工厂
 from notifier import Notifier  # 导入通知器类，用于发送通知
 from report_generator import ReportGenerator  # 导入报告生成器类
-from llm import LLM  # 导入语言模型类，可能用于生成报告内容
+from llm_router import create_llm  # 导入模型工厂，配置了多个后端时按延迟路由
 from subscription_manager import SubscriptionManager  # 导入订阅管理器类，管理GitHub仓库订阅
 from logger import LOG  # 导入日志记录器
 
@@ -20,35 +23,77 @@ def graceful_shutdown(signum, frame):
     LOG.info("[优雅退出]守护进程接收到终止信号")
     sys.exit(0)  # 安全退出程序
 
-def github_job(subscription_manager, github_client, report_generator, notifier, days):
+def github_job(subscription_manager, github_client, report_generator, notifier, days, concurrency=1, batch=False):
     LOG.info("[开始执行定时任务]GitHub Repo 项目进展报告")
+    report_generator.llm.warm_up(background=True)  # 导出进展的同时在后台加载模型
     subscriptions = subscription_manager.list_subscriptions()  # 获取当前所有订阅
     LOG.info(f"订阅列表：{subscriptions}")
-    for repo in subscriptions:
-        # 遍历每个订阅的仓库，执行以下操作
-        markdown_file_path = github_client.export_progress_by_date_range(repo, days)
-        # 从Markdown文件自动生成进展简报
-        report, _ = report_generator.generate_github_report(markdown_file_path)
-        notifier.notify_github_report(repo, report)
+    # 并发导出所有订阅仓库的进展，结果顺序与订阅列表一致
+    exports = github_client.export_progress_for_repos(subscriptions, days, max_workers=concurrency)
+    # 导出失败的仓库已记录日志，跳过
+    repos = {markdown_file_path: repo for repo, markdown_file_path in exports if markdown_file_path is not None}
+    if batch and report_generator.llm.supports_batch:
+        # 定时任务不要求实时返回，所有简报合并为一个离线批处理提交；批处理可能数小时才完成，
+        # 在后台线程中等待结果并依次发送，不阻塞调度循环中的 Hacker News 任务
+        thread = threading.Thread(target=notify_github_reports_batch, args=(report_generator, notifier, repos),
+                                  name='github-batch', daemon=True)
+        thread.start()
+        LOG.info(f"[定时任务执行完毕]GitHub 项目进展报告在后台批处理生成")
+        return thread
+    # 从Markdown文件并发生成进展简报，每份简报生成后立即发送
+    asyncio.run(notify_github_reports(report_generator, notifier, repos))
+    report_generator.llm.log_cache_stats()
     LOG.info(f"[定时任务执行完毕]")
 
 
+def notify_github_reports_batch(report_generator, notifier, repos):
+    try:
+        for markdown_file_path, report, _ in report_generator.generate_github_reports_batch(list(repos)):
+            notify_github_report(notifier, repos[markdown_file_path], report)
+    except Exception as e:
+        LOG.error(f"GitHub 项目进展报告批处理失败：{str(e)}")
+        return
+    report_generator.llm.log_cache_stats()
+    LOG.info(f"GitHub 项目进展报告批处理完成，共 {len(repos)} 个仓库")
+
+
+async def notify_github_reports(report_generator, notifier, repos):
+    async for markdown_file_path, report, _ in report_generator.generate_github_reports(list(repos)):
+        await asyncio.to_thread(notify_github_report, notifier, repos[markdown_file_path], report)
+
+
+def notify_github_report(notifier, repo, report):
+    if report is None:
+        LOG.error(f"[{repo}]项目进展报告生成失败")
+        return
+    try:
+        notifier.notify_github_report(repo, report)
+    except Exception as e:
+        LOG.error(f"[{repo}]项目进展报告发送失败：{str(e)}")
+
+
 def hn_topic_job(hacker_news_client, report_generator):
     LOG.info("[开始执行定时任务]Hacker News 热点话题跟踪")
-    markdown_file_path = hacker_news_client.export_top_stories()
-    _, _ = report_generator.generate_hn_topic_report(markdown_file_path)
+    report_generator.llm.warm_up(background=True)
+    markdown_file_path = hacker_news_client.export_top_stories(record=True)  # 只有定时任务记录快照与变化文件
+    # 增量模式：只把相对上一次快照新上榜或上升的新闻交给 LLM，列表没有变化时沿用上一期报告
+    _, _ = report_generator.generate_hn_topic_report(markdown_file_path, delta=True)
     LOG.info(f"[定时任务执行完毕]")
 
 
 def hn_daily_job(hacker_news_client, report_generator, notifier):
     LOG.info("[开始执行定时任务]Hacker News 今日前沿技术趋势")
+    report_generator.llm.warm_up(background=True)
     # 获取当前日期，并格式化为 'YYYY-MM-DD' 格式
     date = datetime.now().strftime('%Y-%m-%d')
     # 生成每日汇总报告的目录路径
     directory_path = os.path.join('hacker_news', date)
+    # 根据当天的快照导出上升的新闻，作为每日汇总报告的输入
+    hacker_news_client.export_rising_stories(date)
     # 生成每日汇总报告并保存
     report, _ = report_generator.generate_hn_daily_report(directory_path)
     notifier.notify_hn_report(date, report)
+    report_generator.llm.log_cache_stats()
     LOG.info(f"[定时任务执行完毕]")
 
 
@@ -57,22 +102,26 @@ def main():
     signal.signal(signal.SIGTERM, graceful_shutdown)
 
     config = Config()  # 创建配置实例
-    github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
+    session = create_session_from_config(config)  # 创建所有客户端共享的HTTP会话
+    github_client = GitHubClient.from_config(config, session=session)  # 创建GitHub客户端实例
+    hacker_news_client = HackerNewsClient.from_config(config, session=session) # 创建 Hacker News 客户端实例
     notifier = Notifier(config.email)  # 创建通知器实例
-    llm = LLM(config)  # 创建语言模型实例
+    llm = create_llm(config, session=session)  # 创建语言模型实例，配置了多个后端时按延迟路由
+    llm.warm_up()  # 启动时预热模型，keep_alive 期间模型常驻内存
     report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
 
     # 启动时立即执行（如不需要可注释）
-    # github_job(subscription_manager, github_client, report_generator, notifier, config.freq_days)
+    # github_job(subscription_manager, github_client, report_generator, notifier, config.freq_days, config.github_concurrency,
+    #            config.llm_batch_enabled)
     hn_topic_job(hacker_news_client, report_generator)
     hn_daily_job(hacker_news_client, report_generator, notifier)
 
     # 安排 GitHub 的定时任务
     schedule.every(config.freq_days).days.at(
         config.exec_time
-    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days)
+    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days, config.github_concurrency,
+        config.llm_batch_enabled)
     
     # 安排 hn_topic_job 每4小时执行一次，从0点开始
     schedule.every(4).hours.at(":00").do(hn_topic_job, hacker_news_client, report_generator)
@@ -0,0 +1,110 @@
+import hashlib  # 导入hashlib模块用于生成缓存键
+import json  # 导入json模块用于序列化缓存条目
+import os  # 导入os模块用于文件和目录操作
+import tempfile  # 导入tempfile模块用于原子写入
+import threading  # 导入threading模块保证并发访问安全
+import time  # 导入time模块用于判断条目是否过期
+from collections import OrderedDict  # 导入OrderedDict按访问顺序维护条目索引
+from logger import LOG  # 导入日志模块
+
+
+class DiskCache:
+    """
+    基于文件系统的 JSON 缓存，每个条目保存为一个文件。
+    文件修改时间即写入时间，超过 max_age 的条目视为失效，读取不会延长条目的有效期。
+    启动时按写入时间建立一次内存中的访问顺序索引，之后读写只更新索引，超出条目上限时按 LRU 淘汰，
+    不必每次写入都扫描目录。
+    """
+
+    def __init__(self, cache_dir, max_entries=1000, max_age=None):
+        """
+        :param cache_dir: 缓存目录。
+        :param max_entries: 最多保留的条目数，为 None 时不限制。
+        :param max_age: 条目最长存活秒数，为 None 时永不过期。
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()  # 缓存键 -> None，按最近访问时间从旧到新排列
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        将任意可 JSON 序列化的内容组合为稳定的缓存键。
+        """
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                    self._remove(key)
+                    self.misses += 1
+                    return None
+                with open(path, 'r', encoding='utf-8') as file:
+                    value = json.load(file)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key)
+            return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        with self._lock:
+            # 先写临时文件再替换，避免并发读取到半截内容
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(value, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._touch(key)
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'entries': len(self._index)}
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name[:-len('.json')]))
+            except OSError:
+                continue
+        return OrderedDict((key, None) for _, key in sorted(entries))
+
+    def _touch(self, key):
+        self._index[key] = None
+        self._index.move_to_end(key)
+
+    def _evict(self):
+        if self.max_entries is None or len(self._index) <= self.max_entries:
+            return
+        while len(self._index) > self.max_entries:
+            key = next(iter(self._index))
+            self._remove(key)
+            self.evictions += 1
+        LOG.debug(f"缓存 {self.cache_dir} 超出上限，已淘汰最久未使用的条目")
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
@@ -0,0 +1,246 @@
+import os  # 导入os模块用于文件和目录操作
+import sqlite3  # 导入sqlite3模块作为嵌入式事件存储
+import threading  # 导入threading模块保证并发访问安全
+from datetime import datetime, timedelta, timezone  # 导入日期处理模块
+from github_records import CommitRecord, IssueRecord, PullRequestRecord  # 导入紧凑记录类型
+from logger import LOG  # 导入日志模块
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    message TEXT,
+    author TEXT,
+    committed_at TEXT,
+    url TEXT,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS idx_commits_repo_time ON commits (repo, committed_at);
+
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT,
+    state TEXT,
+    url TEXT,
+    is_pull_request INTEGER NOT NULL DEFAULT 0,
+    closed_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS idx_issues_repo_time ON issues (repo, closed_at);
+CREATE INDEX IF NOT EXISTS idx_issues_number ON issues (number);
+
+CREATE TABLE IF NOT EXISTS pull_requests (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT,
+    url TEXT,
+    merged_at TEXT,
+    closed_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS idx_pull_requests_repo_time ON pull_requests (repo, merged_at);
+
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    repo TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    covered_since TEXT NOT NULL,
+    PRIMARY KEY (repo, stream)
+);
+"""
+
+
+def utc_now():
+    # 以 GitHub 使用的 ISO 8601 格式返回当前 UTC 时间
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def shift_timestamp(timestamp, **delta):
+    # 对 ISO 8601 时间戳做加减运算，如 shift_timestamp(ts, minutes=-5)
+    shifted = datetime.strptime(timestamp, TIMESTAMP_FORMAT) + timedelta(**delta)
+    return shifted.strftime(TIMESTAMP_FORMAT)
+
+
+def _commit_row(repo, record):
+    return (repo, record.sha, record.message, record.author, record.committed_at, record.url)
+
+
+def _issue_row(repo, record):
+    return (repo, record.number, record.title, record.state, record.url,
+            int(record.is_pull_request), record.closed_at, record.updated_at)
+
+
+def _pull_request_row(repo, record):
+    return (repo, record.number, record.title, record.url,
+            record.merged_at, record.closed_at, record.updated_at)
+
+
+def _row_values(row):
+    return {key: row[key] for key in row.keys() if key not in ('repo', 'rowid')}
+
+
+def _commit_record(row):
+    return CommitRecord(**_row_values(row))
+
+
+def _issue_record(row):
+    values = _row_values(row)
+    values['is_pull_request'] = bool(values['is_pull_request'])  # SQLite 以整数保存布尔值
+    return IssueRecord(**values)
+
+
+def _pull_request_record(row):
+    return PullRequestRecord(**_row_values(row))
+
+
+# 每类数据对应的表、列、窗口查询使用的时间列、保留期清理使用的时间表达式，以及记录与行之间的转换
+STREAMS = {
+    'commits': {
+        'table': 'commits',
+        'columns': ('repo', 'sha', 'message', 'author', 'committed_at', 'url'),
+        'time': 'committed_at',
+        'retention': 'committed_at',
+        'row': _commit_row,
+        'record': _commit_record,
+    },
+    'issues': {
+        'table': 'issues',
+        'columns': ('repo', 'number', 'title', 'state', 'url', 'is_pull_request', 'closed_at', 'updated_at'),
+        'time': 'closed_at',
+        'retention': 'COALESCE(closed_at, updated_at)',
+        'row': _issue_row,
+        'record': _issue_record,
+    },
+    'pull_requests': {
+        'table': 'pull_requests',
+        'columns': ('repo', 'number', 'title', 'url', 'merged_at', 'closed_at', 'updated_at'),
+        'time': 'merged_at',
+        'retention': 'COALESCE(merged_at, closed_at, updated_at)',
+        'row': _pull_request_row,
+        'record': _pull_request_record,
+    },
+}
+
+
+class EventStore:
+    """
+    基于 SQLite 的 GitHub 活动事件存储，保存提交、Issues、Pull Requests 以及各数据流的增量同步游标。
+    按 (repo, 时间) 建立索引，任意时间窗口都可以在本地毫秒级查询，而无需访问网络。
+    """
+
+    def __init__(self, db_path='data/github_events.db', retention_days=30):
+        """
+        :param db_path: 数据库文件路径，传入 ':memory:' 时仅保存在内存中。
+        :param retention_days: 本地历史保留天数，为 None 时不清理。
+        """
+        self.db_path = db_path
+        self.retention_days = retention_days
+        if db_path != ':memory:' and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')  # 允许读写并发
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_cursor(self, repo, stream):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT synced_at, covered_since FROM sync_cursors WHERE repo = ? AND stream = ?', (repo, stream)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def upsert(self, repo, stream, items):
+        """
+        批量写入或更新条目，所有条目在同一个事务中完成，返回写入数量。
+        """
+        spec = STREAMS[stream]
+        rows = [spec['row'](repo, item) for item in items]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(self._upsert_sql(spec), rows)
+        return len(rows)
+
+    def merge(self, repo, stream, items, synced_at, covered_since):
+        """
+        将增量数据合并进本地历史并推进游标，条目、游标与保留期清理在同一个事务中完成。
+        synced_at 为 None 表示本次同步不完整，只合并数据而保留原游标。
+        """
+        spec = STREAMS[stream]
+        rows = [spec['row'](repo, item) for item in items]
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany(self._upsert_sql(spec), rows)
+
+            horizon = None
+            if self.retention_days is not None:
+                # 清理超出保留期的历史，避免数据库无限增长
+                horizon = shift_timestamp(utc_now(), days=-self.retention_days)
+                self._conn.execute(f"DELETE FROM {spec['table']} WHERE repo = ? AND {spec['retention']} < ?", (repo, horizon))
+
+            if synced_at is not None:
+                previous = self._conn.execute(
+                    'SELECT covered_since FROM sync_cursors WHERE repo = ? AND stream = ?', (repo, stream)
+                ).fetchone()
+                if previous and previous['covered_since'] < covered_since:
+                    covered_since = previous['covered_since']
+                if horizon and horizon > covered_since:
+                    covered_since = horizon
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO sync_cursors (repo, stream, synced_at, covered_since) VALUES (?, ?, ?, ?)',
+                    (repo, stream, synced_at, covered_since))
+        LOG.debug(f"{repo} 的 {stream} 合并 {len(rows)} 条增量")
+
+    def query(self, repo, stream, since=None, until=None):
+        """
+        读取时间窗口 [since, until] 内的条目，按时间倒序返回记录列表。
+        """
+        return list(self.iter_query(repo, stream, since, until))
+
+    def iter_query(self, repo, stream, since=None, until=None, batch_size=500):
+        """
+        按时间倒序逐条产出时间窗口 [since, until] 内的记录，没有时间的条目不属于任何窗口。
+        每批单独查询并从上一批的 (时间, rowid) 之后续读，迭代期间不持有锁，内存占用与窗口大小无关。
+        """
+        spec = STREAMS[stream]
+        time_column = spec['time']
+        sql = (f"SELECT rowid, {', '.join(spec['columns'])} FROM {spec['table']} "
+               f"WHERE repo = ? AND {time_column} IS NOT NULL")
+        params = [repo]
+        if since:
+            sql += f" AND {time_column} >= ?"
+            params.append(since)
+        if until:
+            sql += f" AND {time_column} <= ?"
+            params.append(until)
+        last = None
+        while True:
+            page_sql, page_params = sql, params
+            if last:
+                page_sql += f" AND ({time_column} < ? OR ({time_column} = ? AND rowid < ?))"
+                page_params = params + [last[time_column], last[time_column], last['rowid']]
+            page_sql += f" ORDER BY {time_column} DESC, rowid DESC LIMIT {int(batch_size)}"
+            with self._lock:
+                rows = self._conn.execute(page_sql, page_params).fetchall()
+            for row in rows:
+                yield spec['record'](row)
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]
+
+    @staticmethod
+    def _upsert_sql(spec):
+        columns = spec['columns']
+        placeholders = ', '.join('?' for _ in columns)
+        return f"INSERT OR REPLACE INTO {spec['table']} ({', '.join(columns)}) VALUES ({placeholders})"
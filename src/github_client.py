@@ -1,91 +1,429 @@
 # src/github_client.py
 
-import requests  # 导入requests库用于HTTP请求
 from datetime import datetime, date, timedelta  # 导入日期处理模块
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池，用于并发导出多个仓库与数据流
+from functools import partial  # 导入partial用于构造数据流任务
 import os  # 导入os模块用于文件和目录操作
+import tempfile  # 导入tempfile模块暂存导出中的章节
+import threading  # 导入threading模块保护并发统计
+import time  # 导入time模块用于计算限流等待时间
+from disk_cache import DiskCache  # 导入磁盘缓存，用于条件请求
+from rate_limiter import RateLimitScheduler  # 导入速率限制调度器
+from github_records import normalize_commit, normalize_issue, normalize_pull_request  # 导入记录投影函数
+from github_records import pull_request_reference  # 导入提交与 PR 的归并规则
+from markdown_writer import open_atomic  # 导入原子写出的 Markdown 文件
+from event_store import EventStore, utc_now, shift_timestamp  # 导入本地事件存储
+from http_session import create_session  # 导入共享HTTP会话工厂
 from logger import LOG  # 导入日志模块
 
 class GitHubClient:
-    def __init__(self, token):
+    # 每个仓库导出时发出的请求数估算，用于规划配额
+    REQUESTS_PER_REPO = 3
+    # 触发速率限制后的最大重试次数
+    MAX_RATE_LIMIT_RETRIES = 3
+    # 增量同步时向前重叠的分钟数，容忍时钟偏差与延迟可见的更新
+    SYNC_OVERLAP_MINUTES = 5
+    # 增量同步时每批写入事件存储的条目数
+    SYNC_BATCH_SIZE = 500
+
+    def __init__(self, token, per_page=100, session=None, base_url='https://api.github.com', cache=None, scheduler=None,
+                 event_store=None, repo_deadline=None):
         self.token = token  # GitHub API令牌
         self.headers = {'Authorization': f'token {self.token}'}  # 设置HTTP头部认证信息
+        self.per_page = per_page  # 每页条目数，GitHub API 最大支持 100
+        self.session = session or create_session()  # 复用连接池与重试策略的HTTP会话
+        self.base_url = base_url.rstrip('/')  # GitHub API 地址，可指向本地替身服务用于测试
+        self.cache = cache  # 可选的 DiskCache，保存 ETag/Last-Modified 与响应内容
+        self.cache_hits = 0  # 通过 304 从缓存返回的请求数
+        self.cache_misses = 0  # 重新下载内容的请求数
+        self._stats_lock = threading.Lock()
+        self.scheduler = scheduler or RateLimitScheduler()  # 所有请求共享的速率限制调度器
+        self._context = threading.local()  # 保存当前线程正在处理的仓库优先级与请求失败次数
+        self.event_store = event_store  # 可选的 EventStore，启用后增量同步并从本地查询时间窗口
+        self.repo_deadline = repo_deadline  # 单个仓库所有数据流的最长耗时（秒），None 表示不限制
+
+    @classmethod
+    def from_config(cls, config, session=None):
+        """
+        根据配置创建 GitHubClient，配置了 cache_dir 时启用条件请求缓存；
+        backend 为 graphql 时返回批量查询的 GitHubGraphQLClient。
+        """
+        cache = None
+        if config.github_cache_dir:
+            cache = DiskCache(config.github_cache_dir, max_entries=config.github_cache_max_entries)
+        scheduler = RateLimitScheduler(reserve=config.github_rate_limit_reserve)
+        event_store = None
+        if config.github_event_store_path:
+            event_store = EventStore(config.github_event_store_path, retention_days=config.github_history_retention_days)
+        if config.github_backend == 'graphql':
+            from github_graphql_client import GitHubGraphQLClient  # 延迟导入，避免循环依赖
+            return GitHubGraphQLClient(config.github_token, session=session, scheduler=scheduler,
+                                       batch_size=config.github_graphql_batch_size, event_store=event_store,
+                                       repo_deadline=config.github_repo_deadline_seconds)
+        return cls(config.github_token, session=session, cache=cache, scheduler=scheduler, event_store=event_store,
+                   repo_deadline=config.github_repo_deadline_seconds)
 
     def fetch_updates(self, repo, since=None, until=None):
-        # 获取指定仓库的更新，可以指定开始和结束日期
-        updates = {
-            'commits': self.fetch_commits(repo, since, until),  # 获取提交记录
-            'issues': self.fetch_issues(repo, since, until),  # 获取问题
-            'pull_requests': self.fetch_pull_requests(repo, since, until)  # 获取拉取请求
-        }
+        # 获取指定仓库的更新，可以指定开始和结束日期；三个数据流并发获取，耗时取决于最慢的一个
+        updates = self._fetch_streams({
+            'commits': partial(self.fetch_commits, repo, since, until),  # 获取提交记录
+            'issues': partial(self.fetch_issues, repo, since, until),  # 获取问题
+            'pull_requests': partial(self.fetch_pull_requests, repo, since, until)  # 获取拉取请求
+        })
         return updates
 
+    def _fetch_streams(self, tasks):
+        """
+        并发执行同一仓库的各个数据流任务（各自跟随分页），返回 {stream: 结果}。
+        设置了 repo_deadline 时，所有数据流共享同一个截止时间，超时的数据流在下一页之前停止。
+        """
+        priority = getattr(self._context, 'priority', 0)
+        deadline = time.monotonic() + self.repo_deadline if self.repo_deadline else None
+
+        def run(task):
+            # 工作线程继承调用方的请求优先级
+            self._context.priority = priority
+            self._context.deadline = deadline
+            try:
+                return task()
+            finally:
+                self._context.priority = 0
+                self._context.deadline = None
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='github-stream') as executor:
+            futures = {stream: executor.submit(run, task) for stream, task in tasks.items()}
+            return {stream: future.result() for stream, future in futures.items()}
+
     def fetch_commits(self, repo, since=None, until=None):
+        return list(self.iter_commits(repo, since, until))
+
+    def fetch_issues(self, repo, since=None, until=None):
+        return list(self.iter_issues(repo, since, until))
+
+    def fetch_pull_requests(self, repo, since=None, until=None):
+        return list(self.iter_pull_requests(repo, since, until))
+
+    def iter_commits(self, repo, since=None, until=None):
+        """
+        逐条产出指定仓库的 CommitRecord，自动跟随分页。
+        Commits API 原生支持 since/until 过滤，因此无需在客户端截断。
+        """
         LOG.debug(f"准备获取 {repo} 的 Commits")
-        url = f'https://api.github.com/repos/{repo}/commits'  # 构建获取提交的API URL
+        url = f'{self.base_url}/repos/{repo}/commits'  # 构建获取提交的API URL
         params = {}
         if since:
             params['since'] = since  # 如果指定了开始日期，添加到参数中
         if until:
             params['until'] = until  # 如果指定了结束日期，添加到参数中
+        for item in self._paginate(url, params, repo, 'Commits'):
+            yield normalize_commit(item)  # 边翻页边投影，不保留原始 JSON
 
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 检查请求是否成功
-            return response.json()  # 返回JSON格式的数据
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Commits 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []  # Handle failure case
-
-    def fetch_issues(self, repo, since=None, until=None):
+    def iter_issues(self, repo, since=None, until=None):
+        """
+        逐条产出指定仓库已关闭 Issues 的 IssueRecord，按更新时间倒序分页获取。
+        Issues API 不支持 until，因此在客户端跳过晚于 until 的条目。
+        """
         LOG.debug(f"准备获取 {repo} 的 Issues。")
-        url = f'https://api.github.com/repos/{repo}/issues'  # 构建获取问题的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Issues 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+        url = f'{self.base_url}/repos/{repo}/issues'  # 构建获取问题的API URL
+        params = {'state': 'closed', 'sort': 'updated', 'direction': 'desc'}
+        if since:
+            params['since'] = since
+        yield from self._iter_updated_window(url, params, repo, 'Issues', since, until, normalize_issue)
 
-    def fetch_pull_requests(self, repo, since=None, until=None):
+    def iter_pull_requests(self, repo, since=None, until=None):
+        """
+        逐条产出指定仓库已关闭 Pull Requests 的 PullRequestRecord，按更新时间倒序分页获取。
+        Pulls API 不支持 since/until，一旦条目早于 since 即停止翻页。
+        """
         LOG.debug(f"准备获取 {repo} 的 Pull Requests。")
-        url = f'https://api.github.com/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 确保成功响应
-            return response.json()
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Pull Requests 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+        url = f'{self.base_url}/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
+        params = {'state': 'closed', 'sort': 'updated', 'direction': 'desc'}
+        yield from self._iter_updated_window(url, params, repo, 'Pull Requests', since, until, normalize_pull_request)
+
+    def _iter_updated_window(self, url, params, repo, label, since, until, normalize):
+        # 结果按 updated_at 倒序排列：晚于 until 的跳过，早于 since 的说明窗口已结束
+        since_ts = self._normalize_timestamp(since)
+        until_ts = self._normalize_timestamp(until, end_of_day=True)
+        for item in self._paginate(url, params, repo, label):
+            record = normalize(item)  # 边翻页边投影，不保留原始 JSON
+            updated_at = record.updated_at
+            if updated_at:
+                if until_ts and updated_at > until_ts:
+                    continue
+                if since_ts and updated_at < since_ts:
+                    LOG.debug(f"{repo} 的 {label} 已超出时间窗口，停止翻页。")
+                    return
+            yield record
+
+    def _paginate(self, url, params, repo, label):
+        """
+        跟随响应头中的 Link: rel="next" 逐页请求，并逐条产出结果，避免一次性持有所有分页数据。
+        请求失败时记录日志并结束迭代，已产出的条目保持有效。
+        """
+        params = dict(params, per_page=self.per_page)
+        page = 0
+        deadline = getattr(self._context, 'deadline', None)
+        while url:
+            if deadline is not None and time.monotonic() >= deadline:
+                self._context.errors = getattr(self._context, 'errors', 0) + 1
+                LOG.warning(f"{repo} 的 {label} 超过单仓库截止时间 {self.repo_deadline} 秒，已获取 {page} 页，停止翻页")
+                return
+            try:
+                items, next_url = self._get_page(url, params)
+            except Exception as e:
+                self._context.errors = getattr(self._context, 'errors', 0) + 1
+                LOG.error(f"从 {repo} 获取 {label} 失败：{str(e)}")
+                LOG.error(f"响应详情：{getattr(getattr(e, 'response', None), 'text', None) or '无响应数据可用'}")
+                return
+
+            page += 1
+            LOG.debug(f"{repo} 的 {label} 第 {page} 页获取 {len(items)} 条。")
+            yield from items
+
+            # next 链接已包含全部查询参数，后续请求不再重复附加
+            url = next_url
+            params = None
+
+    def _get_page(self, url, params):
+        """
+        请求单页数据，返回 (items, next_url)。
+        启用缓存时携带 If-None-Match/If-Modified-Since，收到 304 时直接使用缓存内容，
+        GitHub 不会将 304 响应计入速率限制。
+        """
+        headers = self.headers
+        cache_key = None
+        entry = None
+        if self.cache is not None:
+            cache_key = DiskCache.make_key(url, params)
+            entry = self.cache.get(cache_key)
+            if entry:
+                headers = dict(self.headers)
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._request(self.session.get, url, headers=headers, params=params)
+        if entry and response.status_code == 304:
+            with self._stats_lock:
+                self.cache_hits += 1
+            LOG.debug(f"未发生变化，使用缓存内容：{url}")
+            return entry['body'], entry.get('next_url')
+
+        response.raise_for_status()  # 检查请求是否成功
+        items = response.json()
+        next_url = response.links.get('next', {}).get('url')
+        if self.cache is not None:
+            with self._stats_lock:
+                self.cache_misses += 1
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.cache.set(cache_key, {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'next_url': next_url,
+                    'body': items,
+                })
+        return items, next_url
+
+    def _request(self, send, url, **kwargs):
+        """
+        经调度器放行后发出请求，并根据响应头更新配额。
+        触发主/二级速率限制时休眠到 Retry-After 或重置时间后重试，而不是返回空结果。
+
+        :param send: 发送请求的会话方法，如 self.session.get。
+        """
+        priority = getattr(self._context, 'priority', 0)
+        kwargs.setdefault('timeout', 10)
+        deadline = getattr(self._context, 'deadline', None)
+        if deadline is not None:
+            # 单个请求也不应越过仓库截止时间太久
+            kwargs['timeout'] = max(min(kwargs['timeout'], deadline - time.monotonic()), 1.0)
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            self.scheduler.acquire(priority)
+            response = send(url, **kwargs)
+            self.scheduler.update(response.headers)
+            wait = self._rate_limit_wait(response)
+            if wait is None or attempt == self.MAX_RATE_LIMIT_RETRIES:
+                return response
+            self.scheduler.backoff(wait)
+        return response
+
+    @staticmethod
+    def _rate_limit_wait(response):
+        # 判断响应是否为速率限制，返回需要等待的秒数；非限流响应返回 None
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            return float(retry_after)
+        if response.headers.get('X-RateLimit-Remaining') == '0' and response.headers.get('X-RateLimit-Reset'):
+            return max(float(response.headers['X-RateLimit-Reset']) - time.time(), 1.0)
+        if response.status_code == 429 or 'rate limit' in response.text.lower():
+            return 60.0  # 二级限流未给出等待时间时，GitHub 建议至少等待一分钟
+        return None
+
+    def log_cache_stats(self):
+        # 在日志中输出条件请求缓存的命中情况
+        if self.cache is None:
+            return
+        total = self.cache_hits + self.cache_misses
+        ratio = self.cache_hits / total if total else 0
+        LOG.info(f"GitHub 条件请求缓存：命中 {self.cache_hits}，未命中 {self.cache_misses}，"
+                 f"命中率 {ratio:.0%}，已淘汰 {self.cache.evictions} 条")
+
+    @staticmethod
+    def _normalize_timestamp(value, end_of_day=False):
+        # 将 YYYY-MM-DD 补全为 GitHub 使用的 ISO 8601 时间戳，便于按字符串比较
+        if not value:
+            return None
+        value = str(value)
+        if len(value) == 10:
+            return f"{value}T23:59:59Z" if end_of_day else f"{value}T00:00:00Z"
+        return value
+
+    def sync_repo(self, repo, since):
+        """
+        增量同步仓库的提交、Issues 与 Pull Requests 到本地事件存储，三个数据流并发同步。
+        每个数据流从上次成功同步的时间点继续拉取，只有本地历史未覆盖 since 时才补拉完整窗口。
+        """
+        since_ts = self._normalize_timestamp(since)
+        self._fetch_streams({
+            'commits': partial(self._sync_stream, repo, 'commits', self.iter_commits, since_ts),
+            'issues': partial(self._sync_stream, repo, 'issues', self.iter_issues, since_ts),
+            'pull_requests': partial(self._sync_stream, repo, 'pull_requests', self.iter_pull_requests, since_ts),
+        })
+
+    def _sync_stream(self, repo, stream, fetch, since_ts):
+        cursor = self.event_store.get_cursor(repo, stream)
+        fetch_since = since_ts
+        if cursor and cursor['covered_since'] <= since_ts:
+            fetch_since = max(since_ts, shift_timestamp(cursor['synced_at'], minutes=-self.SYNC_OVERLAP_MINUTES))
+        started_at = utc_now()
+        errors_before = getattr(self._context, 'errors', 0)
+        # 边翻页边分批写入，内存中最多保留一批条目；游标在全部写入后才推进
+        batch = []
+        synced = 0
+        for item in fetch(repo, since=fetch_since):
+            batch.append(item)
+            if len(batch) >= self.SYNC_BATCH_SIZE:
+                synced += self.event_store.upsert(repo, stream, batch)
+                batch = []
+        synced += len(batch)
+        complete = getattr(self._context, 'errors', 0) == errors_before
+        if not complete:
+            LOG.warning(f"{repo} 的 {stream} 同步不完整，保留原同步游标")
+        self.event_store.merge(repo, stream, batch, started_at if complete else None, fetch_since)
+        LOG.debug(f"{repo} 的 {stream} 自 {fetch_since} 起增量同步 {synced} 条")
+
+    def _window_streams(self, repo, since, until=None, refresh=True):
+        """
+        返回时间窗口内提交、已关闭 Issues 与已合并 PR 的惰性迭代器：
+        启用事件存储时先增量同步再逐批读取本地数据，否则边翻页边产出 API 结果。
+        """
+        since_ts = self._normalize_timestamp(since)
+        until_ts = self._normalize_timestamp(until, end_of_day=True)
+        if self.event_store is None:
+            # Pulls API 返回所有已关闭的 PR，只保留窗口内合并的
+            pull_requests = (
+                pr for pr in self.iter_pull_requests(repo, since=since, until=until)
+                if pr.merged_at and (not since_ts or pr.merged_at >= since_ts) and (not until_ts or pr.merged_at <= until_ts)
+            )
+            return {
+                'commits': self.iter_commits(repo, since=since, until=until),
+                'issues': self.iter_issues(repo, since=since, until=until),
+                'pull_requests': pull_requests,
+            }
+        if refresh:
+            self.sync_repo(repo, since)
+        return {stream: self.event_store.iter_query(repo, stream, since_ts, until_ts)
+                for stream in ('commits', 'issues', 'pull_requests')}
+
+    @staticmethod
+    def _one_line(text):
+        return ' '.join(str(text).splitlines())
+
+    def _write_updates(self, file, streams, period):
+        """
+        并发消费三个数据流，以紧凑的 Issues / Pull Requests / Commits 三个章节写出进展：
+        Issues 去掉重复的 PR，能归入 PR 的提交只在 PR 条目后记录数量。
+        Issues 与提交先按行暂存到临时文件，待已合并 PR 的编号确定后再过滤写出，
+        内存中只保留窗口内的 PR 与各 PR 的提交计数。标题与提交信息中的换行符替换为空格，保证一条一行。
+        """
+        pull_requests = []
+        commit_counts = {}
+        # 只以 \n 分行，标题中残留的 \r 等字符不会把一条记录拆成两行
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n') as issue_lines, \
+                tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n') as commit_lines:
+
+            def spool_issues():
+                for issue in streams['issues']:
+                    if not issue.is_pull_request:  # /issues 接口混入的 PR
+                        issue_lines.write(f"{issue.number}\t- {self._one_line(issue.title)} #{issue.number}\n")
+
+            def spool_commits():
+                for commit in streams['commits']:
+                    number, is_merge = pull_request_reference(commit)
+                    if number is not None and not is_merge:
+                        commit_counts[number] = commit_counts.get(number, 0) + 1
+                    # 行首记录所属 PR 编号，写出时丢弃已归入窗口内 PR 的提交（包括合并提交本身）
+                    commit_lines.write(f"{'' if number is None else number}\t- {self._one_line(commit.message)}\n")
+
+            self._fetch_streams({
+                'commits': spool_commits,
+                'issues': spool_issues,
+                'pull_requests': partial(pull_requests.extend, streams['pull_requests']),
+            })
+            numbers = {pull_request.number for pull_request in pull_requests}
+
+            file.write(f"\n## Issues Closed {period}\n")
+            issue_lines.seek(0)
+            for line in issue_lines:
+                number, text = line.split('\t', 1)
+                if int(number) not in numbers:
+                    file.write(text)
+
+            file.write(f"\n## Pull Requests Merged {period}\n")
+            for pull_request in pull_requests:
+                commits = commit_counts.get(pull_request.number, 0)
+                suffix = f" ({commits} commits)" if commits > 1 else ""
+                file.write(f"- {pull_request.title} #{pull_request.number}{suffix}\n")
+
+            file.write(f"\n## Commits {period}\n")
+            commit_lines.seek(0)
+            for line in commit_lines:
+                reference, text = line.split('\t', 1)
+                if not reference or int(reference) not in numbers:
+                    file.write(text)
 
     def export_daily_progress(self, repo):
         LOG.debug(f"[准备导出项目进度]：{repo}")
         today = datetime.now().date().isoformat()  # 获取今天的日期
-        updates = self.fetch_updates(repo, since=today)  # 获取今天的更新数据
         
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建存储路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
         
         file_path = os.path.join(repo_dir, f'{today}.md')  # 构建文件路径
-        with open(file_path, 'w') as file:
+        # 流式写入临时文件，完成后原子替换，失败时不会留下被截断的文件
+        with open_atomic(file_path) as file:
             file.write(f"# Daily Progress for {repo} ({today})\n\n")
-            file.write("\n## Issues Closed Today\n")
-            for issue in updates['issues']:  # 写入今天关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            self._write_updates(file, self._window_streams(repo, since=today), "Today")
         
         LOG.info(f"[{repo}]项目每日进展文件生成： {file_path}")  # 记录日志
         return file_path
 
-    def export_progress_by_date_range(self, repo, days):
+    @staticmethod
+    def _date_range(days):
+        # 计算最近 days 天的起止日期
         today = date.today()  # 获取当前日期
-        since = today - timedelta(days=days)  # 计算开始日期
-        
-        updates = self.fetch_updates(repo, since=since.isoformat(), until=today.isoformat())  # 获取指定日期范围内的更新
+        return today - timedelta(days=days), today
+
+    def export_progress_by_date_range(self, repo, days, refresh=True):
+        """
+        导出最近 days 天的项目进展。启用事件存储且 refresh 为 False 时只查询本地数据，不访问网络。
+        """
+        since, today = self._date_range(days)  # 计算开始日期
         
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建目录路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
@@ -94,11 +432,46 @@ class GitHubClient:
         date_str = f"{since}_to_{today}"
         file_path = os.path.join(repo_dir, f'{date_str}.md')  # 构建文件路径
         
-        with open(file_path, 'w') as file:
+        # 流式写入临时文件，完成后原子替换，失败时不会留下被截断的文件
+        with open_atomic(file_path) as file:
             file.write(f"# Progress for {repo} ({since} to {today})\n\n")
-            file.write(f"\n## Issues Closed in the Last {days} Days\n")
-            for issue in updates['issues']:  # 写入在指定日期内关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            streams = self._window_streams(repo, since=since.isoformat(), until=today.isoformat(), refresh=refresh)
+            self._write_updates(file, streams, f"in the Last {days} Days")
         
         LOG.info(f"[{repo}]项目最新进展文件生成： {file_path}")  # 记录日志
         return file_path
+
+    def export_progress_for_repos(self, repos, days, max_workers=1):
+        """
+        并发导出多个仓库的最新进展，返回与 repos 顺序一致的 (repo, file_path) 列表。
+        单个仓库导出失败只记录日志并返回 None，不影响其他仓库。
+
+        :param repos: 仓库名称列表。
+        :param days: 导出的天数范围。
+        :param max_workers: 最大并发数，为 1 时按顺序逐个导出。
+        """
+        self.scheduler.plan(len(repos) * self.REQUESTS_PER_REPO)
+
+        def export(index):
+            repo = repos[index]
+            # 配额紧张时按订阅顺序放行请求，先开始的仓库先完成，而不是所有仓库一起变慢
+            self._context.priority = index
+            try:
+                return self.export_progress_by_date_range(repo, days)
+            except Exception as e:
+                LOG.error(f"[{repo}]项目进展导出失败：{str(e)}")
+                return None
+            finally:
+                self._context.priority = 0
+
+        order = range(len(repos))
+        if max_workers <= 1 or len(repos) <= 1:
+            paths = {index: export(index) for index in order}
+        else:
+            LOG.info(f"并发导出 {len(repos)} 个仓库的进展，并发数：{max_workers}")
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github-export') as executor:
+                paths = dict(zip(order, executor.map(export, order)))
+        self.log_cache_stats()
+        self.scheduler.log_metrics()
+        # 输出顺序始终与 repos 一致，保证结果确定
+        return [(repo, paths[index]) for index, repo in enumerate(repos)]
@@ -0,0 +1,308 @@
+# src/github_graphql_client.py
+
+import json  # 导入json模块用于构造查询中的字符串字面量
+import threading  # 导入threading模块保护预取结果
+from github_client import GitHubClient  # 导入REST客户端作为基类
+from github_records import CommitRecord, IssueRecord, PullRequestRecord  # 导入紧凑记录类型
+from logger import LOG  # 导入日志模块
+
+# 每个仓库在一次查询中请求的三类连接，以及对应的 GraphQL 字段片段
+COMMIT_FIELDS = "oid messageHeadline committedDate url author { name }"
+ISSUE_FIELDS = "number title url closedAt updatedAt"
+PULL_REQUEST_FIELDS = "number title url mergedAt closedAt updatedAt"
+PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+
+
+class GitHubGraphQLClient(GitHubClient):
+    """
+    使用 GitHub GraphQL API 的批量后端：把 N 个仓库的提交、已关闭 Issues 和已合并 PR
+    打包进同一个带别名的查询，每个连接独立进行游标分页。
+    返回结构与 GitHubClient.fetch_updates 相同，节点直接投影为与 REST 后端一致的记录类型。
+    """
+
+    def __init__(self, token, per_page=100, session=None, base_url='https://api.github.com', scheduler=None, batch_size=20,
+                 event_store=None, repo_deadline=None):
+        super().__init__(token, per_page=per_page, session=session, base_url=base_url, scheduler=scheduler,
+                         event_store=event_store, repo_deadline=repo_deadline)
+        self.graphql_url = f'{self.base_url}/graphql'  # GraphQL 接口地址
+        self.headers = {'Authorization': f'bearer {self.token}'}  # GraphQL 接口使用 bearer 认证
+        self.batch_size = batch_size  # 单次查询包含的仓库数
+        self.query_count = 0  # 已发出的 GraphQL 查询数
+        self._prefetched = {}  # 批量预取的结果，键为 (repo, since, until)
+        self._fetch_locks = {}  # 每个预取键的查询锁，同一仓库的三个流只查询一次
+        self._failed_prefetch = set()  # 查询失败、结果不完整的预取键
+        self._prefetch_lock = threading.Lock()
+
+    def fetch_updates(self, repo, since=None, until=None):
+        key = self._prefetch_key(repo, since, until)
+        with self._prefetch_lock:
+            updates = self._prefetched.pop(key, None)
+            failed = key in self._failed_prefetch
+            self._failed_prefetch.discard(key)
+        if updates is None:
+            return self.fetch_updates_batch([repo], since, until)[repo]
+        if failed:
+            self._count_error()
+        return updates
+
+    def fetch_updates_batch(self, repos, since=None, until=None):
+        """
+        批量获取多个仓库的更新，返回 {repo: {'commits', 'issues', 'pull_requests'}}。
+        查询失败的仓库返回已获取的部分结果，并与 REST 翻页失败一样计入当前线程的错误数，
+        启用事件存储时同步游标因此不会越过未获取的时间窗口。
+        """
+        results, failed = self._fetch_batch(repos, since, until)
+        if failed:
+            self._count_error()
+        return results
+
+    def _fetch_batch(self, repos, since, until):
+        # 返回 (结果, 查询失败的仓库集合)
+        results = {}
+        failed = set()
+        for start in range(0, len(repos), self.batch_size):
+            chunk = repos[start:start + self.batch_size]
+            try:
+                chunk_results, chunk_failed = self._fetch_chunk(chunk, since, until)
+            except Exception as e:
+                LOG.error(f"GraphQL 批量获取 {chunk} 失败：{str(e)}")
+                chunk_results, chunk_failed = {repo: self._empty_updates() for repo in chunk}, set(chunk)
+            results.update(chunk_results)
+            failed |= chunk_failed
+        return results, failed
+
+    def _count_error(self):
+        self._context.errors = getattr(self._context, 'errors', 0) + 1
+
+    def iter_commits(self, repo, since=None, until=None):
+        yield from self._updates_for(repo, since, until, 'commits')
+
+    def iter_issues(self, repo, since=None, until=None):
+        yield from self._updates_for(repo, since, until, 'issues')
+
+    def iter_pull_requests(self, repo, since=None, until=None):
+        yield from self._updates_for(repo, since, until, 'pull_requests')
+
+    def export_progress_for_repos(self, repos, days, max_workers=1):
+        # 先用少量批量查询预取所有仓库，再复用基类逻辑写出 Markdown
+        if self.event_store is not None:
+            # 增量同步按仓库各自的游标拉取，无法共用同一个时间窗口的预取结果；
+            # 每个仓库的三个流在 _updates_for 中共用一次单仓库查询
+            try:
+                return super().export_progress_for_repos(repos, days, max_workers=max_workers)
+            finally:
+                self._discard_prefetched(repos)
+        since, today = self._date_range(days)
+        since, today = since.isoformat(), today.isoformat()
+        queries_before = self.query_count
+        prefetched, failed = self._fetch_batch(list(repos), since, today)
+        with self._prefetch_lock:
+            for repo, updates in prefetched.items():
+                key = self._prefetch_key(repo, since, today)
+                self._prefetched[key] = updates
+                if repo in failed:
+                    self._failed_prefetch.add(key)
+        LOG.info(f"GraphQL 批量获取 {len(repos)} 个仓库，共 {self.query_count - queries_before} 次查询")
+        try:
+            return super().export_progress_for_repos(repos, days, max_workers=max_workers)
+        finally:
+            self._discard_prefetched(repos)
+
+    def _discard_prefetched(self, repos):
+        # 导出结束后不再保留未用到的流，避免下一次导出读到过期数据
+        repos = set(repos)
+        with self._prefetch_lock:
+            for key in [key for key in self._prefetched if key[0] in repos]:
+                del self._prefetched[key]
+            for key in [key for key in self._fetch_locks if key[0] in repos]:
+                del self._fetch_locks[key]
+            self._failed_prefetch = {key for key in self._failed_prefetch if key[0] not in repos}
+
+    @staticmethod
+    def _prefetch_key(repo, since, until):
+        # since/until 可能是 date 或字符串，统一转为字符串作为键
+        return repo, str(since) if since else None, str(until) if until else None
+
+    def _updates_for(self, repo, since, until, stream):
+        """
+        优先使用预取结果，每个流读取后即释放。没有预取时单独查询该仓库一次，
+        结果同样存入预取字典，同一时间窗口的其余两个流直接复用，不再各自查询。
+        查询失败时每个读取该结果的流都在各自线程中计入一次错误。
+        """
+        key = self._prefetch_key(repo, since, until)
+        with self._prefetch_lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            with self._prefetch_lock:
+                updates = self._prefetched.get(key)
+            if updates is None or stream not in updates:
+                results, failed = self._fetch_batch([repo], since, until)
+                updates = results[repo]
+                with self._prefetch_lock:
+                    self._prefetched[key] = updates
+                    if failed:
+                        self._failed_prefetch.add(key)
+                    else:
+                        self._failed_prefetch.discard(key)
+            with self._prefetch_lock:
+                items = updates.pop(stream)
+                failed = key in self._failed_prefetch
+                if not updates:
+                    self._prefetched.pop(key, None)
+                    self._fetch_locks.pop(key, None)
+                    self._failed_prefetch.discard(key)
+        if failed:
+            self._count_error()
+        return items
+
+    def _fetch_chunk(self, repos, since, until):
+        """
+        对一组仓库循环发出查询，直到所有连接都已翻完或超出时间窗口，返回 (结果, 查询失败的仓库集合)。
+        查询返回错误或缺少某个仓库的数据时，该仓库停止翻页并记为失败。
+        """
+        since_ts = self._normalize_timestamp(since)
+        until_ts = self._normalize_timestamp(until, end_of_day=True)
+        results = {repo: self._empty_updates() for repo in repos}
+        failed = set()
+        # 每个仓库每个连接的翻页状态：None 表示第一页，字符串为游标，False 表示已结束
+        cursors = {repo: {'commits': None, 'issues': None, 'pull_requests': None} for repo in repos}
+
+        while any(cursor is not False for state in cursors.values() for cursor in state.values()):
+            aliases = {}
+            parts = []
+            for index, repo in enumerate(repos):
+                state = cursors[repo]
+                fragment = self._repository_fragment(repo, state, since_ts, until_ts)
+                if fragment:
+                    alias = f"r{index}"
+                    aliases[alias] = repo
+                    parts.append(f"{alias}: {fragment}")
+
+            data, errors = self._execute("query {\n" + "\n".join(parts) + "\n}")
+            for error in errors:
+                # 错误的 path 以仓库别名开头；没有 path 时无法确定范围，视为本次查询的仓库全部失败
+                alias = (error.get('path') or [None])[0]
+                failed.update([aliases[alias]] if alias in aliases else aliases.values())
+            for alias, repo in aliases.items():
+                node = data.get(alias)
+                if node is None or repo in failed:
+                    if node is None:
+                        LOG.error(f"GraphQL 未返回仓库 {repo} 的数据")
+                    failed.add(repo)
+                    cursors[repo] = {stream: False for stream in cursors[repo]}
+                    continue
+                self._collect(node, repo, results[repo], cursors[repo], since_ts, until_ts)
+        return results, failed
+
+    def _repository_fragment(self, repo, state, since_ts, until_ts):
+        owner, name = repo.split('/', 1)
+        connections = []
+        if state['commits'] is not False:
+            args = self._connection_args(state['commits'], since=since_ts, until=until_ts)
+            connections.append(
+                f"defaultBranchRef {{ target {{ ... on Commit {{ history({args}) "
+                f"{{ {PAGE_INFO} nodes {{ {COMMIT_FIELDS} }} }} }} }} }}")
+        if state['issues'] is not False:
+            args = self._connection_args(state['issues'], states='CLOSED', since_filter=since_ts)
+            connections.append(f"issues({args}) {{ {PAGE_INFO} nodes {{ {ISSUE_FIELDS} }} }}")
+        if state['pull_requests'] is not False:
+            args = self._connection_args(state['pull_requests'], states='MERGED')
+            connections.append(f"pullRequests({args}) {{ {PAGE_INFO} nodes {{ {PULL_REQUEST_FIELDS} }} }}")
+        if not connections:
+            return None
+        return f"repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {' '.join(connections)} }}"
+
+    def _connection_args(self, cursor, states=None, since=None, until=None, since_filter=None):
+        args = [f"first: {self.per_page}"]
+        if cursor:
+            args.append(f"after: {json.dumps(cursor)}")
+        if since:
+            args.append(f"since: {json.dumps(since)}")
+        if until:
+            args.append(f"until: {json.dumps(until)}")
+        if states:
+            args.append(f"states: {states}")
+            args.append("orderBy: {field: UPDATED_AT, direction: DESC}")
+        if since_filter:
+            args.append(f"filterBy: {{since: {json.dumps(since_filter)}}}")
+        return ", ".join(args)
+
+    def _collect(self, node, repo, updates, state, since_ts, until_ts):
+        # 提交历史：since/until 已在服务端过滤
+        if state['commits'] is not False:
+            history = ((node.get('defaultBranchRef') or {}).get('target') or {}).get('history')
+            if history is None:
+                state['commits'] = False  # 空仓库没有默认分支
+            else:
+                updates['commits'].extend(self._to_commit_record(commit) for commit in history['nodes'])
+                state['commits'] = self._next_cursor(history, True)
+
+        for stream, field, convert in (('issues', 'issues', self._to_issue_record),
+                                       ('pull_requests', 'pullRequests', self._to_pull_request_record)):
+            if state[stream] is False:
+                continue
+            connection = node[field]
+            in_window = True
+            for item in connection['nodes']:
+                updated_at = item.get('updatedAt')
+                if until_ts and updated_at and updated_at > until_ts:
+                    continue
+                if since_ts and updated_at and updated_at < since_ts:
+                    in_window = False  # 按更新时间倒序，之后的条目都早于窗口
+                    break
+                updates[stream].append(convert(item))
+            state[stream] = self._next_cursor(connection, in_window)
+
+    @staticmethod
+    def _next_cursor(connection, in_window):
+        page_info = connection['pageInfo']
+        if in_window and page_info['hasNextPage']:
+            return page_info['endCursor']
+        return False
+
+    def _execute(self, query):
+        response = self._request(self.session.post, self.graphql_url, headers=self.headers, json={'query': query}, timeout=30)
+        self.query_count += 1
+        response.raise_for_status()
+        payload = response.json()
+        errors = payload.get('errors') or []
+        if errors:
+            LOG.error(f"GraphQL 查询返回错误：{errors}")
+        return payload.get('data') or {}, errors
+
+    @staticmethod
+    def _empty_updates():
+        return {'commits': [], 'issues': [], 'pull_requests': []}
+
+    @staticmethod
+    def _to_commit_record(node):
+        return CommitRecord(
+            sha=node['oid'],
+            message=node.get('messageHeadline'),
+            author=(node.get('author') or {}).get('name'),
+            committed_at=node.get('committedDate'),
+            url=node.get('url'),
+        )
+
+    @staticmethod
+    def _to_issue_record(node):
+        # GraphQL 的 issues 连接不包含 PR
+        return IssueRecord(
+            number=node['number'],
+            title=node['title'],
+            state='closed',
+            url=node.get('url'),
+            closed_at=node.get('closedAt'),
+            updated_at=node.get('updatedAt'),
+        )
+
+    @staticmethod
+    def _to_pull_request_record(node):
+        return PullRequestRecord(
+            number=node['number'],
+            title=node['title'],
+            url=node.get('url'),
+            merged_at=node.get('mergedAt'),
+            closed_at=node.get('closedAt'),
+            updated_at=node.get('updatedAt'),
+        )
@@ -0,0 +1,102 @@
+# src/github_records.py
+
+import re  # 导入re模块从提交说明中识别 PR 编号
+from dataclasses import dataclass  # 导入dataclass用于定义紧凑的记录类型
+
+# squash 合并的提交说明以 "(#123)" 结尾，普通合并提交以 "Merge pull request #123" 开头
+SQUASH_MERGE_PATTERN = re.compile(r'\(#(\d+)\)\s*$')
+MERGE_COMMIT_PATTERN = re.compile(r'^Merge pull request #(\d+)')
+
+# 以下记录类型只保留报告需要的字段，使用 __slots__ 避免每个实例携带 __dict__。
+# GitHub API 返回的原始 JSON 包含 user、reactions、labels 等大量嵌套对象，
+# 在分页流式读取时即投影为记录，原始数据随页面一同释放。
+
+@dataclass(slots=True)
+class CommitRecord:
+    sha: str
+    message: str = None  # 提交说明的首行
+    author: str = None
+    committed_at: str = None
+    url: str = None
+
+
+@dataclass(slots=True)
+class IssueRecord:
+    number: int
+    title: str = None
+    state: str = None
+    url: str = None
+    is_pull_request: bool = False  # /issues 接口也会返回 PR
+    closed_at: str = None
+    updated_at: str = None
+
+
+@dataclass(slots=True)
+class PullRequestRecord:
+    number: int
+    title: str = None
+    url: str = None
+    merged_at: str = None
+    closed_at: str = None
+    updated_at: str = None
+
+
+def normalize_commit(item):
+    """
+    将 REST commits 接口返回的 JSON 投影为 CommitRecord。
+    """
+    commit = item.get('commit') or {}
+    author = commit.get('author') or {}
+    committer = commit.get('committer') or {}
+    message = commit.get('message') or ''
+    return CommitRecord(
+        sha=item['sha'],
+        message=message.split('\n', 1)[0],
+        author=author.get('name'),
+        committed_at=committer.get('date') or author.get('date'),
+        url=item.get('html_url'),
+    )
+
+
+def normalize_issue(item):
+    """
+    将 REST issues 接口返回的 JSON 投影为 IssueRecord。
+    """
+    return IssueRecord(
+        number=item['number'],
+        title=item.get('title'),
+        state=item.get('state'),
+        url=item.get('html_url'),
+        is_pull_request='pull_request' in item,
+        closed_at=item.get('closed_at'),
+        updated_at=item.get('updated_at'),
+    )
+
+
+def normalize_pull_request(item):
+    """
+    将 REST pulls 接口返回的 JSON 投影为 PullRequestRecord。
+    """
+    return PullRequestRecord(
+        number=item['number'],
+        title=item.get('title'),
+        url=item.get('html_url'),
+        merged_at=item.get('merged_at'),
+        closed_at=item.get('closed_at'),
+        updated_at=item.get('updated_at'),
+    )
+
+
+
+def pull_request_reference(commit):
+    """
+    从提交说明中识别所属 PR，返回 (PR 编号, 是否为合并提交)；无法识别时编号为 None。
+    """
+    message = commit.message or ''
+    merge = MERGE_COMMIT_PATTERN.match(message)
+    if merge:
+        return int(merge.group(1)), True
+    squash = SQUASH_MERGE_PATTERN.search(message)
+    if squash:
+        return int(squash.group(1)), False
+    return None, False
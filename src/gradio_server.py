@@ -3,6 +3,7 @@ import gradio as gr  # 导入gradio库用于创建GUI
 from config import Config  # 导入配置管理模块
 from github_client import GitHubClient  # 导入用于GitHub API操作的客户端
 from hacker_news_client import HackerNewsClient
+from http_session import create_session_from_config  # 导入共享HTTP会话工厂
 from report_generator import ReportGenerator  # 导入报告生成器模块
 from llm import LLM  # 导入可能用于处理语言模型的LLM类
 from subscription_manager import SubscriptionManager  # 导入订阅管理器
@@ -10,11 +11,12 @@ from logger import LOG  # 导入日志记录器
 
 # 创建各个组件的实例
 config = Config()
-github_client = GitHubClient(config.github_token)
-hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
+session = create_session_from_config(config)  # 创建所有客户端共享的HTTP会话
+github_client = GitHubClient.from_config(config, session=session)
+hacker_news_client = HackerNewsClient.from_config(config, session=session) # 创建 Hacker News 客户端实例
 subscription_manager = SubscriptionManager(config.subscriptions_file)
 
-def generate_github_report(model_type, model_name, repo, days):
+def generate_github_report(model_type, model_name, repo, days, refresh=True):
     config.llm_model_type = model_type
 
     if model_type == "openai":
@@ -22,14 +24,14 @@ def generate_github_report(model_type, model_name, repo, days):
     else:
         config.ollama_model_name = model_name
 
-    llm = LLM(config)  # 创建语言模型实例
+    llm = LLM(config, session=session)  # 创建语言模型实例
     report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
 
     # 定义一个函数，用于导出和生成指定时间范围内项目的进展报告
-    raw_file_path = github_client.export_progress_by_date_range(repo, days)  # 导出原始数据文件路径
-    report, report_file_path = report_generator.generate_github_report(raw_file_path)  # 生成并获取报告内容及文件路径
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    raw_file_path = github_client.export_progress_by_date_range(repo, days, refresh=refresh)  # 导出原始数据文件路径
+    # 流式生成报告，边生成边刷新页面，生成完成后提供报告文件下载
+    for report, report_file_path in report_generator.stream_github_report(raw_file_path):
+        yield report, report_file_path
 
 def generate_hn_hour_topic(model_type, model_name):
     config.llm_model_type = model_type
@@ -39,13 +41,12 @@ def generate_hn_hour_topic(model_type, model_name):
     else:
         config.ollama_model_name = model_name
 
-    llm = LLM(config)  # 创建语言模型实例
+    llm = LLM(config, session=session)  # 创建语言模型实例
     report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
 
     markdown_file_path = hacker_news_client.export_top_stories()
-    report, report_file_path = report_generator.generate_hn_topic_report(markdown_file_path)
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    for report, report_file_path in report_generator.stream_hn_topic_report(markdown_file_path):
+        yield report, report_file_path
 
 
 # 定义一个回调函数，用于根据 Radio 组件的选择返回不同的 Dropdown 选项
@@ -75,6 +76,10 @@ with gr.Blocks(title="GitHubSentinel") as demo:
         # 创建 Slider 组件
         days = gr.Slider(value=2, minimum=1, maximum=7, step=1, label="报告周期", info="生成项目过去一段时间进展，单位：天")
 
+        # 创建 Checkbox 组件，取消勾选时只查询本地事件存储；未配置事件存储时总是访问 GitHub，不显示该选项
+        refresh = gr.Checkbox(value=True, label="同步最新数据", info="取消勾选时直接使用本地已同步的数据，不访问 GitHub",
+                              visible=github_client.event_store is not None)
+
         # 使用 radio 组件的值来更新 dropdown 组件的选项
         model_type.change(fn=update_model_list, inputs=model_type, outputs=model_name)
 
@@ -86,7 +91,7 @@ with gr.Blocks(title="GitHubSentinel") as demo:
         file_output = gr.File(label="下载报告")
 
         # 将按钮点击事件与导出函数绑定
-        button.click(generate_github_report, inputs=[model_type, model_name, subscription_list, days], outputs=[markdown_output, file_output])
+        button.click(generate_github_report, inputs=[model_type, model_name, subscription_list, days, refresh], outputs=[markdown_output, file_output])
 
     # 创建 Hacker News 热点话题 Tab
     with gr.Tab("Hacker News 热点话题"):
@@ -1,41 +1,109 @@
-import requests  # 导入requests库用于HTTP请求
-from bs4 import BeautifulSoup  # 导入BeautifulSoup库用于解析HTML内容
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池，用于并发抓取多个页面
 from datetime import datetime  # 导入datetime模块用于获取日期和时间
 import os  # 导入os模块用于文件和目录操作
+from article_fetcher import ArticleFetcher  # 导入文章正文抓取器
+from http_session import HostPacer, create_session  # 导入共享HTTP会话工厂与按主机限速器
+from hn_parser import parse_stories  # 导入首页解析器
+from hn_snapshot_store import StorySnapshotStore  # 导入列式快照存储
 from logger import LOG  # 导入日志模块
 
 class HackerNewsClient:
-    def __init__(self):
-        self.url = 'https://news.ycombinator.com/'  # Hacker News的URL
+    # 支持抓取的列表，news 为首页
+    FEEDS = ('news', 'newest', 'best', 'show', 'ask')
+    # 名次至少上升这么多才算上升中的新闻，避免上方新闻掉榜带来的小幅波动
+    DELTA_MIN_CLIMB = 5
+
+    def __init__(self, session=None, parser='fast', base_url='https://news.ycombinator.com', pages=1, feeds=None,
+                 max_workers=4, request_interval=1.0, snapshot_store=None,
+                 article_fetcher=None):
+        """
+        :param pages: 每个列表抓取的页数，第 N 页对应 ?p=N。
+        :param feeds: 首页之外额外抓取的列表，取值见 FEEDS。
+        :param max_workers: 并发抓取的最大页面数。
+        :param request_interval: 同一主机两次请求之间的最小间隔（秒）。
+        :param snapshot_store: 列式快照存储，导出时记录名次、分数与评论数，为 None 时不记录。
+        :param article_fetcher: 文章正文抓取器，导出时为新闻附加正文摘录，为 None 时只导出标题与链接。
+        """
+        self.base_url = base_url.rstrip('/')  # Hacker News 地址，可指向本地替身服务用于测试
+        self.url = f'{self.base_url}/'  # Hacker News首页的URL
+        self.session = session or create_session()  # 复用连接池与重试策略的HTTP会话
+        self.parser = parser  # 首页解析后端：fast（流式分词）或 bs4（BeautifulSoup）
+        self.pages = max(pages, 1)
+        self.feeds = [feed for feed in (feeds or []) if feed != 'news']
+        for feed in self.feeds:
+            if feed not in self.FEEDS:
+                raise ValueError(f"不支持的 Hacker News 列表: {feed}")
+        self.max_workers = max_workers
+        self.pacer = HostPacer(request_interval)  # 所有抓取线程共享的按主机限速器
+        self.snapshot_store = snapshot_store
+        self.article_fetcher = article_fetcher
+
+    @classmethod
+    def from_config(cls, config, session=None):
+        snapshot_store = StorySnapshotStore(config.hn_snapshot_dir) if config.hn_snapshot_dir else None
+        return cls(session=session, pages=config.hn_pages, feeds=config.hn_feeds, max_workers=config.hn_concurrency,
+                   request_interval=config.hn_request_interval, snapshot_store=snapshot_store,
+                   article_fetcher=ArticleFetcher.from_config(config, session=session))
 
     def fetch_top_stories(self):
+        """
+        并发抓取首页及配置的其他列表的各页，首页新闻按原有排名在前，其他列表的新增新闻追加在后，
+        返回新闻字典列表（字段见 hn_parser）。
+        单个页面失败只记录日志，不影响其他页面。
+        """
         LOG.debug("准备获取Hacker News的热门新闻。")
+        targets = [(feed, page) for feed in ['news'] + self.feeds for page in range(1, self.pages + 1)]
+        if len(targets) == 1:
+            pages = [self._fetch_page(*targets[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hn-fetch') as executor:
+                pages = list(executor.map(lambda target: self._fetch_page(*target), targets))
+        return self._merge(targets, pages)
+
+    def _page_url(self, feed, page):
+        if feed == 'news' and page == 1:
+            return self.url
+        return f'{self.base_url}/{feed}' + (f'?p={page}' if page > 1 else '')
+
+    def _fetch_page(self, feed, page):
+        url = self._page_url(feed, page)
         try:
-            response = requests.get(self.url, timeout=10)
+            self.pacer.wait(url)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()  # 检查请求是否成功
-            top_stories = self.parse_stories(response.text)  # 解析新闻数据
-            return top_stories
+            return self.parse_stories(response.text)  # 解析新闻数据
         except Exception as e:
-            LOG.error(f"获取Hacker News的热门新闻失败：{str(e)}")
+            LOG.error(f"获取Hacker News的热门新闻失败（{feed} 第 {page} 页）：{str(e)}")
             return []
 
+    @staticmethod
+    def _merge(targets, pages):
+        # 首页各页按原有顺序排在前面，其他列表中首页未出现的新闻依次追加在后面；按 id 或链接去重
+        seen = set()
+        merged = []
+        ordered = sorted(zip(targets, pages), key=lambda item: item[0][0] != 'news')  # 稳定排序，保持页码顺序
+        for _, stories in ordered:
+            for story in stories:
+                keys = {story['link']} | ({story['id']} if story.get('id') else set())
+                if keys & seen:
+                    continue
+                seen |= keys
+                merged.append(story)
+        return merged
+
     def parse_stories(self, html_content):
         LOG.debug("解析Hacker News的HTML内容。")
-        soup = BeautifulSoup(html_content, 'html.parser')
-        stories = soup.find_all('tr', class_='athing')  # 查找所有包含新闻的<tr>标签
-        
-        top_stories = []
-        for story in stories:
-            title_tag = story.find('span', class_='titleline').find('a')
-            if title_tag:
-                title = title_tag.text
-                link = title_tag['href']
-                top_stories.append({'title': title, 'link': link})
-        
+        top_stories = parse_stories(html_content, parser=self.parser)
         LOG.info(f"成功解析 {len(top_stories)} 条Hacker News新闻。")
         return top_stories
 
-    def export_top_stories(self, date=None, hour=None):
+    def export_top_stories(self, date=None, hour=None, record=False):
+        """
+        抓取热门新闻并写入 hacker_news/{date}/{hour}.md，返回文件路径；没有新闻时返回 None。
+
+        :param record: 为 True 时同时记录快照并导出变化文件。只有定时任务记录，
+                       避免界面或命令行的临时抓取打乱快照间隔与增量主题报告。
+        """
         LOG.debug("准备导出Hacker News的热门新闻。")
         top_stories = self.fetch_top_stories()  # 获取新闻数据
         
@@ -49,6 +117,9 @@ class HackerNewsClient:
         if hour is None:
             hour = datetime.now().strftime('%H')
 
+        if self.article_fetcher is not None:
+            top_stories = self.article_fetcher.enrich(top_stories)  # 附加文章正文摘录，供 LLM 理解文章内容
+
         # 构建存储路径
         dir_path = os.path.join('hacker_news', date)
         os.makedirs(dir_path, exist_ok=True)  # 确保目录存在
@@ -57,9 +128,93 @@ class HackerNewsClient:
         with open(file_path, 'w') as file:
             file.write(f"# Hacker News Top Stories ({date} {hour}:00)\n\n")
             for idx, story in enumerate(top_stories, start=1):
-                file.write(f"{idx}. [{story['title']}]({story['link']})\n")
+                file.write(self._story_line(idx, story))
         
         LOG.info(f"Hacker News热门新闻文件生成：{file_path}")
+        if record and self.snapshot_store is not None:
+            try:
+                self._export_delta(dir_path, date, hour, top_stories)
+                self.snapshot_store.record(date, top_stories)
+            except Exception as e:
+                LOG.error(f"记录Hacker News快照失败：{str(e)}")
+        return file_path
+
+    def _export_delta(self, dir_path, date, hour, top_stories):
+        """
+        与上一次快照按 id 对比，把新上榜与名次明显上升的新闻写入 {hour}_delta.md，
+        供增量主题报告使用；没有上一次快照时删除可能残留的旧文件，主题报告回退到全量模式。
+        """
+        delta_path = os.path.join(dir_path, f'{hour}_delta.md')
+        previous = self.snapshot_store.latest_snapshot(date)
+        if previous is None:
+            if os.path.exists(delta_path):
+                os.remove(delta_path)
+            return None
+
+        new_stories, climbing = self.diff_stories(previous, top_stories, self.DELTA_MIN_CLIMB)
+        with open(delta_path, 'w') as file:
+            file.write(f"# Hacker News Top Stories Delta ({date} {hour}:00)\n\n")
+            if new_stories:
+                file.write("## New Stories\n")
+                for idx, story in enumerate(new_stories, start=1):
+                    file.write(self._story_line(idx, story))
+            if climbing:
+                file.write("\n## Climbing Stories\n")
+                for idx, (story, previous_rank, rank) in enumerate(climbing, start=1):
+                    file.write(self._story_line(idx, story, f" (rank {previous_rank} -> {rank})"))
+        LOG.info(f"Hacker News变化文件生成：{delta_path}（新上榜 {len(new_stories)} 条，上升 {len(climbing)} 条）")
+        return delta_path
+
+    @staticmethod
+    def _story_line(idx, story, suffix=''):
+        # 新闻条目，附加了文章摘录时在下一行以引用块写出（压缩为一行）
+        line = f"{idx}. [{story['title']}]({story['link']}){suffix}\n"
+        if story.get('excerpt'):
+            line += f"    > {' '.join(story['excerpt'].split())}\n"
+        return line
+
+    @staticmethod
+    def diff_stories(previous, stories, min_climb):
+        """
+        previous 为上一次快照 {story_id: 名次}，stories 为按名次排列的本次结果。
+        返回 (新上榜的新闻, [(上升的新闻, 原名次, 现名次)])，缺少 id 的新闻无法对比，不计入。
+        """
+        new_stories, climbing = [], []
+        for rank, story in enumerate(stories, start=1):
+            if story.get('id') is None:
+                continue
+            previous_rank = previous.get(story['id'])
+            if previous_rank is None:
+                new_stories.append(story)
+            elif previous_rank - rank >= min_climb:
+                climbing.append((story, previous_rank, rank))
+        return new_stories, climbing
+
+    def export_rising_stories(self, date=None, limit=20):
+        """
+        根据当天的快照导出名次与分数都在上升的新闻到 hacker_news/{date}/rising.md，
+        作为每日汇总报告的精简输入。未启用快照存储或快照不足时返回 None。
+        """
+        if self.snapshot_store is None:
+            return None
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        rising = self.snapshot_store.rising_stories(date, limit=limit)
+        if not rising:
+            LOG.warning(f"{date} 的Hacker News快照不足，无法计算上升趋势。")
+            return None
+
+        dir_path = os.path.join('hacker_news', date)
+        os.makedirs(dir_path, exist_ok=True)
+        file_path = os.path.join(dir_path, 'rising.md')
+        with open(file_path, 'w') as file:
+            file.write(f"# Hacker News Rising Stories ({date})\n\n")
+            for idx, story in enumerate(rising, start=1):
+                file.write(f"{idx}. [{story['title']}]({story['link']}) - {story['points']} points, "
+                           f"{story['comments']} comments, rank {story['first_rank']} -> {story['rank']}, "
+                           f"+{story['point_velocity']:.1f} points/h\n")
+
+        LOG.info(f"Hacker News上升新闻文件生成：{file_path}")
         return file_path
 
 
@@ -0,0 +1,185 @@
+# src/hn_parser.py
+
+from calendar import timegm  # 导入timegm将UTC时间转换为时间戳
+from html.parser import HTMLParser  # 导入标准库的HTML分词器
+import time  # 导入time模块解析ISO时间
+from logger import LOG  # 导入日志模块
+
+
+def _new_story(story_id):
+    # 解析结果的字段：id、页内名次、标题、链接、分数、评论数与发布时间（Unix 时间戳）
+    return {'id': int(story_id) if story_id and story_id.isdigit() else None, 'rank': None, 'title': None,
+            'link': None, 'points': 0, 'comments': 0, 'posted_at': None}
+
+
+def _parse_rank(text):
+    text = text.strip().rstrip('.')
+    return int(text) if text.isdigit() else None
+
+
+def _parse_points(text):
+    parts = text.split()
+    return int(parts[0]) if parts and parts[0].isdigit() else 0
+
+
+def _parse_comments(text):
+    # "45 comments"/"1 comment" 返回数量，"discuss" 等其他链接返回 None
+    parts = text.replace('\xa0', ' ').split()
+    if len(parts) == 2 and parts[0].isdigit() and parts[1] in ('comment', 'comments'):
+        return int(parts[0])
+    return None
+
+
+def _parse_posted_at(title):
+    # span.age 的 title 形如 "2024-09-01T10:00:00 1725184800"，旧页面只有 ISO 时间
+    parts = (title or '').split()
+    if len(parts) > 1 and parts[1].isdigit():
+        return int(parts[1])
+    try:
+        return timegm(time.strptime(parts[0], '%Y-%m-%dT%H:%M:%S'))
+    except (IndexError, ValueError):
+        return None
+
+
+class _FrontPageTokenizer(HTMLParser):
+    """
+    只跟踪首页中的 tr.athing 行与紧随其后的副文本行，不构建文档树：
+    从前者读取 id、名次与 span.titleline 中的第一个链接，从后者读取分数、发布时间与评论数。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stories = []
+        self._row = None  # 当前行的类型：story、subtext 或 None
+        self._story = None  # 当前行对应的新闻
+        self._in_titleline = False  # 当前位于 span.titleline 中
+        self._titled = False  # 当前新闻已读到标题链接
+        self._capture = None  # 正在读取文本的 (字段, 结束标签, 文本片段)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            classes = self._classes(attrs)
+            if 'athing' in classes:
+                self._row = 'story'
+                self._story = _new_story(dict(attrs).get('id'))
+                self._titled = False
+            else:
+                self._row = 'subtext' if self._row == 'story' and self._titled else None
+            self._in_titleline = False
+            self._capture = None
+            return
+        if self._row is None or self._capture is not None:
+            return
+        classes = self._classes(attrs)
+        if self._row == 'story':
+            if tag == 'span' and 'rank' in classes:
+                self._capture = ('rank', 'span', [])
+            elif tag == 'span' and 'titleline' in classes:
+                self._in_titleline = True
+            elif tag == 'a' and self._in_titleline and not self._titled:
+                self._story['link'] = dict(attrs).get('href')
+                self._capture = ('title', 'a', [])
+        elif tag == 'span' and 'score' in classes:
+            self._capture = ('points', 'span', [])
+        elif tag == 'span' and 'age' in classes:
+            self._story['posted_at'] = _parse_posted_at(dict(attrs).get('title'))
+        elif tag == 'a':
+            self._capture = ('comments', 'a', [])
+
+    def handle_endtag(self, tag):
+        if self._capture is None or tag != self._capture[1]:
+            return
+        field, _, text = self._capture
+        text = ''.join(text)
+        self._capture = None
+        if field == 'rank':
+            self._story['rank'] = _parse_rank(text)
+        elif field == 'title':
+            self._story['title'] = text
+            self._titled = True
+            self._in_titleline = False
+            self.stories.append(self._story)
+        elif field == 'points':
+            self._story['points'] = _parse_points(text)
+        elif _parse_comments(text) is not None:
+            self._story['comments'] = _parse_comments(text)
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._capture[2].append(data)
+
+    @staticmethod
+    def _classes(attrs):
+        for name, value in attrs:
+            if name == 'class':
+                return (value or '').split()
+        return ()
+
+
+def parse_stories_fast(html_content):
+    """
+    使用流式分词器解析 Hacker News 列表页，按页面顺序返回新闻字典列表。
+    """
+    tokenizer = _FrontPageTokenizer()
+    # 只把 athing 行及其后的副文本行交给分词器，跳过页头、间隔行与页脚等其余标记
+    rows = html_content.split('<tr')
+    for index in range(1, len(rows)):
+        if 'athing' in rows[index]:
+            tokenizer.feed('<tr' + rows[index])
+            if index + 1 < len(rows):
+                tokenizer.feed('<tr' + rows[index + 1])
+    tokenizer.close()
+    return tokenizer.stories
+
+
+def parse_stories_bs4(html_content):
+    """
+    使用 BeautifulSoup 构建完整文档树后解析，作为备用实现。
+    """
+    from bs4 import BeautifulSoup  # 延迟导入，只有使用备用实现时才需要
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    top_stories = []
+    for row in soup.find_all('tr', class_='athing'):  # 查找所有包含新闻的<tr>标签
+        titleline = row.find('span', class_='titleline')
+        title_tag = titleline.find('a') if titleline else None
+        if not title_tag:
+            continue
+        story = _new_story(row.get('id'))
+        rank_tag = row.find('span', class_='rank')
+        if rank_tag:
+            story['rank'] = _parse_rank(rank_tag.text)
+        story['title'] = title_tag.text
+        story['link'] = title_tag.get('href')
+
+        subtext = row.find_next_sibling('tr')  # 分数、发布时间与评论数所在的副文本行
+        if subtext and 'athing' not in (subtext.get('class') or []):
+            score_tag = subtext.find('span', class_='score')
+            if score_tag:
+                story['points'] = _parse_points(score_tag.text)
+            age_tag = subtext.find('span', class_='age')
+            if age_tag:
+                story['posted_at'] = _parse_posted_at(age_tag.get('title'))
+            for link in subtext.find_all('a'):
+                if _parse_comments(link.text) is not None:
+                    story['comments'] = _parse_comments(link.text)
+        top_stories.append(story)
+    return top_stories
+
+
+PARSERS = {
+    'fast': parse_stories_fast,
+    'bs4': parse_stories_bs4,
+}
+
+
+def parse_stories(html_content, parser='fast'):
+    """
+    按指定后端解析列表页；快速解析失败时记录日志并回退到 BeautifulSoup。
+    """
+    if parser != 'bs4':
+        try:
+            return PARSERS[parser](html_content)
+        except Exception as e:
+            LOG.warning(f"{parser} 解析 Hacker News 页面失败，回退到 BeautifulSoup：{str(e)}")
+    return parse_stories_bs4(html_content)
@@ -0,0 +1,179 @@
+# src/hn_snapshot_store.py
+
+import json  # 导入json模块保存新闻标题与链接
+import os  # 导入os模块用于文件和目录操作
+import tempfile  # 导入tempfile模块用于原子写入
+import threading  # 导入threading模块保证并发访问安全
+import time  # 导入time模块获取快照时间
+from datetime import datetime, timedelta  # 导入日期处理模块查找前一天的快照
+import numpy as np  # 导入NumPy按列保存快照并做向量化计算
+from logger import LOG  # 导入日志模块
+
+# 每列的数据类型；rank 为新闻在导出列表中的名次（从 1 开始）
+COLUMNS = {
+    'story_id': np.int64,
+    'rank': np.int32,
+    'points': np.int32,
+    'comments': np.int32,
+    'timestamp': np.int64,
+}
+
+
+class StorySnapshotStore:
+    """
+    按天保存 Hacker News 列表快照的列式存储：{root}/{date}/snapshots.npz 中每列一个数组，
+    标题与链接按 id 另存于 stories.json。每小时的抓取结果追加为一组行，
+    一天内所有快照可以一次载入，向量化计算名次速度与分数加速度。
+    """
+
+    def __init__(self, root='hacker_news'):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _paths(self, date):
+        directory = os.path.join(self.root, date)
+        return directory, os.path.join(directory, 'snapshots.npz'), os.path.join(directory, 'stories.json')
+
+    def load(self, date):
+        """
+        返回当天的全部快照 {列名: 数组}，没有快照时各列为空数组。
+        """
+        _, snapshot_path, _ = self._paths(date)
+        if not os.path.exists(snapshot_path):
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        with np.load(snapshot_path) as data:
+            return {name: data[name] for name in COLUMNS}
+
+    def load_stories(self, date):
+        _, _, stories_path = self._paths(date)
+        if not os.path.exists(stories_path):
+            return {}
+        with open(stories_path, 'r', encoding='utf-8') as file:
+            return {int(story_id): story for story_id, story in json.load(file).items()}
+
+    def latest_snapshot(self, date):
+        """
+        返回最近一次快照 {story_id: 名次}；当天还没有快照时查找前一天，都没有时返回 None。
+        """
+        previous_date = (datetime.strptime(date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        for candidate in (date, previous_date):
+            columns = self.load(candidate)
+            if len(columns['timestamp']):
+                latest = columns['timestamp'] == columns['timestamp'].max()
+                return dict(zip(columns['story_id'][latest].tolist(), columns['rank'][latest].tolist()))
+        return None
+
+    def record(self, date, stories, timestamp=None):
+        """
+        追加一次快照，stories 为按名次排列的解析结果；缺少 id 的新闻无法跨快照关联，直接跳过。
+        返回写入的行数。
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        rows = [(story['id'], rank, story.get('points', 0), story.get('comments', 0))
+                for rank, story in enumerate(stories, start=1) if story.get('id') is not None]
+        if not rows:
+            return 0
+        story_ids, ranks, points, comments = zip(*rows)
+        snapshot = {
+            'story_id': np.array(story_ids, dtype=COLUMNS['story_id']),
+            'rank': np.array(ranks, dtype=COLUMNS['rank']),
+            'points': np.array(points, dtype=COLUMNS['points']),
+            'comments': np.array(comments, dtype=COLUMNS['comments']),
+            'timestamp': np.full(len(rows), timestamp, dtype=COLUMNS['timestamp']),
+        }
+
+        directory, snapshot_path, stories_path = self._paths(date)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            existing = self.load(date)
+            columns = {name: np.concatenate([existing[name], snapshot[name]]) for name in COLUMNS}
+            known = self.load_stories(date)
+            for story in stories:
+                if story.get('id') is not None:
+                    known[story['id']] = {'title': story['title'], 'link': story['link']}
+            self._write_atomic(snapshot_path, lambda file: np.savez_compressed(file, **columns))
+            self._write_atomic(stories_path, lambda file: file.write(json.dumps(known, ensure_ascii=False).encode('utf-8')))
+        LOG.debug(f"记录 Hacker News 快照 {len(rows)} 条：{snapshot_path}")
+        return len(rows)
+
+    @staticmethod
+    def _write_atomic(path, write):
+        # 写入同目录下的临时文件后再替换，中途失败不会破坏已有快照
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                write(file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def compute_trends(self, date):
+        """
+        向量化计算当天每条新闻的趋势指标，只包含至少出现在两次快照中的新闻：
+          - rank_velocity：每小时上升的名次数（正数表示排名上升）；
+          - point_velocity：每小时增加的分数；
+          - point_acceleration：最后一个快照间隔与第一个间隔的分数速度之差，再按时间跨度换算到每小时。
+        返回 {列名: 数组}，每个元素对应一条新闻。
+        """
+        columns = self.load(date)
+        order = np.lexsort((columns['timestamp'], columns['story_id']))  # 按 (id, 时间) 排序
+        story_ids = columns['story_id'][order]
+        ranks = columns['rank'][order].astype(np.float64)
+        points = columns['points'][order].astype(np.float64)
+        timestamps = columns['timestamp'][order]
+
+        if len(story_ids) == 0:
+            starts = ends = np.empty(0, dtype=np.intp)
+        else:
+            starts = np.flatnonzero(np.r_[True, story_ids[1:] != story_ids[:-1]])
+            ends = np.r_[starts[1:], len(story_ids)] - 1
+        tracked = ends > starts
+        starts, ends = starts[tracked], ends[tracked]
+
+        hours = np.maximum(timestamps[ends] - timestamps[starts], 1) / 3600
+        # 相邻快照之间的分数速度；跨新闻边界的间隔不会被取用
+        gaps = np.maximum(np.diff(timestamps), 1) / 3600
+        interval_velocity = np.diff(points) / gaps if len(points) > 1 else np.empty(0)
+        acceleration = np.where(ends - starts >= 2,
+                                (interval_velocity[ends - 1] - interval_velocity[starts]) / hours, 0.0)
+        return {
+            'story_id': story_ids[starts],
+            'snapshots': ends - starts + 1,
+            'first_rank': ranks[starts].astype(np.int32),
+            'rank': ranks[ends].astype(np.int32),
+            'points': points[ends].astype(np.int32),
+            'comments': columns['comments'][order][ends],
+            'rank_velocity': (ranks[starts] - ranks[ends]) / hours,
+            'point_velocity': (points[ends] - points[starts]) / hours,
+            'point_acceleration': acceleration,
+        }
+
+    def rising_stories(self, date, limit=20):
+        """
+        返回当天真正在上升的新闻：分数持续增长且名次没有下滑，按分数速度从高到低排列。
+        """
+        trends = self.compute_trends(date)
+        rising = np.flatnonzero((trends['point_velocity'] > 0) & (trends['rank_velocity'] >= 0))
+        # 先按分数速度、再按加速度降序排列
+        rising = rising[np.lexsort((-trends['point_acceleration'][rising], -trends['point_velocity'][rising]))][:limit]
+        stories = self.load_stories(date)
+        results = []
+        for index in rising:
+            story_id = int(trends['story_id'][index])
+            story = stories.get(story_id, {})
+            results.append({
+                'id': story_id,
+                'title': story.get('title'),
+                'link': story.get('link'),
+                'snapshots': int(trends['snapshots'][index]),
+                'first_rank': int(trends['first_rank'][index]),
+                'rank': int(trends['rank'][index]),
+                'points': int(trends['points'][index]),
+                'comments': int(trends['comments'][index]),
+                'rank_velocity': float(trends['rank_velocity'][index]),
+                'point_velocity': float(trends['point_velocity'][index]),
+                'point_acceleration': float(trends['point_acceleration'][index]),
+            })
+        return results
@@ -0,0 +1,112 @@
+import random  # 导入random模块用于生成退避抖动
+import threading  # 导入threading模块保护各主机的节奏状态
+import time  # 导入time模块用于计时与休眠
+from urllib.parse import urlsplit  # 导入urlsplit从URL中取出主机名
+import requests  # 导入requests库用于HTTP请求
+from requests.adapters import HTTPAdapter  # 导入HTTP适配器，用于配置连接池
+from urllib3.util.retry import Retry  # 导入urllib3的重试策略
+from logger import LOG  # 导入日志模块
+
+# 默认对限流和服务端瞬时错误进行重试
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# 非幂等方法读超时后服务端可能已处理请求，重发会重复扣费或重复提交，只对状态码与连接错误重试
+NON_IDEMPOTENT_METHODS = frozenset(['POST'])
+
+
+class JitterRetry(Retry):
+    """
+    在 urllib3 指数退避的基础上叠加随机抖动，避免多个客户端同时重试造成请求尖峰。
+    服务端返回 Retry-After 时，urllib3 会优先按该头部等待。POST 请求读超时后不再重发。
+    """
+
+    def __init__(self, *args, jitter=0.5, **kwargs):
+        self.jitter = jitter
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        # urllib3 每次重试都会通过 new() 复制实例，这里保留抖动参数
+        retry = super().new(**kwargs)
+        retry.jitter = self.jitter
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if error is not None and self._is_read_error(error) and method and method.upper() in NON_IDEMPOTENT_METHODS:
+            raise error
+        return super().increment(method=method, url=url, response=response, error=error, _pool=_pool,
+                                 _stacktrace=_stacktrace)
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return backoff
+        return backoff + random.uniform(0, self.jitter)
+
+
+class HostPacer:
+    """
+    按主机限制请求发起的最小间隔，供并发抓取的多个线程共享，避免对同一站点形成突发请求。
+    """
+
+    def __init__(self, min_interval=1.0, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next_allowed = {}  # 每个主机下一次允许发起请求的时间
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """
+        阻塞到允许向 url 所在主机发起下一个请求，各线程按到达顺序依次错开。
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = start + self.min_interval
+        if start > now:
+            self.sleep(start - now)
+
+
+def create_session(pool_connections=10, pool_maxsize=10, max_retries=3, backoff_factor=0.5, jitter=0.5):
+    """
+    创建带连接池、keep-alive 与重试退避策略的 requests.Session，供各个客户端共享。
+
+    :param pool_connections: 缓存的主机连接池数量。
+    :param pool_maxsize: 每个主机连接池中保持的最大连接数。
+    :param max_retries: 瞬时错误的最大重试次数。
+    :param backoff_factor: 指数退避的基数（秒）。
+    :param jitter: 每次退避额外叠加的最大随机抖动（秒）。
+    :return: 配置好的 requests.Session 实例。
+    """
+    retry = JitterRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # 重试耗尽后返回最后一次响应，由调用方统一处理
+        jitter=jitter,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    LOG.debug(f"创建HTTP会话：每主机连接数 {pool_maxsize}，最大重试 {max_retries} 次")
+    return session
+
+
+def create_session_from_config(config):
+    """
+    根据配置对象中的 http 配置创建共享会话。
+    """
+    return create_session(
+        pool_connections=config.http_pool_connections,
+        pool_maxsize=config.http_pool_maxsize,
+        max_retries=config.http_max_retries,
+        backoff_factor=config.http_backoff_factor,
+        jitter=config.http_backoff_jitter,
+    )
@@ -1,84 +1,446 @@
+import asyncio  # 导入asyncio实现异步并发生成
 import json
-import requests
+import threading  # 导入threading模块在后台预热模型
+import time  # 导入time模块统计生成耗时
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池，承载阻塞的模型调用
 from openai import OpenAI  # 导入OpenAI库用于访问GPT模型
+from disk_cache import DiskCache  # 导入磁盘缓存，保存已生成的报告
+from llm_metrics import LLMMetrics  # 导入调用指标记录器
+from http_session import create_session  # 导入共享HTTP会话工厂
+from token_counter import count_tokens  # 导入token计数器统计生成速度
 from logger import LOG  # 导入日志模块
 
+# 计算输入预算时只使用剩余上下文的 90%，抵消 token 估算误差与消息格式开销
+TOKEN_BUDGET_MARGIN = 0.9
+# 输入预算的下限，避免配置的上下文过小时无法分块
+MIN_INPUT_TOKENS = 256
+# OpenAI 批处理任务结束时的状态
+BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
 class LLM:
-    def __init__(self, config):
+    def __init__(self, config, session=None, cache=None, model_type=None, model_name=None, api_url=None, name=None,
+                 metrics=None):
         """
         初始化 LLM 类，根据配置选择使用的模型（OpenAI 或 Ollama）。
 
         :param config: 配置对象，包含所有的模型配置参数。
+        :param session: 可选的共享 HTTP 会话，用于复用与 Ollama 服务的连接。
+        :param cache: 可选的报告缓存（DiskCache），未传入时按配置中的 llm.cache_dir 创建，未配置时不缓存。
+        :param model_type: 模型类型，未指定时取配置中的 llm.model_type；model_name、api_url 同理，
+                           用于在 llm.backends 中配置多个后端。
+        :param name: 后端名称，用于日志与路由统计，默认为模型类型。
+        :param metrics: 可选的调用指标记录器（LLMMetrics），未传入时按配置中的 llm.metrics_file 创建。
         """
         self.config = config
-        self.model = config.llm_model_type.lower()  # 获取模型类型并转换为小写
+        if cache is None and config.llm_cache_dir:
+            cache = DiskCache(config.llm_cache_dir, max_entries=config.llm_cache_max_entries,
+                              max_age=config.llm_cache_max_age_hours * 3600)
+        self.cache = cache
+        self.metrics = metrics or LLMMetrics.from_config(config)
+        self.cache_hits = 0  # 直接从缓存返回的报告数
+        self.cache_misses = 0  # 实际调用模型生成的报告数
+        self.cache_seconds_saved = 0.0  # 缓存命中节省的生成耗时（秒）
+        self.last_call_stats = None  # 最近一次生成的首 token 延迟、耗时与生成速度
+        self.model = (model_type or config.llm_model_type).lower()  # 获取模型类型并转换为小写
+        self.name = name or self.model
         if self.model == "openai":
-            self.client = OpenAI()  # 创建OpenAI客户端实例
+            self.model_name = model_name or config.openai_model_name
+            # 创建OpenAI客户端实例；base_url 为空时使用官方服务
+            self.client = OpenAI(base_url=config.openai_base_url, timeout=config.llm_request_timeout)
         elif self.model == "ollama":
-            self.api_url = config.ollama_api_url  # 设置Ollama API的URL
+            self.model_name = model_name or config.ollama_model_name
+            self.api_url = api_url or config.ollama_api_url  # 设置Ollama API的URL
+            self.session = session or create_session()  # 复用连接池与重试策略的HTTP会话
         else:
             LOG.error(f"不支持的模型类型: {self.model}")
             raise ValueError(f"不支持的模型类型: {self.model}")  # 如果模型类型不支持，抛出错误
 
-    def generate_report(self, system_prompt, user_content):
+    def generate_report(self, system_prompt, user_content, use_cache=True, label=None, queue_seconds=0.0):
         """
         生成报告，根据配置选择不同的模型来处理请求。
+        启用缓存时，相同的模型、提示、内容与生成参数直接返回上次生成的报告。
 
         :param system_prompt: 系统提示信息，包含上下文和规则。
         :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :param use_cache: 为 False 时跳过缓存，强制重新生成并覆盖缓存。
+        :param label: 报告类型，调用指标按报告类型汇总。
+        :param queue_seconds: 调用前在并发队列中等待的时间（秒），计入调用指标。
         :return: 生成的报告内容。
         """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content},
-        ]
+        lookup_start = time.monotonic()
+        cache_key = self._cache_key(system_prompt, user_content)
+        cached = self._cached_report(cache_key, use_cache)
+        cache_seconds = time.monotonic() - lookup_start
+        if cached is not None:
+            self._record_metrics(label, cache_hit=True, wall_seconds=cache_seconds, queue_seconds=queue_seconds)
+            return cached
+
+        messages = self._messages(system_prompt, user_content)
 
         # 根据选择的模型调用相应的生成报告方法
+        start = time.monotonic()
+        usage = {}  # 后端返回的 token 数与各阶段耗时
+        try:
+            if self.model == "openai":
+                report = self._generate_report_openai(messages, usage)
+            elif self.model == "ollama":
+                report = self._generate_report_ollama(messages, usage)
+            else:
+                raise ValueError(f"不支持的模型类型: {self.model}")
+        except Exception as e:
+            self._record_metrics(label, error=type(e).__name__, wall_seconds=time.monotonic() - start,
+                                 queue_seconds=queue_seconds, cache_seconds=cache_seconds)
+            raise
+
+        # 非流式调用只有在完整响应返回后才能看到第一个 token
+        elapsed = time.monotonic() - start
+        self._finish_call(cache_key, report, elapsed, elapsed, usage, label=label, queue_seconds=queue_seconds,
+                          cache_seconds=cache_seconds)
+        return report
+
+    def stream_report(self, system_prompt, user_content, use_cache=True, label=None, queue_seconds=0.0):
+        """
+        流式生成报告，模型每输出一段文本就产出一次，参数同 generate_report。
+        命中缓存时一次产出完整报告；生成结束后记录首 token 延迟与每秒 token 数。
+        """
+        lookup_start = time.monotonic()
+        cache_key = self._cache_key(system_prompt, user_content)
+        cached = self._cached_report(cache_key, use_cache)
+        cache_seconds = time.monotonic() - lookup_start
+        if cached is not None:
+            self._record_metrics(label, cache_hit=True, wall_seconds=cache_seconds, queue_seconds=queue_seconds)
+            yield cached
+            return
+
+        messages = self._messages(system_prompt, user_content)
+        usage = {}
         if self.model == "openai":
-            return self._generate_report_openai(messages)
+            stream = self._stream_report_openai(messages, usage)
         elif self.model == "ollama":
-            return self._generate_report_ollama(messages)
+            stream = self._stream_report_ollama(messages, usage)
         else:
             raise ValueError(f"不支持的模型类型: {self.model}")
 
-    def _generate_report_openai(self, messages):
+        start = time.monotonic()
+        first_token = None
+        chunks = []
+        try:
+            for chunk in stream:
+                if first_token is None:
+                    first_token = time.monotonic() - start
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._record_metrics(label, error=type(e).__name__, wall_seconds=time.monotonic() - start,
+                                 queue_seconds=queue_seconds, cache_seconds=cache_seconds)
+            raise
+        elapsed = time.monotonic() - start
+        self._finish_call(cache_key, ''.join(chunks), first_token if first_token is not None else elapsed, elapsed,
+                          usage, label=label, queue_seconds=queue_seconds, cache_seconds=cache_seconds)
+
+    @property
+    def supports_batch(self):
+        # 只有 OpenAI 后端提供离线批处理接口
+        return self.model == "openai"
+
+    def generate_reports_batch(self, requests, use_cache=True, poll_interval=None, timeout=None, label=None):
+        """
+        通过 OpenAI Batch API 离线生成多份报告：未命中缓存的请求写成一个 JSONL 文件一次提交，
+        轮询到批处理结束后取回结果并写入缓存。批处理按离线价格计费，且不占用实时接口的速率限制。
+
+        :param requests: {custom_id: (system_prompt, user_content)}，custom_id 为字符串。
+        :param poll_interval: 轮询批处理状态的间隔（秒），默认取配置 llm.batch.poll_interval。
+        :param timeout: 等待批处理完成的最长时间（秒），超时后取消批处理并抛出 TimeoutError。
+        :param label: 报告类型，调用指标按报告类型汇总。
+        :return: {custom_id: 报告内容}，生成失败的请求对应 None。
+        """
+        if not self.supports_batch:
+            raise ValueError(f"{self.model} 不支持批处理生成")
+        poll_interval = self.config.llm_batch_poll_interval if poll_interval is None else poll_interval
+        timeout = self.config.llm_batch_timeout_hours * 3600 if timeout is None else timeout
+
+        reports = {}
+        pending = {}  # custom_id -> (缓存键, 请求行)
+        for custom_id, (system_prompt, user_content) in requests.items():
+            cache_key = self._cache_key(system_prompt, user_content)
+            cached = self._cached_report(cache_key, use_cache)
+            if cached is not None:
+                self._record_metrics(label, cache_hit=True, wall_seconds=0.0)
+                reports[custom_id] = cached
+                continue
+            pending[custom_id] = (cache_key, {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model_name, "messages": self._messages(system_prompt, user_content),
+                         **self._generation_params()},
+            })
+        if not pending:
+            return reports
+
+        start = time.monotonic()
+        batch_input = "\n".join(json.dumps(line, ensure_ascii=False) for _, line in pending.values()) + "\n"
+        input_file = self.client.files.create(file=("reports.jsonl", batch_input.encode('utf-8')), purpose="batch")
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions",
+                                           completion_window="24h")
+        LOG.info(f"已提交 OpenAI 批处理 {batch.id}，共 {len(pending)} 个请求，使用 {self.model_name} 模型。")
+
+        while batch.status not in BATCH_FINAL_STATUSES:
+            if time.monotonic() - start >= timeout:
+                self.client.batches.cancel(batch.id)
+                raise TimeoutError(f"OpenAI 批处理 {batch.id} 在 {timeout} 秒内未完成，已取消")
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        elapsed = time.monotonic() - start
+        LOG.info(f"OpenAI 批处理 {batch.id} 结束，状态 {batch.status}，耗时 {elapsed:.0f} 秒。")
+
+        # 过期或取消的批处理也可能带有部分结果；失败的请求写在错误文件中
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                for line in self.client.files.content(file_id).text.splitlines():
+                    if line.strip():
+                        item = json.loads(line)
+                        results[item.get("custom_id")] = item
+
+        for custom_id, (cache_key, _) in pending.items():
+            item = results.get(custom_id)
+            report = self._batch_report(custom_id, item)
+            reports[custom_id] = report
+            usage = (((item or {}).get("response") or {}).get("body") or {}).get("usage") or {}
+            # 批处理无法区分单个请求的耗时，按请求数平均分摊
+            self._record_metrics(label, batch=True, error=None if report else "BatchError",
+                                 wall_seconds=elapsed / len(pending), prompt_tokens=usage.get("prompt_tokens"),
+                                 completion_tokens=usage.get("completion_tokens"))
+            if cache_key is not None and report:
+                # 缓存中记录每个请求平均分摊的批处理耗时
+                self.cache.set(cache_key, {'report': report, 'elapsed': elapsed / len(pending)})
+        return reports
+
+    @staticmethod
+    def _batch_report(custom_id, item):
+        # 从批处理结果行中取出报告内容，失败时记录日志并返回 None
+        if item is None:
+            LOG.error(f"批处理结果中缺少请求 {custom_id}")
+            return None
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            LOG.error(f"批处理请求 {custom_id} 生成失败：{item.get('error') or response.get('body')}")
+            return None
+        return response["body"]["choices"][0]["message"]["content"]
+
+    def cached_report(self, system_prompt, user_content, label=None):
+        """
+        返回缓存中已生成的报告，未启用缓存或未命中时返回 None。
+        只查看缓存：未命中不计入未命中次数，由随后实际调用模型生成时统计。
+        """
+        start = time.monotonic()
+        cached = self._cached_report(self._cache_key(system_prompt, user_content), True, count_miss=False)
+        if cached is not None:
+            self._record_metrics(label, cache_hit=True, wall_seconds=time.monotonic() - start)
+        return cached
+
+    @staticmethod
+    def _messages(system_prompt, user_content):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
+    def _cache_key(self, system_prompt, user_content):
+        if self.cache is None:
+            return None
+        return DiskCache.make_key(self.model, self.model_name, system_prompt, user_content, self._generation_params())
+
+    def _cached_report(self, cache_key, use_cache, count_miss=True):
+        # 命中时返回缓存的报告并累计节省的耗时，未启用缓存或未命中时返回 None
+        if cache_key is None:
+            return None
+        entry = self.cache.get(cache_key) if use_cache else None
+        if entry is None:
+            if count_miss:
+                self.cache_misses += 1
+            return None
+        self.cache_hits += 1
+        self.cache_seconds_saved += entry['elapsed']
+        LOG.info(f"命中报告缓存，节省约 {entry['elapsed']:.1f} 秒的生成时间。")
+        return entry['report']
+
+    def _finish_call(self, cache_key, report, first_token, elapsed, usage=None, label=None, queue_seconds=0.0,
+                     cache_seconds=0.0):
+        """
+        记录本次生成的速度指标并写入调用指标文件，再把完整报告写入缓存。
+        usage 为后端返回的 token 数与各阶段耗时，后端没有返回输出 token 数时按报告内容估算。
+        """
+        usage = usage or {}
+        tokens = usage.get('completion_tokens') or count_tokens(report)
+        load_seconds = usage.get('load_seconds')
+        # Ollama 单独返回生成阶段的耗时；其他后端以首 token 之后的时间近似
+        generation_time = usage.get('eval_seconds') or (elapsed - first_token if elapsed > first_token else elapsed)
+        self.last_call_stats = {
+            'time_to_first_token': round(first_token, 3),
+            'elapsed': round(elapsed, 3),
+            'load_seconds': round(load_seconds, 3) if load_seconds is not None else None,
+            'prompt_tokens': usage.get('prompt_tokens'),
+            'tokens': tokens,
+            'tokens_per_second': round(tokens / generation_time, 1) if generation_time > 0 else None,
+        }
+        load = f"（其中加载模型 {load_seconds:.2f} 秒）" if load_seconds else ""
+        LOG.info(f"{self.model_name} 生成 {tokens} 个 token，首 token 延迟 {first_token:.2f} 秒，"
+                 f"总耗时 {elapsed:.2f} 秒{load}，速度 {self.last_call_stats['tokens_per_second']} token/秒")
+        self._record_metrics(label, wall_seconds=elapsed, queue_seconds=queue_seconds, cache_seconds=cache_seconds,
+                             time_to_first_token=first_token, load_seconds=load_seconds,
+                             prompt_tokens=usage.get('prompt_tokens'), completion_tokens=tokens,
+                             prompt_eval_seconds=usage.get('prompt_eval_seconds'), generation_seconds=generation_time,
+                             tokens_per_second=self.last_call_stats['tokens_per_second'])
+        if cache_key is not None and report:
+            self.cache.set(cache_key, {'report': report, 'elapsed': elapsed})
+
+    def _record_metrics(self, label, **fields):
+        # 写入一条调用指标，耗时统一保留到毫秒
+        if self.metrics is None:
+            return
+        fields = {key: round(value, 3) if isinstance(value, float) else value for key, value in fields.items()}
+        self.metrics.record(label=label, backend=self.name, model=self.model_name, **fields)
+
+    @property
+    def max_concurrency(self):
+        # 批量生成时对该后端的最大并发请求数
+        return self.config.llm_concurrency.get(self.model, 1)
+
+    def warm_up(self, background=False):
+        """
+        预热 Ollama 模型：发送不含消息的请求，让服务端提前把模型加载进内存并按 keep_alive 保持常驻，
+        返回模型加载耗时（秒），模型已在内存中时接近 0。OpenAI 后端无需预热，返回 None。
+        background 为 True 时在后台线程中预热并立即返回该线程，可与数据导出同时进行。
+        """
+        if self.model != "ollama":
+            return None
+        if background:
+            thread = threading.Thread(target=self.warm_up, name='llm-warm-up', daemon=True)
+            thread.start()
+            return thread
+
+        start = time.monotonic()
+        try:
+            payload = {"model": self.model_name, "messages": [], "stream": False}
+            if self.config.ollama_keep_alive is not None:
+                payload["keep_alive"] = self.config.ollama_keep_alive
+            response = self.session.post(self.api_url, json=payload, timeout=self.config.ollama_warm_up_timeout)
+            response.raise_for_status()
+            response_data = response.json()
+        except Exception as e:
+            LOG.warning(f"预热 Ollama {self.model_name} 模型失败：{str(e)}")
+            return None
+        elapsed = time.monotonic() - start
+        load_seconds = response_data.get("load_duration", 0) / 1e9 if "load_duration" in response_data else elapsed
+        LOG.info(f"Ollama {self.model_name} 模型已预热，加载耗时 {load_seconds:.2f} 秒，"
+                 f"keep_alive={self.config.ollama_keep_alive}")
+        return load_seconds
+
+    @property
+    def context_tokens(self):
+        # 当前后端的上下文窗口大小（token）
+        return self.config.llm_context_tokens.get(self.model, 8192)
+
+    def input_token_budget(self, system_prompt):
+        """
+        返回单次请求中用户内容可以使用的 token 数：上下文窗口扣除输出上限与系统提示，
+        再留出余量，抵消估算误差与消息格式的开销。
+        """
+        available = self.context_tokens - self.config.llm_max_output_tokens - count_tokens(system_prompt or '')
+        return max(int(available * TOKEN_BUDGET_MARGIN), MIN_INPUT_TOKENS)
+
+    def _generation_params(self):
+        # 影响生成结果的参数，同时参与缓存键的计算
+        if self.model == "ollama":
+            # Ollama 的生成参数放在 options 中；num_ctx 未设置时服务端默认只有 2048，会静默截断输入
+            return {"options": {"temperature": 0.7, "num_ctx": self.context_tokens,
+                                "num_predict": self.config.llm_max_output_tokens}}
+        return {"max_tokens": self.config.llm_max_output_tokens}
+
+    def cache_stats(self):
+        """
+        返回报告缓存的命中、未命中次数与节省的生成耗时。
+        """
+        return {'hits': self.cache_hits, 'misses': self.cache_misses,
+                'seconds_saved': round(self.cache_seconds_saved, 3)}
+
+    def log_cache_stats(self):
+        # 在日志中输出报告缓存的命中情况
+        if self.cache is None:
+            return
+        LOG.info(f"LLM 报告缓存：命中 {self.cache_hits}，未命中 {self.cache_misses}，"
+                 f"节省生成时间 {self.cache_seconds_saved:.1f} 秒，已淘汰 {self.cache.evictions} 条")
+
+    def _generate_report_openai(self, messages, usage=None):
         """
         使用 OpenAI GPT 模型生成报告。
 
         :param messages: 包含系统提示和用户内容的消息列表。
+        :param usage: 可选的字典，写入响应中的 token 用量。
         :return: 生成的报告内容。
         """
-        LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型生成报告。")
+        LOG.info(f"使用 OpenAI {self.model_name} 模型生成报告。")
         try:
             response = self.client.chat.completions.create(
-                model=self.config.openai_model_name,  # 使用配置中的OpenAI模型名称
-                messages=messages
+                model=self.model_name,  # 使用配置中的OpenAI模型名称
+                messages=messages,
+                **self._generation_params()
             )
             LOG.debug("GPT 响应: {}", response)
+            self._record_openai_usage(response.usage, usage)
             return response.choices[0].message.content  # 返回生成的报告内容
         except Exception as e:
             LOG.error(f"生成报告时发生错误：{e}")
             raise
 
-    def _generate_report_ollama(self, messages):
+    def _ollama_payload(self, messages, stream):
+        payload = {
+            "model": self.model_name,  # 使用配置中的Ollama模型名称
+            "messages": messages,
+            **self._generation_params(),
+            "stream": stream
+        }
+        if self.config.ollama_keep_alive is not None:
+            payload["keep_alive"] = self.config.ollama_keep_alive  # 生成后模型保持常驻的时长，不影响生成结果
+        return payload
+
+    @staticmethod
+    def _record_openai_usage(response_usage, usage):
+        if usage is not None and response_usage is not None:
+            usage['prompt_tokens'] = response_usage.prompt_tokens
+            usage['completion_tokens'] = response_usage.completion_tokens
+
+    @staticmethod
+    def _record_ollama_usage(response_data, usage):
+        # Ollama 在最终响应中返回 token 数与以纳秒计的各阶段耗时
+        if usage is None:
+            return
+        for field, key in (("prompt_eval_count", 'prompt_tokens'), ("eval_count", 'completion_tokens')):
+            if field in response_data:
+                usage[key] = response_data[field]
+        for field, key in (("load_duration", 'load_seconds'), ("prompt_eval_duration", 'prompt_eval_seconds'),
+                           ("eval_duration", 'eval_seconds')):
+            if field in response_data:
+                usage[key] = response_data[field] / 1e9
+
+    def _generate_report_ollama(self, messages, usage=None):
         """
         使用 Ollama LLaMA 模型生成报告。
 
         :param messages: 包含系统提示和用户内容的消息列表。
         :return: 生成的报告内容。
         """
-        LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型生成报告。")
+        LOG.info(f"使用 Ollama {self.model_name} 模型生成报告。")
         try:
-            payload = {
-                "model": self.config.ollama_model_name,  # 使用配置中的Ollama模型名称
-                "messages": messages,
-                "max_tokens": 4000,
-                "temperature": 0.7,
-                "stream": False
-            }
-
-            response = requests.post(self.api_url, json=payload)  # 发送POST请求到Ollama API
+            payload = self._ollama_payload(messages, stream=False)
+
+            # 发送POST请求到Ollama API；设置超时，避免服务端卡住时阻塞整个守护进程
+            response = self.session.post(self.api_url, json=payload, timeout=self.config.llm_request_timeout)
             response_data = response.json()
+            self._record_ollama_usage(response_data, usage)
 
             # 调试输出查看完整的响应结构
             LOG.debug("Ollama 响应: {}", response_data)
@@ -94,6 +456,94 @@ class LLM:
             LOG.error(f"生成报告时发生错误：{e}")
             raise
 
+    def _stream_report_openai(self, messages, usage=None):
+        """
+        使用 OpenAI GPT 模型流式生成报告，逐段产出增量文本。
+        """
+        LOG.info(f"使用 OpenAI {self.model_name} 模型流式生成报告。")
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},  # 最后一段返回本次请求的 token 用量
+                **self._generation_params()
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                self._record_openai_usage(getattr(chunk, "usage", None), usage)
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    def _stream_report_ollama(self, messages, usage=None):
+        """
+        使用 Ollama 模型流式生成报告，逐行解析 Ollama 返回的 JSON 并产出增量文本。
+        """
+        LOG.info(f"使用 Ollama {self.model_name} 模型流式生成报告。")
+        try:
+            payload = self._ollama_payload(messages, stream=True)
+            with self.session.post(self.api_url, json=payload, stream=True,
+                                   timeout=self.config.llm_request_timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise ValueError(f"Ollama API 返回错误：{data['error']}")
+                    content = data.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        self._record_ollama_usage(data, usage)
+                        break
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+class AsyncLLM:
+    """
+    LLM 的异步版本：在 asyncio 中并发发起报告生成，按模型后端限制同时进行的请求数。
+    底层 HTTP 调用仍是阻塞的，在与并发上限等大的专用线程池中执行，缓存与统计沿用被包装的 LLM。
+    需在事件循环中创建并通过 async with 使用，退出时关闭线程池。
+    """
+
+    def __init__(self, llm, max_concurrency=None):
+        """
+        :param llm: 被包装的 LLM 实例。
+        :param max_concurrency: 最大并发请求数，未指定时取被包装对象的 max_concurrency。
+        """
+        self.llm = llm
+        if max_concurrency is None:
+            max_concurrency = llm.max_concurrency
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f'llm-{llm.model}')
+
+    @property
+    def model(self):
+        return self.llm.model
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._executor.shutdown(wait=False)
+
+    async def generate_report(self, system_prompt, user_content, use_cache=True, label=None):
+        """
+        异步生成报告，参数同 LLM.generate_report；超出并发上限的调用排队等待，等待时间计入调用指标。
+        """
+        queued = time.monotonic()
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, lambda: self.llm.generate_report(system_prompt, user_content, use_cache=use_cache,
+                                                                 label=label, queue_seconds=time.monotonic() - queued))
+
+
 if __name__ == '__main__':
     from config import Config  # 导入配置管理类
     config = Config()
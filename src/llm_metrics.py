@@ -0,0 +1,135 @@
+# src/llm_metrics.py
+
+import json  # 导入json模块按行读写指标记录
+import math  # 导入math模块计算延迟分位数
+import os  # 导入os模块创建指标文件所在目录
+import threading  # 导入threading模块保证多线程追加写入安全
+import time  # 导入time模块记录调用时间
+from collections import defaultdict  # 导入defaultdict按报告类型与模型分组
+from logger import LOG  # 导入日志模块
+
+
+def percentile(values, fraction):
+    """
+    最近邻法计算分位数，values 为空时返回 None。
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class LLMMetrics:
+    """
+    记录每次模型调用的耗时、token 数与吞吐量，逐行追加到 JSONL 指标文件，
+    由 summarize 按报告类型与模型汇总，用于分析一次报告生成的时间花在哪里、估算所需的硬件。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        # 未配置 llm.metrics_file 时不记录指标
+        return cls(config.llm_metrics_file) if config.llm_metrics_file else None
+
+    def record(self, **fields):
+        """
+        追加一条调用记录并返回该记录；写入失败只记录警告，不影响报告生成。
+        """
+        record = dict(timestamp=round(time.time(), 3), **fields)
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            LOG.warning(f"写入 LLM 调用指标失败：{str(e)}")
+        return record
+
+    def load(self, since=None):
+        """
+        读取指标文件中的调用记录；since 为时间戳，只返回之后的记录。无法解析的行被跳过。
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is None or record.get('timestamp', 0) >= since:
+                    records.append(record)
+        return records
+
+
+def _total(records, field):
+    return sum(record.get(field) or 0 for record in records)
+
+
+def _rate(tokens, seconds):
+    return round(tokens / seconds, 1) if seconds else None
+
+
+def summarize(records):
+    """
+    按 (报告类型, 后端, 模型) 汇总调用记录，返回字典列表：
+      - calls / cache_hits / errors：调用次数、命中缓存次数与失败次数；
+      - wall_p50 / wall_p95 / wall_total：实际调用模型的耗时分位数与总耗时（秒）；
+      - queue_mean / ttft_p50：平均排队等待时间与首 token 延迟中位数（秒）；
+      - prompt_tokens / completion_tokens：输入与输出 token 总数；
+      - tokens_per_second：输出 token 数除以生成阶段耗时；
+      - prompt_tokens_per_second：输入处理速度，只有后端返回输入处理耗时（Ollama）时才有。
+    """
+    groups = defaultdict(list)
+    for record in records:
+        groups[(record.get('label') or '-', record.get('backend') or '-', record.get('model') or '-')].append(record)
+
+    summary = []
+    for (label, backend, model), group in sorted(groups.items()):
+        calls = [record for record in group if not record.get('cache_hit')]
+        succeeded = [record for record in calls if not record.get('error')]
+        walls = [record['wall_seconds'] for record in succeeded if record.get('wall_seconds') is not None]
+        ttfts = [record['time_to_first_token'] for record in succeeded if record.get('time_to_first_token') is not None]
+        prefilled = [record for record in succeeded if record.get('prompt_eval_seconds')]
+        summary.append({
+            'label': label,
+            'backend': backend,
+            'model': model,
+            'calls': len(group),
+            'cache_hits': len(group) - len(calls),
+            'errors': len(calls) - len(succeeded),
+            'wall_p50': percentile(walls, 0.5),
+            'wall_p95': percentile(walls, 0.95),
+            'wall_total': round(sum(walls), 3),
+            'queue_mean': round(_total(group, 'queue_seconds') / len(group), 3),
+            'ttft_p50': percentile(ttfts, 0.5),
+            'prompt_tokens': _total(succeeded, 'prompt_tokens'),
+            'completion_tokens': _total(succeeded, 'completion_tokens'),
+            'tokens_per_second': _rate(_total(succeeded, 'completion_tokens'), _total(succeeded, 'generation_seconds')),
+            'prompt_tokens_per_second': _rate(_total(prefilled, 'prompt_tokens'), _total(prefilled, 'prompt_eval_seconds')),
+        })
+    return summary
+
+
+def format_summary(summary):
+    """
+    把 summarize 的结果格式化为便于在命令行阅读的表格。
+    """
+    if not summary:
+        return "没有 LLM 调用记录。"
+    columns = [('label', '报告类型'), ('backend', '后端'), ('model', '模型'), ('calls', '调用'),
+               ('cache_hits', '缓存命中'), ('errors', '失败'), ('wall_p50', 'p50(s)'), ('wall_p95', 'p95(s)'),
+               ('wall_total', '总耗时(s)'), ('queue_mean', '排队(s)'), ('ttft_p50', '首token(s)'),
+               ('prompt_tokens', '输入token'), ('completion_tokens', '输出token'), ('tokens_per_second', '输出token/s'),
+               ('prompt_tokens_per_second', '输入token/s')]
+    rows = [[title for _, title in columns]]
+    for item in summary:
+        rows.append(['-' if item[key] is None else str(item[key]) for key, _ in columns])
+    widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
@@ -0,0 +1,323 @@
+# src/llm_router.py
+
+import threading  # 导入threading模块保护各后端的统计数据
+import time  # 导入time模块统计请求耗时
+from collections import deque  # 导入deque保存最近的请求结果
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait  # 导入线程池，并发发起主请求与对冲请求
+from disk_cache import DiskCache  # 导入磁盘缓存，各后端共享同一个报告缓存
+from llm import LLM  # 导入单个模型后端
+from llm_metrics import LLMMetrics, percentile  # 导入调用指标记录器与分位数计算
+from logger import LOG  # 导入日志模块
+
+# 样本数少于该值时不判定健康状态，也不按 p95 对冲，避免个别请求就影响路由
+MIN_SAMPLES = 3
+
+
+class BackendStats:
+    """
+    记录单个后端最近 window 次请求的耗时与成败，计算 p50/p95 延迟与错误率。
+    错误率达到上限时将后端标记为不健康，冷却期过后重新参与路由。
+    """
+
+    def __init__(self, window=50, max_error_rate=0.5, cooldown=300, clock=time.monotonic):
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self._latencies = deque(maxlen=window)  # 成功请求的耗时（秒）
+        self._outcomes = deque(maxlen=window)  # 最近请求是否成功
+        self._unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+            elif len(self._outcomes) >= MIN_SAMPLES and self._error_rate() >= self.max_error_rate:
+                self._unhealthy_until = self.clock() + self.cooldown
+                self._outcomes.clear()  # 冷却结束后重新统计错误率
+
+    def _error_rate(self):
+        return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    @property
+    def healthy(self):
+        return self.clock() >= self._unhealthy_until
+
+    def latency(self, fraction, min_samples=1):
+        """
+        返回成功请求耗时的分位数（秒），样本不足 min_samples 时返回 None。
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+        return percentile(latencies, fraction) if len(latencies) >= min_samples else None
+
+    def snapshot(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            error_rate = self._error_rate()
+        return {
+            'requests': len(latencies),
+            'p50': round(percentile(latencies, 0.5), 3) if latencies else None,
+            'p95': round(percentile(latencies, 0.95), 3) if latencies else None,
+            'error_rate': round(error_rate, 3),
+            'healthy': self.healthy,
+        }
+
+
+class LLMRouter:
+    """
+    在多个模型后端（OpenAI、一个或多个 Ollama 服务）之间路由报告生成请求，接口与 LLM 相同。
+    按最近请求的 p50 延迟选择最快的健康后端，进行中的请求已达到该后端 max_concurrency 的后端排在后面，
+    每个后端的并发请求数不超过自身的上限；请求失败时依次转到下一个后端；
+    主请求超过 hedge_after 秒仍未返回时向次优后端发起一次对冲请求，取先返回的结果。
+    提示词按第一个后端的模型类型加载。
+    """
+
+    def __init__(self, backends, hedge_after='p95', window=50, max_error_rate=0.5, cooldown=300):
+        """
+        :param backends: LLM 实例列表，名称（name）不能重复。
+        :param hedge_after: 发起对冲请求前等待的秒数；为 "p95" 时取主后端最近请求的 p95 延迟，为 None 时不对冲。
+        :param window: 统计延迟与错误率的最近请求数。
+        :param max_error_rate: 错误率达到该值的后端在 cooldown 秒内不再优先使用。
+        """
+        if not backends:
+            raise ValueError("至少需要配置一个模型后端")
+        names = [backend.name for backend in backends]
+        if len(set(names)) != len(names):
+            raise ValueError(f"模型后端名称重复: {names}")
+        self.backends = list(backends)
+        self.config = self.backends[0].config
+        self.hedge_after = hedge_after
+        self.stats = {backend.name: BackendStats(window, max_error_rate, cooldown) for backend in self.backends}
+        self.last_call_stats = None  # 最近一次生成的统计，附带实际使用的后端名称
+        # 每个后端的并发上限与进行中的请求数；路由时避开已满的后端，满载时请求在信号量上排队
+        self._slots = {backend.name: threading.BoundedSemaphore(max(backend.max_concurrency, 1)) for backend in self.backends}
+        self._in_flight = {backend.name: 0 for backend in self.backends}
+        self._in_flight_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * self.max_concurrency, thread_name_prefix='llm-router')
+
+    @classmethod
+    def from_config(cls, config, session=None):
+        """
+        根据 llm.backends 与 llm.routing 配置创建路由器，各后端共享 HTTP 会话、报告缓存与调用指标文件。
+        """
+        metrics = LLMMetrics.from_config(config)
+        cache = None
+        if config.llm_cache_dir:
+            cache = DiskCache(config.llm_cache_dir, max_entries=config.llm_cache_max_entries,
+                              max_age=config.llm_cache_max_age_hours * 3600)
+        backends = []
+        for backend in config.llm_backends:
+            model_type = backend.get('model_type', config.llm_model_type)
+            backends.append(LLM(config, session=session, cache=cache, metrics=metrics, model_type=model_type,
+                                model_name=backend.get('model_name'), api_url=backend.get('api_url'),
+                                name=backend.get('name') or backend.get('api_url') or model_type))
+        return cls(backends, hedge_after=config.llm_hedge_after, window=config.llm_latency_window,
+                   max_error_rate=config.llm_max_error_rate, cooldown=config.llm_unhealthy_cooldown)
+
+    @property
+    def model(self):
+        return self.backends[0].model
+
+    @property
+    def model_name(self):
+        return self.backends[0].model_name
+
+    @property
+    def metrics(self):
+        return self.backends[0].metrics
+
+    @property
+    def max_concurrency(self):
+        return sum(backend.max_concurrency for backend in self.backends)
+
+    @property
+    def context_tokens(self):
+        # 内容可能被路由到任意后端，取最小的上下文窗口
+        return min(backend.context_tokens for backend in self.backends)
+
+    def input_token_budget(self, system_prompt):
+        return min(backend.input_token_budget(system_prompt) for backend in self.backends)
+
+    def generate_report(self, system_prompt, user_content, use_cache=True, label=None, queue_seconds=0.0):
+        """
+        生成报告，参数同 LLM.generate_report。依次尝试排序后的后端，全部失败时抛出最后一个错误。
+        """
+        if use_cache:
+            for backend in self.backends:
+                cached = backend.cached_report(system_prompt, user_content, label=label)
+                if cached is not None:
+                    return cached
+
+        candidates = deque(self._ranked())
+        pending = {}  # 进行中的请求 -> 后端
+        errors = []
+
+        def launch():
+            backend = candidates.popleft()
+            self._track(backend, 1)
+            pending[self._executor.submit(self._call, backend, system_prompt, user_content, label,
+                                          queue_seconds, time.monotonic())] = backend
+            return backend
+
+        primary = launch()
+        hedge_delay = self._hedge_delay(primary)
+        hedged = False
+        while pending:
+            timeout = hedge_delay if candidates and not hedged else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if self._saturated(candidates[0]):
+                    continue  # 次优后端已满载，对冲请求只会排队，不再发起
+                backend = launch()
+                LOG.info(f"模型后端 {primary.name} 超过 {hedge_delay:.2f} 秒未返回，向 {backend.name} 发起对冲请求")
+                continue
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    report, stats = future.result()
+                except Exception as e:
+                    LOG.warning(f"模型后端 {backend.name} 生成报告失败：{str(e)}")
+                    errors.append(e)
+                    continue
+                # 落后的请求继续在后台完成，其耗时仍计入统计
+                self.last_call_stats = dict(stats or {}, backend=backend.name)
+                return report
+            if not pending and candidates:
+                launch()  # 进行中的请求都已失败，转到下一个后端
+        raise errors[-1]
+
+    def stream_report(self, system_prompt, user_content, use_cache=True, label=None, queue_seconds=0.0):
+        """
+        流式生成报告，参数同 LLM.stream_report。已产出的文本无法撤回，因此流式生成不对冲；
+        后端在产出第一段文本之前失败时转到下一个后端。
+        """
+        if use_cache:
+            for backend in self.backends:
+                cached = backend.cached_report(system_prompt, user_content, label=label)
+                if cached is not None:
+                    yield cached
+                    return
+
+        error = None
+        for backend in self._ranked():
+            started = False
+            self._track(backend, 1)
+            try:
+                with self._slots[backend.name]:
+                    start = time.monotonic()
+                    for chunk in backend.stream_report(system_prompt, user_content, use_cache=False, label=label,
+                                                       queue_seconds=queue_seconds):
+                        started = True
+                        yield chunk
+            except Exception as e:
+                self.stats[backend.name].record(time.monotonic() - start, ok=False)
+                if started:
+                    raise
+                LOG.warning(f"模型后端 {backend.name} 生成报告失败：{str(e)}")
+                error = e
+                continue
+            finally:
+                self._track(backend, -1)
+            self.stats[backend.name].record(time.monotonic() - start, ok=True)
+            self.last_call_stats = dict(backend.last_call_stats or {}, backend=backend.name)
+            return
+        raise error
+
+    @property
+    def supports_batch(self):
+        return any(backend.supports_batch for backend in self.backends)
+
+    def generate_reports_batch(self, requests, use_cache=True, poll_interval=None, timeout=None, label=None):
+        """
+        通过第一个支持批处理的后端离线生成多份报告，参数同 LLM.generate_reports_batch。
+        """
+        backend = next((backend for backend in self.backends if backend.supports_batch), None)
+        if backend is None:
+            raise ValueError("没有支持批处理生成的模型后端")
+        return backend.generate_reports_batch(requests, use_cache=use_cache, poll_interval=poll_interval,
+                                              timeout=timeout, label=label)
+
+    def _call(self, backend, system_prompt, user_content, label, queue_seconds, submitted):
+        # 在线程池中调用单个后端并记录耗时与成败；读缓存已在路由前完成，
+        # 线程池与后端并发槽位上的等待都计入排队时间
+        try:
+            with self._slots[backend.name]:
+                start = time.monotonic()
+                try:
+                    report = backend.generate_report(system_prompt, user_content, use_cache=False, label=label,
+                                                     queue_seconds=queue_seconds + start - submitted)
+                except Exception:
+                    self.stats[backend.name].record(time.monotonic() - start, ok=False)
+                    raise
+                self.stats[backend.name].record(time.monotonic() - start, ok=True)
+                return report, backend.last_call_stats
+        finally:
+            self._track(backend, -1)
+
+    def _track(self, backend, delta):
+        with self._in_flight_lock:
+            self._in_flight[backend.name] += delta
+
+    def _saturated(self, backend):
+        with self._in_flight_lock:
+            return self._in_flight[backend.name] >= backend.max_concurrency
+
+    def _ranked(self):
+        # 健康的后端按 p50 延迟升序排列，还没有样本的后端优先尝试；已满载的后端排在空闲后端之后，
+        # 不健康的后端排在最后作为退路
+        def key(item):
+            index, backend = item
+            stats = self.stats[backend.name]
+            p50 = stats.latency(0.5)
+            return not stats.healthy, self._saturated(backend), p50 if p50 is not None else 0.0, index
+        return [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+
+    def _hedge_delay(self, backend):
+        if self.hedge_after is None or len(self.backends) < 2:
+            return None
+        if self.hedge_after == 'p95':
+            return self.stats[backend.name].latency(0.95, min_samples=MIN_SAMPLES)
+        return float(self.hedge_after)
+
+    def warm_up(self, background=False):
+        """
+        预热所有后端，返回 {后端名称: LLM.warm_up 的返回值}。
+        """
+        return {backend.name: backend.warm_up(background=background) for backend in self.backends}
+
+    def backend_stats(self):
+        """
+        返回各后端最近请求的 p50/p95 延迟（秒）、错误率与健康状态。
+        """
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def cache_stats(self):
+        totals = {'hits': 0, 'misses': 0, 'seconds_saved': 0.0}
+        for backend in self.backends:
+            for key, value in backend.cache_stats().items():
+                totals[key] += value
+        totals['seconds_saved'] = round(totals['seconds_saved'], 3)
+        return totals
+
+    def log_cache_stats(self):
+        # 在日志中输出报告缓存的命中情况与各后端的延迟统计
+        if self.backends[0].cache is not None:
+            stats = self.cache_stats()
+            LOG.info(f"LLM 报告缓存：命中 {stats['hits']}，未命中 {stats['misses']}，"
+                     f"节省生成时间 {stats['seconds_saved']:.1f} 秒")
+        for name, stats in self.backend_stats().items():
+            latency = f"p50 {stats['p50']} 秒，p95 {stats['p95']} 秒" if stats['requests'] else "暂无成功请求"
+            LOG.info(f"模型后端 {name}：{latency}，错误率 {stats['error_rate']:.0%}，"
+                     f"{'可用' if stats['healthy'] else '暂停使用'}")
+
+
+def create_llm(config, session=None):
+    """
+    根据配置创建模型客户端：配置了 llm.backends 时返回 LLMRouter，否则返回单个 LLM。
+    """
+    if config.llm_backends:
+        return LLMRouter.from_config(config, session=session)
+    return LLM(config, session=session)
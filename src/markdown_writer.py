@@ -0,0 +1,28 @@
+# src/markdown_writer.py
+
+import os  # 导入os模块用于文件替换与删除
+import tempfile  # 导入tempfile模块在目标目录创建临时文件
+from contextlib import contextmanager  # 导入contextmanager定义上下文管理器
+
+# 写缓冲区大小，逐行写出时减少系统调用
+BUFFER_SIZE = 64 * 1024
+
+
+@contextmanager
+def open_atomic(path, buffer_size=BUFFER_SIZE):
+    """
+    以缓冲写方式打开 path 对应的临时文件，正常退出时刷新到磁盘并原子替换为 path；
+    写入过程中出现异常则删除临时文件，path 保持原样，不会留下被截断的 Markdown。
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', buffering=buffer_size, encoding='utf-8') as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,198 @@
+import heapq  # 导入heapq模块实现按优先级排队
+import itertools  # 导入itertools模块生成排队序号
+import threading  # 导入threading模块实现线程间协调
+import time  # 导入time模块用于计时与休眠
+from datetime import datetime  # 导入datetime模块格式化预计完成时间
+from logger import LOG  # 导入日志模块
+
+
+class RateLimitScheduler:
+    """
+    基于令牌桶的 GitHub API 请求调度器，由同一个 GitHubClient 的所有请求共享。
+
+    - 从响应头 X-RateLimit-Remaining/X-RateLimit-Reset 读取配额，剩余请求不足以完成本次运行时，
+      将剩余配额均匀分摊到重置前的时间窗口内；
+    - 配额耗尽或触发二级限流时精确休眠到重置时间（或 Retry-After），而不是直接失败；
+    - 等待中的请求按优先级出队，数值越小越先获得令牌（例如报告截止时间越早的仓库）。
+    """
+
+    def __init__(self, reserve=50, burst=10, clock=time.time):
+        """
+        :param reserve: 预留给交互式操作（如 Gradio 页面）的配额。
+        :param burst: 令牌桶容量，即允许的最大突发请求数。
+        :param clock: 时间函数，便于测试替换。
+        """
+        self.reserve = reserve
+        self.burst = burst
+        self.clock = clock
+        self.limit = None  # 每小时配额上限
+        self.remaining = None  # 当前剩余配额
+        self.reset_at = None  # 配额重置时间（Unix 时间戳）
+        self.blocked_until = 0  # 配额耗尽或二级限流时的恢复时间
+        self.pending = None  # 本次运行预计还需发出的请求数
+        self.requests_made = 0
+        self.wait_seconds = 0.0  # 因限流累计等待的时间
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def plan(self, pending_requests):
+        """
+        登记本次运行预计发出的请求数，用于计算节奏和预计完成时间。
+        """
+        with self._condition:
+            self.pending = pending_requests
+            self._condition.notify_all()
+
+    def acquire(self, priority=0):
+        """
+        阻塞直到允许发出下一个请求。
+        """
+        entry = (priority, next(self._sequence))
+        started = self.clock()
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = self._wait_time()
+                        if wait <= 0:
+                            heapq.heappop(self._waiters)
+                            self._consume()
+                            self._condition.notify_all()
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._condition.notify_all()
+                raise
+        waited = self.clock() - started
+        if waited > 0:
+            self.wait_seconds += waited
+
+    def update(self, headers):
+        """
+        根据响应头更新剩余配额与重置时间。
+        """
+        remaining = self._parse_number(headers.get('X-RateLimit-Remaining'))
+        if remaining is None:
+            return
+        with self._condition:
+            self.remaining = int(remaining)
+            limit = self._parse_number(headers.get('X-RateLimit-Limit'))
+            if limit:
+                self.limit = int(limit)
+            self.reset_at = self._parse_number(headers.get('X-RateLimit-Reset')) or self.reset_at
+            if self.remaining <= self.reserve and self.reset_at:
+                if self.reset_at > self.blocked_until:
+                    LOG.warning(f"GitHub API 配额剩余 {self.remaining}，暂停请求直到 {self._format_time(self.reset_at)}")
+                self.blocked_until = max(self.blocked_until, self.reset_at)
+            self._condition.notify_all()
+
+    def backoff(self, seconds):
+        """
+        触发二级限流等情况时，暂停所有请求指定秒数。
+        """
+        with self._condition:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+            LOG.warning(f"GitHub API 触发限流，暂停请求直到 {self._format_time(self.blocked_until)}")
+            self._condition.notify_all()
+
+    def pace(self):
+        """
+        当前允许的请求速率（次/秒），None 表示不限速。
+        """
+        if self.remaining is None or not self.reset_at:
+            return None
+        usable = self.remaining - self.reserve
+        if usable <= 0:
+            return 0.0
+        if self.pending is not None and self.pending <= usable:
+            return None  # 剩余配额足以完成本次运行，无需放慢
+        return usable / max(self.reset_at - self.clock(), 1.0)
+
+    def metrics(self):
+        """
+        返回当前配额、节奏与预计完成时间，便于记录日志。
+        """
+        with self._condition:
+            pace = self.pace()
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset_at': self.reset_at,
+                'pace_per_second': pace,
+                'pending_requests': self.pending,
+                'requests_made': self.requests_made,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'projected_finish': self._projected_finish(pace),
+            }
+
+    def log_metrics(self):
+        metrics = self.metrics()
+        finish = self._format_time(metrics['projected_finish']) if metrics['projected_finish'] else '未知'
+        LOG.info(f"GitHub API 配额：剩余 {metrics['remaining']}/{metrics['limit']}，"
+                 f"已请求 {metrics['requests_made']} 次，限流等待 {metrics['wait_seconds']} 秒，预计完成时间 {finish}")
+
+    def _projected_finish(self, pace):
+        now = self.clock()
+        if not self.pending:
+            return now if self.pending == 0 else None
+        start = max(now, self.blocked_until)
+        if pace is None:
+            return start
+        if pace > 0:
+            return start + self.pending / pace
+        if self.reset_at and self.limit:
+            # 当前窗口已无可用配额，按下一窗口的配额速率估算
+            per_window = max(self.limit - self.reserve, 1)
+            return self.reset_at + self.pending / per_window * 3600
+        return None
+
+    def _wait_time(self):
+        now = self.clock()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.reset_at and now >= self.reset_at:
+            # 配额窗口已重置，等待下一次响应头更新前不再限速
+            self.remaining = self.limit
+            self.reset_at = None
+        pace = self.pace()
+        if pace is None:
+            return 0
+        if pace <= 0:
+            # 配额不足但没有有效的重置时间，稍后重新检查
+            return max((self.reset_at or now + 60) - now, 1.0)
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * pace)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / pace
+
+    def _consume(self):
+        self.requests_made += 1
+        if self.pace():
+            self._tokens -= 1
+        if self.remaining is not None:
+            self.remaining -= 1
+        if self.pending:
+            self.pending -= 1
+
+    @staticmethod
+    def _parse_number(value):
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _format_time(timestamp):
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
@@ -1,6 +1,34 @@
+import asyncio  # 导入asyncio批量并发生成报告
 import os
+import re  # 导入re模块识别变化文件中的新闻条目
+from datetime import datetime, timedelta  # 导入日期处理模块查找前一天的主题报告
+from llm import AsyncLLM  # 导入异步LLM，限制批量生成的并发数
+from token_counter import chunk_text, count_tokens  # 导入token估算与分块工具
 from logger import LOG  # 导入日志模块
 
+# 增量主题报告在原提示之后追加的说明
+DELTA_TOPIC_INSTRUCTION = """
+
+增量模式：输入分为两部分，“上一期热门话题”是上一次生成的报告，“本期变化”只列出新上榜或名次明显上升的新闻。
+请以上一期报告为基础进行更新：保留仍然成立的话题，把新的新闻归入已有话题或补充为新话题，仍按上述格式输出完整报告。"""
+
+# 变化文件中的新闻条目，形如 "1. [标题](链接)"
+DELTA_ITEM_PATTERN = re.compile(r'^\d+\. \[', re.MULTILINE)
+
+# 输入超出上下文预算时，分块摘要阶段使用的系统提示，{instructions} 为最终报告的原始提示
+MAP_PROMPT = """你将收到一份较长输入中的一部分（第 {index}/{total} 部分），完整输入会在之后汇总为一份报告，报告要求如下：
+
+{instructions}
+
+请只针对本部分内容，提取与上述要求相关的全部要点，保留编号、标题与原始链接，不要编写完整报告，也不要添加本部分没有的信息。"""
+
+# 汇总阶段各部分摘要的标题
+MAP_SECTION_HEADER = "## 第 {index} 部分摘要\n\n"
+
+# 分块摘要的最大轮数，防止摘要无法继续缩短时无限循环
+MAX_REDUCE_ROUNDS = 3
+
+
 class ReportGenerator:
     def __init__(self, llm, report_types):
         self.llm = llm  # 初始化时接受一个LLM实例，用于后续生成报告
@@ -20,46 +48,155 @@ class ReportGenerator:
             with open(prompt_file, "r", encoding='utf-8') as file:
                 self.prompts[report_type] = file.read()
 
-    def generate_github_report(self, markdown_file_path):
+    def generate_github_report(self, markdown_file_path, use_cache=True):
         """
         生成 GitHub 项目的报告，并保存为 {original_filename}_report.md。
+        use_cache 为 False 时跳过报告缓存，强制重新生成。
+        """
+        return self._drain(self.stream_github_report(markdown_file_path, use_cache=use_cache))
+
+    def stream_github_report(self, markdown_file_path, use_cache=True):
+        """
+        流式生成 GitHub 项目的报告，边生成边写入 {original_filename}_report.md。
+        生成过程中产出 (已生成的内容, None)，完成后产出 (完整报告, 报告路径)。
         """
         with open(markdown_file_path, 'r') as file:
             markdown_content = file.read()
 
         system_prompt = self.prompts.get("github")
-        report = self.llm.generate_report(system_prompt, markdown_content)
-        
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
-        with open(report_file_path, 'w+') as report_file:
-            report_file.write(report)
+        report = yield from self._stream_to_file(system_prompt, markdown_content, report_file_path, label="github",
+                                                 use_cache=use_cache)
 
         LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
-        return report, report_file_path
+        yield report, report_file_path
 
-    def generate_hn_topic_report(self, markdown_file_path):
+    async def generate_github_reports(self, markdown_file_paths, max_concurrency=None, use_cache=True):
+        """
+        并发生成多个 GitHub 项目的报告，按完成顺序异步产出 (markdown_file_path, report, report_file_path)。
+        同时进行的模型请求数由 AsyncLLM 按后端限制；单个报告失败时记录日志并产出 (markdown_file_path, None, None)。
+        """
+        system_prompt = self.prompts.get("github")
+
+        async def generate(async_llm, markdown_file_path):
+            try:
+                with open(markdown_file_path, 'r') as file:
+                    markdown_content = file.read()
+                markdown_content = await self._reduce_to_budget(async_llm, system_prompt, markdown_content, label="github",
+                                                                use_cache=use_cache)
+                report = await async_llm.generate_report(system_prompt, markdown_content, use_cache=use_cache, label="github")
+                report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+                with open(report_file_path, 'w+') as report_file:
+                    report_file.write(report)
+            except Exception as e:
+                LOG.error(f"生成报告失败 {markdown_file_path}：{str(e)}")
+                return markdown_file_path, None, None
+            LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+            return markdown_file_path, report, report_file_path
+
+        async with AsyncLLM(self.llm, max_concurrency=max_concurrency) as async_llm:
+            tasks = [asyncio.create_task(generate(async_llm, path)) for path in markdown_file_paths]
+            for task in asyncio.as_completed(tasks):
+                yield await task
+
+    def generate_github_reports_batch(self, markdown_file_paths, use_cache=True):
+        """
+        通过模型的离线批处理接口一次提交所有 GitHub 项目的报告，适用于不要求实时返回的定时任务。
+        结果返回后写入各自的报告文件，按输入顺序返回 [(markdown_file_path, report, report_file_path)]，
+        单个报告失败时对应 (markdown_file_path, None, None)。
+        """
+        system_prompt = self.prompts.get("github")
+        requests = {}
+        for index, markdown_file_path in enumerate(markdown_file_paths):
+            with open(markdown_file_path, 'r') as file:
+                markdown_content = file.read()
+            requests[str(index)] = (system_prompt, self._fit_to_budget(system_prompt, markdown_content, label="github",
+                                                                       use_cache=use_cache))
+
+        reports = self.llm.generate_reports_batch(requests, use_cache=use_cache, label="github")
+        results = []
+        for index, markdown_file_path in enumerate(markdown_file_paths):
+            report = reports.get(str(index))
+            if not report:
+                LOG.error(f"生成报告失败 {markdown_file_path}")
+                results.append((markdown_file_path, None, None))
+                continue
+            report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+            with open(report_file_path, 'w+') as report_file:
+                report_file.write(report)
+            LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+            results.append((markdown_file_path, report, report_file_path))
+        return results
+
+    def generate_hn_topic_report(self, markdown_file_path, delta=False, use_cache=True):
         """
         生成 Hacker News 小时主题的报告，并保存为 {original_filename}_topic.md。
+        delta 为 True 且存在 {original_filename}_delta.md 与上一期主题报告时，只把变化的新闻连同上一期报告交给 LLM；
+        热门列表与上一次快照相比没有变化时不调用 LLM，直接返回上一期报告。
         """
-        with open(markdown_file_path, 'r') as file:
-            markdown_content = file.read()
+        return self._drain(self.stream_hn_topic_report(markdown_file_path, delta=delta, use_cache=use_cache))
 
-        system_prompt = self.prompts.get("hacker_news_hours_topic")
-        report = self.llm.generate_report(system_prompt, markdown_content)
-        
-        report_file_path = os.path.splitext(markdown_file_path)[0] + "_topic.md"
-        with open(report_file_path, 'w+') as report_file:
-            report_file.write(report)
+    def stream_hn_topic_report(self, markdown_file_path, delta=False, use_cache=True):
+        """
+        流式生成 Hacker News 小时主题的报告，参数同 generate_hn_topic_report，产出方式同 stream_github_report。
+        """
+        base_path = os.path.splitext(markdown_file_path)[0]
+        delta_file_path = base_path + "_delta.md"
+        previous_report_path = self._previous_topic_report(markdown_file_path) if delta else None
+
+        if previous_report_path and os.path.exists(delta_file_path):
+            with open(delta_file_path, 'r') as file:
+                delta_content = file.read()
+            with open(previous_report_path, 'r') as file:
+                previous_report = file.read()
+            if not DELTA_ITEM_PATTERN.search(delta_content):
+                LOG.info(f"Hacker News 热门列表没有变化，沿用上一期主题报告 {previous_report_path}")
+                yield previous_report, previous_report_path
+                return
+            system_prompt = f"{self.prompts.get('hacker_news_hours_topic')}{DELTA_TOPIC_INSTRUCTION}"
+            markdown_content = f"# 上一期热门话题\n\n{previous_report}\n\n# 本期变化\n\n{delta_content}"
+        else:
+            with open(markdown_file_path, 'r') as file:
+                markdown_content = file.read()
+            system_prompt = self.prompts.get("hacker_news_hours_topic")
+
+        report_file_path = base_path + "_topic.md"
+        report = yield from self._stream_to_file(system_prompt, markdown_content, report_file_path,
+                                                 label="hacker_news_hours_topic", use_cache=use_cache)
 
         LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
-        return report, report_file_path
+        yield report, report_file_path
 
-    def generate_hn_daily_report(self, directory_path):
+    def _previous_topic_report(self, markdown_file_path):
+        """
+        查找同一目录中早于当前小时的最近一份 *_topic.md；当天还没有时查找前一天的目录。
+        """
+        directory, filename = os.path.split(markdown_file_path)
+        hour = os.path.splitext(filename)[0]
+        candidates = [os.path.join(directory, name) for name in os.listdir(directory or '.')
+                      if name.endswith("_topic.md") and name[:-len("_topic.md")] < hour]
+        if not candidates:
+            try:
+                previous_date = datetime.strptime(os.path.basename(directory), '%Y-%m-%d') - timedelta(days=1)
+            except ValueError:
+                return None
+            previous_dir = os.path.join(os.path.dirname(directory), previous_date.strftime('%Y-%m-%d'))
+            if os.path.isdir(previous_dir):
+                candidates = [os.path.join(previous_dir, name) for name in os.listdir(previous_dir) if name.endswith("_topic.md")]
+        return max(candidates) if candidates else None
+
+    def generate_hn_daily_report(self, directory_path, use_cache=True):
         """
         生成 Hacker News 每日汇总的报告，并保存到 hacker_news/tech_trends/ 目录下。
-        这里的输入是一个目录路径，其中包含所有由 generate_hn_topic_report 生成的 *_topic.md 文件。
+        这里的输入是一个目录路径：存在由快照计算出的 rising.md 时只使用当天上升的新闻，
+        否则聚合所有由 generate_hn_topic_report 生成的 *_topic.md 文件。
         """
-        markdown_content = self._aggregate_topic_reports(directory_path)
+        rising_file_path = os.path.join(directory_path, 'rising.md')
+        if os.path.exists(rising_file_path):
+            with open(rising_file_path, 'r') as file:
+                markdown_content = file.read()
+        else:
+            markdown_content = self._aggregate_topic_reports(directory_path)
         system_prompt = self.prompts.get("hacker_news_daily_report")
 
         base_name = os.path.basename(directory_path.rstrip('/'))
@@ -68,25 +205,94 @@ class ReportGenerator:
         # 确保 tech_trends 目录存在
         os.makedirs(os.path.dirname(report_file_path), exist_ok=True)
         
-        report = self.llm.generate_report(system_prompt, markdown_content)
-        
-        with open(report_file_path, 'w+') as report_file:
-            report_file.write(report)
-        
+        result = self._drain(self._stream_to_file(system_prompt, markdown_content, report_file_path,
+                                                  label="hacker_news_daily_report", use_cache=use_cache))
+        if result is None:
+            # 模型没有产出任何内容时 _drain 返回 None
+            raise ValueError(f"模型没有返回任何内容，未能生成 Hacker News 每日汇总报告 {report_file_path}")
+        report, _ = result
+
         LOG.info(f"Hacker News 每日汇总报告已保存到 {report_file_path}")
         return report, report_file_path
 
+    def _stream_to_file(self, system_prompt, markdown_content, report_file_path, label=None, use_cache=True):
+        """
+        流式调用 LLM，每收到一段文本就追加写入 {report_file_path}.partial 并产出 (已生成的内容, None)；
+        生成完成后替换为正式的报告文件并返回完整报告。中途失败时已生成的内容保留在 .partial 文件中。
+        内容超出模型上下文预算时，先分块并发摘要再生成最终报告。label 为报告类型，用于汇总调用指标；
+        use_cache 为 False 时分块摘要与最终报告都跳过缓存重新生成。
+        """
+        markdown_content = self._fit_to_budget(system_prompt, markdown_content, label=label, use_cache=use_cache)
+        partial_path = report_file_path + ".partial"
+        report = ''
+        with open(partial_path, 'w') as report_file:
+            for chunk in self.llm.stream_report(system_prompt, markdown_content, use_cache=use_cache, label=label):
+                report_file.write(chunk)
+                report_file.flush()
+                report += chunk
+                yield report, None
+        os.replace(partial_path, report_file_path)
+        return report
+
+    def _fit_to_budget(self, system_prompt, markdown_content, label=None, use_cache=True):
+        """
+        同步版本的 _reduce_to_budget，内容未超出预算时不启动事件循环。
+        """
+        if count_tokens(markdown_content) <= self.llm.input_token_budget(system_prompt):
+            return markdown_content
+
+        async def reduce():
+            async with AsyncLLM(self.llm) as async_llm:
+                return await self._reduce_to_budget(async_llm, system_prompt, markdown_content, label=label,
+                                                    use_cache=use_cache)
+
+        return asyncio.run(reduce())
+
+    async def _reduce_to_budget(self, async_llm, system_prompt, markdown_content, label=None, use_cache=True):
+        """
+        map-reduce：内容超出单次请求的输入预算时，按预算切分后并发摘要各部分，
+        再把各部分摘要拼接为新的输入；仍然超出时继续下一轮，最多 MAX_REDUCE_ROUNDS 轮。
+        分块摘要的调用指标记在 {label}/map 下。
+        """
+        budget = self.llm.input_token_budget(system_prompt)
+        for round_index in range(1, MAX_REDUCE_ROUNDS + 1):
+            tokens = count_tokens(markdown_content)
+            if tokens <= budget:
+                return markdown_content
+            # 分块摘要的系统提示包含原始提示，按其长度计算每块的预算
+            map_budget = self.llm.input_token_budget(MAP_PROMPT.format(index=0, total=0, instructions=system_prompt))
+            chunks = chunk_text(markdown_content, map_budget)
+            LOG.info(f"输入约 {tokens} tokens，超出预算 {budget}，第 {round_index} 轮分为 {len(chunks)} 块并发摘要")
+            summaries = await asyncio.gather(*(
+                async_llm.generate_report(MAP_PROMPT.format(index=index, total=len(chunks), instructions=system_prompt), chunk,
+                                          use_cache=use_cache, label=f"{label}/map" if label else None)
+                for index, chunk in enumerate(chunks, start=1)
+            ))
+            markdown_content = "\n\n".join(MAP_SECTION_HEADER.format(index=index) + summary
+                                             for index, summary in enumerate(summaries, start=1))
+        if count_tokens(markdown_content) > budget:
+            LOG.warning(f"经过 {MAX_REDUCE_ROUNDS} 轮摘要后输入仍超出预算 {budget}，按原样发送")
+        return markdown_content
+
+    @staticmethod
+    def _drain(stream):
+        # 消费流式生成的全部输出，返回最后一次产出的 (报告, 报告路径)
+        result = None
+        for result in stream:
+            pass
+        return result
+
 
     def _aggregate_topic_reports(self, directory_path):
         """
         聚合目录下所有以 '_topic.md' 结尾的 Markdown 文件内容，生成每日汇总报告的输入。
         """
-        markdown_content = ""
-        for filename in os.listdir(directory_path):
+        contents = []
+        for filename in sorted(os.listdir(directory_path)):
             if filename.endswith("_topic.md"):
                 with open(os.path.join(directory_path, filename), 'r') as file:
-                    markdown_content += file.read() + "\n"
-        return markdown_content
+                    contents.append(file.read() + "\n")
+        return "".join(contents)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,58 @@
+# src/token_counter.py
+
+import math  # 导入math模块用于向上取整
+import re  # 导入re模块切分文本
+
+try:
+    import tiktoken  # 可选依赖，安装后按 OpenAI 分词器精确计数
+except ImportError:
+    tiktoken = None
+
+# 中日韩字符通常各占一个 token，其余按单词与标点切分
+CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]')
+WORD_PATTERN = re.compile(r'[A-Za-z0-9_]+|[^\sA-Za-z0-9_]')
+
+_encodings = {}
+
+
+def count_tokens(text, encoding='cl100k_base'):
+    """
+    估算文本的 token 数。安装了 tiktoken 时使用对应的分词器，
+    否则按中日韩字符各一个、英文单词约每 4 个字符一个、标点各一个估算。
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if encoding not in _encodings:
+            _encodings[encoding] = tiktoken.get_encoding(encoding)
+        return len(_encodings[encoding].encode(text))
+    cjk = len(CJK_PATTERN.findall(text))
+    rest = CJK_PATTERN.sub(' ', text)
+    return cjk + sum(math.ceil(len(word) / 4) for word in WORD_PATTERN.findall(rest))
+
+
+def chunk_text(text, max_tokens, encoding='cl100k_base'):
+    """
+    按行把文本切分为若干块，每块估算不超过 max_tokens；单行超出上限时再按字符切分。
+    各块拼接后与原文完全一致。
+    """
+    chunks, current, current_tokens = [], [], 0
+    for line in text.splitlines(keepends=True):
+        tokens = count_tokens(line, encoding)
+        pieces = _split_line(line, tokens, max_tokens, encoding) if tokens > max_tokens else [(line, tokens)]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(''.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def _split_line(line, tokens, max_tokens, encoding):
+    # 按平均每 token 的字符数估算切分长度，并留出一成余量
+    step = max(int(len(line) * max_tokens / tokens * 0.9), 1)
+    pieces = [line[start:start + step] for start in range(0, len(line), step)]
+    return [(piece, count_tokens(piece, encoding)) for piece in pieces]
@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class StubServer:
+    """
+    在本地随机端口启动的 HTTP 替身服务，供测试与基准脚本模拟 GitHub、Hacker News 和大模型服务。
+
+    handler(method, path, query, headers, body) 返回 (status, headers, body)，
+    body 为 dict/list 时自动序列化为 JSON。
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []  # 记录收到的请求，便于断言
+        self._lock = threading.Lock()
+        stub = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+
+            def _handle(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with stub._lock:
+                    stub.requests.append((self.command, parts.path, self.headers, body))
+                status, headers, payload = stub.handler(self.command, parts.path, parse_qs(parts.query), self.headers, body)
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload)
+                    headers = dict({'Content-Type': 'application/json'}, **(headers or {}))
+                if isinstance(payload, str):
+                    payload = payload.encode('utf-8')
+                payload = payload or b''
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass  # 保持测试输出整洁
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,106 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from article_fetcher import ArticleFetcher, extract_text  # 导入要测试的文章抓取器
+from disk_cache import DiskCache  # 导入磁盘缓存
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
+
+ARTICLE = '''<html><head><title>Zig 1.0 released</title><style>body { color: red; }</style>
+<script>var tracking = 1;</script></head>
+<body><nav><a href="/">Home</a> <a href="/blog">Blog</a></nav>
+<article><h1>Zig 1.0</h1><p>The   compiler is now
+self-hosted &amp; stable.</p><ul><li>Faster builds</li></ul></article>
+<footer>Copyright</footer></body></html>'''
+
+
+class TestArticleFetcher(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_extract_text_skips_boilerplate(self):
+        """
+        测试正文提取跳过脚本、样式、导航与页脚，只保留标题、段落与列表项。
+        """
+        self.assertEqual(extract_text(ARTICLE),
+                         "Zig 1.0 released\nZig 1.0\nThe compiler is now self-hosted & stable.\nFaster builds")
+        self.assertEqual(extract_text('<div>Just <b>some</b> text</div>'), 'Just some text')
+
+    def test_fetch_caches_by_url_with_ttl(self):
+        """
+        测试提取结果按 URL 缓存：新的抓取器实例也不会重复下载，缓存过期后重新下载；
+        非网页内容缓存为空正文，失败的请求不缓存，超出大小上限的内容被截断。
+        """
+        def handler(method, path, query, headers, body):
+            if path == '/article':
+                return 200, {'Content-Type': 'text/html; charset=utf-8'}, ARTICLE
+            if path == '/paper.pdf':
+                return 200, {'Content-Type': 'application/pdf'}, b'%PDF-1.4'
+            if path == '/huge':
+                return 200, {'Content-Type': 'text/html'}, '<p>' + 'x' * 100000 + '</p>'
+            return 404, {}, 'not found'
+
+        with StubServer(handler) as server:
+            def make_fetcher():
+                return ArticleFetcher(cache=DiskCache(self.cache_dir, max_age=3600), max_bytes=1000, max_chars=5000)
+
+            fetcher = make_fetcher()
+            urls = [f'{server.url}/article', f'{server.url}/paper.pdf', f'{server.url}/missing', f'{server.url}/huge',
+                    'item?id=1']
+            texts = fetcher.fetch_many(urls + [f'{server.url}/article'])
+            self.assertTrue(texts[f'{server.url}/article'].startswith('Zig 1.0 released'))
+            self.assertIsNone(texts[f'{server.url}/paper.pdf'])
+            self.assertIsNone(texts[f'{server.url}/missing'])
+            self.assertIsNone(texts['item?id=1'])
+            self.assertEqual(len(texts[f'{server.url}/huge']), 1000 - len('<p>'))
+            self.assertEqual(len(server.requests), 4)
+
+            # 模拟每小时一次的导出：新的实例命中缓存，只有失败的请求会重试
+            make_fetcher().fetch_many(urls)
+            self.assertEqual(sorted(path for _, path, _, _ in server.requests[4:]), ['/missing'])
+
+            # 缓存过期后重新下载
+            cache = DiskCache(self.cache_dir, max_age=3600)
+            expired = time.time() - 7200
+            os.utime(cache._path(DiskCache.make_key('article', f'{server.url}/article')), (expired, expired))
+            make_fetcher().fetch(f'{server.url}/article')
+            self.assertEqual(server.requests[-1][1], '/article')
+
+    def test_per_host_limit(self):
+        """
+        测试同一主机的并发请求数不超过 per_host_limit。
+        """
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def handler(method, path, query, headers, body):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return 200, {'Content-Type': 'text/html'}, f'<p>{path}</p>'
+
+        with StubServer(handler) as server:
+            fetcher = ArticleFetcher(max_workers=8, per_host_limit=2)
+            stories = [{'title': f'Story {n}', 'link': f'{server.url}/{n}'} for n in range(8)]
+            enriched = fetcher.enrich(stories)
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual([story['excerpt'] for story in enriched], [f'/{n}' for n in range(8)])
+        self.assertNotIn('excerpt', stories[0])  # 不修改传入的新闻字典
+
+if __name__ == '__main__':
+    unittest.main()
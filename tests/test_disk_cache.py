@@ -0,0 +1,98 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from disk_cache import DiskCache  # 导入要测试的 DiskCache 类
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_set_and_get(self):
+        """
+        测试写入后可以读取，并统计命中与未命中。
+        """
+        cache = DiskCache(self.cache_dir)
+        key = DiskCache.make_key("https://api.github.com/repos/x/y/issues", {"state": "closed"})
+        self.assertIsNone(cache.get(key))
+        cache.set(key, {"etag": "W/\"abc\"", "body": [1, 2, 3]})
+        self.assertEqual(cache.get(key)["body"], [1, 2, 3])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        """
+        测试超出条目上限时淘汰最久未访问的条目。
+        """
+        cache = DiskCache(self.cache_dir, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        past = time.time() - 100
+        os.utime(os.path.join(self.cache_dir, "a.json"), (past, past))
+        os.utime(os.path.join(self.cache_dir, "b.json"), (past + 1, past + 1))
+        cache.get("a")  # 访问 a，使 b 成为最久未使用的条目
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_lru_index_built_once_at_startup(self):
+        """
+        测试重新打开缓存时按文件修改时间恢复 LRU 顺序，之后写入淘汰不再扫描缓存目录。
+        """
+        cache = DiskCache(self.cache_dir)
+        for offset, key in enumerate(["b", "a", "c"]):
+            cache.set(key, key)
+            past = time.time() - 100 + offset
+            os.utime(os.path.join(self.cache_dir, f"{key}.json"), (past, past))
+
+        cache = DiskCache(self.cache_dir, max_entries=3)
+        self.assertEqual(cache.stats()["entries"], 3)
+        with patch('disk_cache.os.listdir') as mock_listdir:
+            cache.set("d", 4)
+            cache.set("e", 5)
+        mock_listdir.assert_not_called()
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "c")
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_max_age_expires_entries(self):
+        """
+        测试超过 max_age 的条目被视为失效并删除。
+        """
+        cache = DiskCache(self.cache_dir, max_age=60)
+        cache.set("a", 1)
+        past = time.time() - 120
+        os.utime(os.path.join(self.cache_dir, "a.json"), (past, past))
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, "a.json")))
+
+    def test_reads_do_not_extend_max_age(self):
+        """
+        测试读取不会刷新写入时间，经常被读取的条目到期后同样失效。
+        """
+        cache = DiskCache(self.cache_dir, max_age=60)
+        cache.set("a", 1)
+        path = os.path.join(self.cache_dir, "a.json")
+        past = time.time() - 50
+        os.utime(path, (past, past))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertAlmostEqual(os.path.getmtime(path), past, places=3)
+        os.utime(path, (past - 20, past - 20))
+        self.assertIsNone(cache.get("a"))
+
+if __name__ == '__main__':
+    unittest.main()
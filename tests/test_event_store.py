@@ -0,0 +1,82 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from event_store import EventStore, shift_timestamp, utc_now  # 导入要测试的 EventStore 类
+from github_records import CommitRecord, IssueRecord, PullRequestRecord  # 导入紧凑记录类型
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        self.store = EventStore(':memory:', retention_days=30)
+        self.repo = "DjangoPeng/openai-quickstart"
+        self.recent = shift_timestamp(utc_now(), days=-1)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_merge_upserts_and_advances_cursor(self):
+        """
+        测试合并按主键去重更新，并记录同步游标与覆盖范围。
+        """
+        self.store.merge(self.repo, 'issues', [IssueRecord(number=1, title="Old title", closed_at=self.recent)],
+                         synced_at="2099-01-01T00:00:00Z", covered_since=self.recent)
+        self.store.merge(self.repo, 'issues', [IssueRecord(number=1, title="New title", closed_at=self.recent)],
+                         synced_at="2099-01-02T00:00:00Z", covered_since="2099-01-01T00:00:00Z")
+
+        issues = self.store.query(self.repo, 'issues')
+        self.assertEqual([issue.title for issue in issues], ["New title"])
+        cursor = self.store.get_cursor(self.repo, 'issues')
+        self.assertEqual(cursor['synced_at'], "2099-01-02T00:00:00Z")
+        self.assertEqual(cursor['covered_since'], self.recent)  # 覆盖范围只会扩大
+
+    def test_incomplete_sync_keeps_cursor(self):
+        """
+        测试同步不完整时只合并数据、不推进游标。
+        """
+        self.store.merge(self.repo, 'issues', [], synced_at="2099-01-01T00:00:00Z", covered_since=self.recent)
+        self.store.merge(self.repo, 'issues', [IssueRecord(number=2, closed_at=self.recent)], synced_at=None, covered_since=self.recent)
+        self.assertEqual(self.store.get_cursor(self.repo, 'issues')['synced_at'], "2099-01-01T00:00:00Z")
+        self.assertEqual(len(self.store.query(self.repo, 'issues')), 1)
+
+    def test_query_window_and_retention(self):
+        """
+        测试按时间窗口查询，并清理超出保留期的历史。
+        """
+        old = shift_timestamp(utc_now(), days=-60)
+        commits = [
+            CommitRecord(sha="a", message="Add a", author="dev", committed_at="2099-01-03T00:00:00Z",
+                         url="https://github.com/x/y/commit/a"),
+            CommitRecord(sha="b", committed_at="2099-01-01T00:00:00Z"),
+            CommitRecord(sha="c", committed_at=old),
+        ]
+        self.store.merge(self.repo, 'commits', commits, synced_at=utc_now(), covered_since=old)
+        window = self.store.query(self.repo, 'commits', since="2099-01-02T00:00:00Z")
+        self.assertEqual(window, [commits[0]])
+        self.assertEqual(len(self.store.query(self.repo, 'commits')), 2)  # 超出 30 天的提交已清理
+        self.assertEqual(len(self.store.query("other/repo", 'commits')), 0)  # 不同仓库互不影响
+
+    def test_bulk_upsert(self):
+        """
+        测试批量写入数千条记录，并按合并时间窗口查询。
+        """
+        pulls = [PullRequestRecord(number=n, title=f"PR {n}", merged_at=f"2099-01-{n % 28 + 1:02d}T00:00:00Z") for n in range(5000)]
+        self.assertEqual(self.store.upsert(self.repo, 'pull_requests', pulls), 5000)
+        window = self.store.query(self.repo, 'pull_requests', since="2099-01-01T00:00:00Z", until="2099-01-01T23:59:59Z")
+        self.assertEqual(len(window), len([n for n in range(5000) if n % 28 == 0]))
+
+    def test_iter_query_reads_in_batches(self):
+        """
+        测试分批续读的结果与一次性查询一致，时间相同的条目也不会重复或遗漏。
+        """
+        commits = [CommitRecord(sha=f"{n:04d}", committed_at=f"2099-01-0{n % 3 + 1}T00:00:00Z") for n in range(50)]
+        self.store.upsert(self.repo, 'commits', commits)
+        batched = list(self.store.iter_query(self.repo, 'commits', since="2099-01-01T00:00:00Z", batch_size=7))
+        self.assertEqual(sorted(commit.sha for commit in batched), sorted(commit.sha for commit in commits))
+        self.assertEqual([commit.committed_at for commit in batched],
+                         sorted((commit.committed_at for commit in commits), reverse=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,20 @@
 import sys
 import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from github_client import GitHubClient  # 导入要测试的 GitHubClient 类
+from disk_cache import DiskCache  # 导入磁盘缓存，用于测试条件请求
+from event_store import EventStore  # 导入本地事件存储
+from github_records import IssueRecord  # 导入紧凑记录类型
 
 class TestGitHubClient(unittest.TestCase):
     def setUp(self):
@@ -16,87 +24,379 @@ class TestGitHubClient(unittest.TestCase):
         self.token = "fake_token"  # 使用一个虚拟的 GitHub API 令牌
         self.client = GitHubClient(self.token)  # 使用该令牌初始化 GitHubClient 实例
         self.repo = "DjangoPeng/openai-quickstart"  # 要测试的仓库名称
+        # 导出的 daily_progress 文件写入临时目录，不污染工作区
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir, True)
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        self.addCleanup(os.chdir, cwd)
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_commits(self, mock_get):
         """
         测试 fetch_commits 方法是否正确获取提交记录。
         """
         # 模拟 API 响应
         mock_response = MagicMock()
+        mock_response.headers = {}  # 没有速率限制头部，调度器不会限速
         mock_response.json.return_value = [{"sha": "abc123", "commit": {"message": "Initial commit"}}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 单页响应，没有下一页链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_commits 方法并进行断言检查
         commits = self.client.fetch_commits(self.repo)
         self.assertEqual(len(commits), 1)  # 检查返回的提交记录数量是否为 1
-        self.assertEqual(commits[0]['sha'], "abc123")  # 检查返回的提交记录 SHA 值
-        self.assertEqual(commits[0]['commit']['message'], "Initial commit")  # 检查提交记录中的消息
+        self.assertEqual(commits[0].sha, "abc123")  # 检查返回的提交记录 SHA 值
+        self.assertEqual(commits[0].message, "Initial commit")  # 检查提交记录中的消息
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_issues(self, mock_get):
         """
         测试 fetch_issues 方法是否正确获取关闭的问题。
         """
         # 模拟 API 响应
         mock_response = MagicMock()
+        mock_response.headers = {}
         mock_response.json.return_value = [{"number": 1, "title": "Fix bug"}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 单页响应，没有下一页链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_issues 方法并进行断言检查
         issues = self.client.fetch_issues(self.repo)
         self.assertEqual(len(issues), 1)  # 检查返回的关闭问题数量是否为 1
-        self.assertEqual(issues[0]['number'], 1)  # 检查问题编号是否正确
-        self.assertEqual(issues[0]['title'], "Fix bug")  # 检查问题标题是否正确
+        self.assertEqual(issues[0].number, 1)  # 检查问题编号是否正确
+        self.assertEqual(issues[0].title, "Fix bug")  # 检查问题标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_pull_requests(self, mock_get):
         """
         测试 fetch_pull_requests 方法是否正确获取拉取请求。
         """
         # 模拟 API 响应
         mock_response = MagicMock()
+        mock_response.headers = {}
         mock_response.json.return_value = [{"number": 42, "title": "Add new feature"}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 单页响应，没有下一页链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_pull_requests 方法并进行断言检查
         pull_requests = self.client.fetch_pull_requests(self.repo)
         self.assertEqual(len(pull_requests), 1)  # 检查返回的拉取请求数量是否为 1
-        self.assertEqual(pull_requests[0]['number'], 42)  # 检查拉取请求的编号是否正确
-        self.assertEqual(pull_requests[0]['title'], "Add new feature")  # 检查拉取请求的标题是否正确
+        self.assertEqual(pull_requests[0].number, 42)  # 检查拉取请求的编号是否正确
+        self.assertEqual(pull_requests[0].title, "Add new feature")  # 检查拉取请求的标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
+    def test_fetch_issues_projects_compact_records(self, mock_get):
+        """
+        测试 fetch_issues 只保留报告需要的字段，并标记 /issues 接口返回的 PR。
+        """
+        mock_response = MagicMock()
+        mock_response.headers = {}
+        mock_response.json.return_value = [
+            {"number": 7, "title": "Add docs", "state": "closed", "html_url": "https://github.com/x/y/pull/7",
+             "user": {"login": "dev"}, "labels": [{"name": "docs"}], "pull_request": {"url": "..."}},
+        ]
+        mock_response.links = {}
+        mock_get.return_value = mock_response
+
+        issue = self.client.fetch_issues(self.repo)[0]
+        self.assertEqual(issue, IssueRecord(number=7, title="Add docs", state="closed",
+                                            url="https://github.com/x/y/pull/7", is_pull_request=True))
+        self.assertFalse(hasattr(issue, '__dict__'))  # 使用 __slots__，不携带实例字典
+
+    @patch('requests.Session.get')
+    def test_fetch_commits_follows_next_link(self, mock_get):
+        """
+        测试 fetch_commits 是否跟随 Link: rel="next" 获取所有分页。
+        """
+        first_page = MagicMock()
+        first_page.headers = {}
+        first_page.json.return_value = [{"sha": "abc123"}]
+        first_page.links = {"next": {"url": "https://api.github.com/repos/x/y/commits?page=2"}}
+        second_page = MagicMock()
+        second_page.headers = {}
+        second_page.json.return_value = [{"sha": "def456"}]
+        second_page.links = {}
+        mock_get.side_effect = [first_page, second_page]
+
+        commits = self.client.fetch_commits(self.repo)
+        self.assertEqual([c.sha for c in commits], ["abc123", "def456"])
+        self.assertEqual(mock_get.call_count, 2)
+        # 第一页携带 per_page 参数，下一页直接使用 next 链接
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['per_page'], 100)
+        self.assertIsNone(mock_get.call_args_list[1].kwargs['params'])
+
+    @patch('requests.Session.get')
+    def test_fetch_pull_requests_stops_outside_window(self, mock_get):
+        """
+        测试 fetch_pull_requests 在条目早于 since 时停止翻页，并跳过晚于 until 的条目。
+        """
+        mock_response = MagicMock()
+        mock_response.headers = {}
+        mock_response.json.return_value = [
+            {"number": 3, "updated_at": "2024-08-23T08:00:00Z"},
+            {"number": 2, "updated_at": "2024-08-21T08:00:00Z"},
+            {"number": 1, "updated_at": "2024-08-10T08:00:00Z"},
+        ]
+        mock_response.links = {"next": {"url": "https://api.github.com/repos/x/y/pulls?page=2"}}
+        mock_get.return_value = mock_response
+
+        pull_requests = self.client.fetch_pull_requests(self.repo, since="2024-08-20", until="2024-08-22")
+        self.assertEqual([pr.number for pr in pull_requests], [2])
+        self.assertEqual(mock_get.call_count, 1)  # 未继续请求下一页
+
+    @patch('requests.Session.get')
     def test_export_daily_progress(self, mock_get):
         """
         测试 export_daily_progress 方法是否正确导出每日进度报告。
         """
         # 模拟 API 响应
         mock_response = MagicMock()
+        mock_response.headers = {}
         mock_response.json.return_value = []
         mock_response.status_code = 200
+        mock_response.links = {}  # 单页响应，没有下一页链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 export_daily_progress 方法并进行断言检查
         file_path = self.client.export_daily_progress(self.repo)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_export_progress_by_date_range(self, mock_get):
         """
         测试 export_progress_by_date_range 方法是否正确导出指定日期范围内的进度报告。
         """
         # 模拟 API 响应
         mock_response = MagicMock()
+        mock_response.headers = {}
         mock_response.json.return_value = []
         mock_response.status_code = 200
+        mock_response.links = {}  # 单页响应，没有下一页链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 export_progress_by_date_range 方法并进行断言检查
         file_path = self.client.export_progress_by_date_range(self.repo, days=7)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
+    @patch('requests.Session.get')
+    def test_export_writes_deduplicated_sections(self, mock_get):
+        """
+        测试导出文件包含 Issues、Pull Requests、Commits 三个章节，PR 不重复出现在 Issues 中，
+        能归入 PR 的提交不再单独列出。
+        """
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        payloads = {
+            '/commits': [
+                {"sha": "aaaaaaa1", "commit": {"message": "Add parser (#10)"}},
+                {"sha": "aaaaaaa2", "commit": {"message": "Tweak parser (#10)"}},
+                {"sha": "bbbbbbb1", "commit": {"message": "Bump version"}},
+                {"sha": "ccccccc1", "commit": {"message": "Merge pull request #10 from dev/parser"}},
+                {"sha": "ddddddd1", "commit": {"message": "Backport fix (#99)"}},
+            ],
+            '/issues': [
+                {"number": 10, "title": "Add parser", "updated_at": today, "pull_request": {}},
+                {"number": 7, "title": "Crash on start", "updated_at": today},
+            ],
+            '/pulls': [
+                {"number": 10, "title": "Add parser", "updated_at": today, "merged_at": today},
+                {"number": 12, "title": "Rejected idea", "updated_at": today, "merged_at": None},
+            ],
+        }
+
+        def respond(url, **kwargs):
+            response = MagicMock()
+            response.headers = {}
+            response.links = {}
+            response.json.return_value = next(body for suffix, body in payloads.items() if url.endswith(suffix))
+            return response
+        mock_get.side_effect = respond
+
+        with open(self.client.export_progress_by_date_range(self.repo, days=1)) as file:
+            content = file.read()
+
+        self.assertIn("## Issues Closed in the Last 1 Days\n- Crash on start #7\n", content)
+        self.assertIn("## Pull Requests Merged in the Last 1 Days\n- Add parser #10 (2 commits)\n", content)
+        self.assertIn("## Commits in the Last 1 Days\n- Bump version\n- Backport fix (#99)\n", content)
+        self.assertEqual(content.count("Add parser"), 1)
+        self.assertNotIn("Rejected idea", content)  # 未合并的 PR 不计入
+
+    @patch('requests.Session.get')
+    def test_export_handles_carriage_returns(self, mock_get):
+        """
+        测试标题或提交信息中含有 \r 时导出不会中断，每条记录仍只占一行。
+        """
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        payloads = {
+            '/commits': [{"sha": "aaaaaaa1", "commit": {"message": "Bump\rversion"}}],
+            '/issues': [{"number": 7, "title": "Crash\ron start", "updated_at": today}],
+            '/pulls': [],
+        }
+
+        def respond(url, **kwargs):
+            response = MagicMock()
+            response.headers = {}
+            response.links = {}
+            response.json.return_value = next(body for suffix, body in payloads.items() if url.endswith(suffix))
+            return response
+        mock_get.side_effect = respond
+
+        with open(self.client.export_progress_by_date_range(self.repo, days=1), newline='') as file:
+            content = file.read()
+
+        self.assertIn("## Issues Closed in the Last 1 Days\n- Crash on start #7\n", content)
+        self.assertIn("## Commits in the Last 1 Days\n- Bump version\n", content)
+        self.assertNotIn("\r", content)
+
+    def test_failed_export_keeps_previous_file(self):
+        """
+        测试导出过程中出错时不会留下被截断的文件，已有文件保持原样。
+        """
+        with patch.object(GitHubClient, '_write_updates', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.client.export_daily_progress(self.repo)
+        repo_dir = os.path.join('daily_progress', self.repo.replace("/", "_"))
+        self.assertEqual(os.listdir(repo_dir), [])  # 没有残留的 .md 或临时文件
+
+    @patch('requests.Session.get')
+    def test_conditional_request_served_from_cache(self, mock_get):
+        """
+        测试启用缓存后携带 If-None-Match，并在 304 时返回缓存内容。
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        client = GitHubClient(self.token, cache=DiskCache(cache_dir))
+
+        fresh = MagicMock()
+        fresh.status_code = 200
+        fresh.json.return_value = [{"number": 1, "title": "Fix bug"}]
+        fresh.headers = {"ETag": "W/\"abc\"", "Last-Modified": "Wed, 21 Aug 2024 07:28:00 GMT"}
+        fresh.links = {}
+        not_modified = MagicMock()
+        not_modified.headers = {}
+        not_modified.status_code = 304
+        mock_get.side_effect = [fresh, not_modified]
+
+        self.assertEqual(client.fetch_issues(self.repo), [IssueRecord(number=1, title="Fix bug")])
+        self.assertEqual(client.fetch_issues(self.repo), [IssueRecord(number=1, title="Fix bug")])
+
+        second_headers = mock_get.call_args_list[1].kwargs['headers']
+        self.assertEqual(second_headers['If-None-Match'], "W/\"abc\"")
+        self.assertEqual(second_headers['If-Modified-Since'], "Wed, 21 Aug 2024 07:28:00 GMT")
+        self.assertNotIn('If-None-Match', client.headers)  # 不污染默认请求头
+        self.assertEqual((client.cache_hits, client.cache_misses), (1, 1))
+
+    @patch('requests.Session.get')
+    def test_secondary_rate_limit_retries(self, mock_get):
+        """
+        测试触发二级速率限制时按 Retry-After 退避并重试，而不是返回空列表。
+        """
+        scheduler = MagicMock()
+        client = GitHubClient(self.token, scheduler=scheduler)
+
+        limited = MagicMock()
+        limited.status_code = 403
+        limited.headers = {"Retry-After": "5"}
+        ok = MagicMock()
+        ok.status_code = 200
+        ok.headers = {}
+        ok.json.return_value = [{"number": 1, "title": "Fix bug"}]
+        ok.links = {}
+        mock_get.side_effect = [limited, ok]
+
+        self.assertEqual(client.fetch_issues(self.repo), [IssueRecord(number=1, title="Fix bug")])
+        scheduler.backoff.assert_called_once_with(5.0)
+        self.assertEqual(scheduler.acquire.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_incremental_sync_fetches_only_deltas(self, mock_get):
+        """
+        测试启用增量同步后，第二次导出只从上次同步时间起拉取。
+        """
+        client = GitHubClient(self.token, event_store=EventStore(':memory:'))
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = []
+        mock_response.links = {}
+        mock_get.return_value = mock_response
+
+        client.export_progress_by_date_range(self.repo, days=7)
+        first_since = mock_get.call_args_list[0].kwargs['params']['since']
+        self.assertTrue(first_since.endswith("T00:00:00Z"))  # 首次同步拉取完整窗口
+
+        mock_get.reset_mock()
+        client.export_progress_by_date_range(self.repo, days=7)
+        self.assertEqual(mock_get.call_count, 3)  # commits、issues、pulls 各一次
+        second_since = mock_get.call_args_list[0].kwargs['params']['since']
+        self.assertGreater(second_since, first_since)  # 只拉取上次同步之后的增量
+
+    @patch('requests.Session.get')
+    def test_fetch_updates_fetches_streams_concurrently(self, mock_get):
+        """
+        测试 fetch_updates 并发请求三个数据流：只有三个请求同时在途时屏障才会放行。
+        """
+        barrier = threading.Barrier(3, timeout=5)
+
+        def respond(url, **kwargs):
+            barrier.wait()  # 顺序请求时会在此超时
+            response = MagicMock()
+            response.headers = {}
+            response.links = {}
+            response.json.return_value = [{"sha": "abc123"}] if url.endswith('/commits') else [{"number": 1, "title": "Fix bug"}]
+            return response
+        mock_get.side_effect = respond
+
+        updates = self.client.fetch_updates(self.repo)
+        self.assertEqual([c.sha for c in updates['commits']], ["abc123"])
+        self.assertEqual([i.number for i in updates['issues']], [1])
+        self.assertEqual([pr.number for pr in updates['pull_requests']], [1])
+
+    @patch('requests.Session.get')
+    def test_repo_deadline_stops_slow_stream(self, mock_get):
+        """
+        测试超过单仓库截止时间后停止翻页，保留已获取的条目且不推进同步游标。
+        """
+        store = EventStore(':memory:')
+        client = GitHubClient(self.token, event_store=store, repo_deadline=0.3)
+
+        def respond(url, **kwargs):
+            response = MagicMock()
+            response.headers = {}
+            response.links = {}
+            response.json.return_value = []
+            if '/pulls' in url:
+                time.sleep(0.05)
+                number = int(url.rsplit('=', 1)[1]) if 'page=' in url else 1
+                response.json.return_value = [{"number": number, "title": "Slow"}]
+                response.links = {"next": {"url": f"https://api.github.com/repos/x/y/pulls?page={number + 1}"}}
+            return response
+        mock_get.side_effect = respond
+
+        start = time.monotonic()
+        client.sync_repo(self.repo, since="2024-08-20")
+        self.assertLess(time.monotonic() - start, 2)  # 无限分页的慢数据流不会拖住整个仓库
+        self.assertIsNone(store.get_cursor(self.repo, 'pull_requests'))
+        self.assertIsNotNone(store.get_cursor(self.repo, 'issues'))
+
+    @patch.object(GitHubClient, 'export_progress_by_date_range')
+    def test_export_progress_for_repos(self, mock_export):
+        """
+        测试并发导出多个仓库时保持输出顺序，并隔离单个仓库的失败。
+        """
+        def export(repo, days):
+            if repo == "bad/repo":
+                raise RuntimeError("boom")
+            return f"{repo}.md"
+        mock_export.side_effect = export
+
+        repos = ["a/one", "bad/repo", "c/three", "d/four"]
+        results = self.client.export_progress_for_repos(repos, days=1, max_workers=3)
+        self.assertEqual(results, [("a/one", "a/one.md"), ("bad/repo", None), ("c/three", "c/three.md"), ("d/four", "d/four.md")])
+
 if __name__ == '__main__':
     unittest.main()
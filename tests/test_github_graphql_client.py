@@ -0,0 +1,169 @@
+import sys
+import os
+import json
+import re
+import shutil
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from event_store import EventStore  # 导入本地事件存储
+from github_graphql_client import GitHubGraphQLClient  # 导入要测试的 GitHubGraphQLClient 类
+from http_session import create_session  # 导入HTTP会话工厂
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
+
+def page(nodes, cursor=None):
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+def repository(repo, after_issues, after_pulls):
+    """
+    根据仓库名和游标返回替身数据：repo0 的 issues 分两页，pullRequests 均分两页。
+    """
+    commits = [{"oid": f"{repo}-sha", "messageHeadline": "Initial commit", "committedDate": "2024-08-21T08:00:00Z",
+                "url": None, "author": {"name": "dev"}}]
+    issue = lambda n: {"number": n, "title": f"Issue {n}", "url": None, "closedAt": "2024-08-21T08:00:00Z",
+                       "updatedAt": "2024-08-21T08:00:00Z"}
+    pulls = [{"number": 9, "title": "Merged PR", "url": None, "mergedAt": "2024-08-21T08:00:00Z",
+              "closedAt": "2024-08-21T08:00:00Z", "updatedAt": "2024-08-21T08:00:00Z"},
+             {"number": 8, "title": "Old PR", "url": None, "mergedAt": "2024-08-01T08:00:00Z",
+              "closedAt": "2024-08-01T08:00:00Z", "updatedAt": "2024-08-01T08:00:00Z"}]
+    if repo == "owner/repo0" and after_issues is None:
+        issues = page([issue(1)], cursor="c1")
+    else:
+        issues = page([issue(2)])
+    return {
+        "defaultBranchRef": {"target": {"history": page(commits)}},
+        "issues": issues,
+        "pullRequests": page([], None) if after_pulls else page(pulls, cursor="more"),
+    }
+
+def graphql_handler(method, path, query, headers, body):
+    text = json.loads(body)["query"]
+    data = {}
+    for alias, owner, name, fields in re.findall(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{(.*?)\}\s*$', text, re.M):
+        repo = f"{owner}/{name}"
+        node = repository(repo, re.search(r'issues\([^)]*after:', fields), re.search(r'pullRequests\([^)]*after:', fields))
+        # 只返回查询中请求的连接
+        data[alias] = {key: value for key, value in node.items()
+                       if {"defaultBranchRef": "defaultBranchRef", "issues": "issues(", "pullRequests": "pullRequests("}[key] in fields}
+    return 200, {}, {"data": data}
+
+class TestGitHubGraphQLClient(unittest.TestCase):
+    def test_fetch_updates_batch(self):
+        """
+        测试多个仓库合并到一次查询，并对未翻完的连接继续按游标分页。
+        """
+        repos = [f"owner/repo{i}" for i in range(3)]
+        with StubServer(graphql_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url)
+            updates = client.fetch_updates_batch(repos, since="2024-08-20", until="2024-08-22")
+            requests = list(server.requests)
+
+        # 第一次查询包含 3 个仓库，第二次只包含 repo0 的 issues 连接
+        self.assertEqual(client.query_count, 2)
+        self.assertEqual(len(requests), 2)
+        second_query = json.loads(requests[1][3])["query"]
+        self.assertIn('after: "c1"', second_query)
+        self.assertNotIn("pullRequests", second_query)
+        self.assertEqual(requests[0][2]["Authorization"], "bearer fake_token")
+
+        self.assertEqual([issue.number for issue in updates["owner/repo0"]["issues"]], [1, 2])
+        self.assertEqual([issue.number for issue in updates["owner/repo1"]["issues"]], [2])
+        # 早于 since 的 PR 被截断，且不再继续翻页
+        self.assertEqual([pr.number for pr in updates["owner/repo2"]["pull_requests"]], [9])
+        self.assertEqual(updates["owner/repo1"]["commits"][0].sha, "owner/repo1-sha")
+        self.assertEqual(updates["owner/repo1"]["commits"][0].message, "Initial commit")
+
+    def test_batch_size_splits_queries(self):
+        """
+        测试仓库数超过 batch_size 时拆分为多次查询。
+        """
+        repos = [f"owner/repo{i}" for i in range(1, 6)]
+        with StubServer(graphql_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url, batch_size=2)
+            updates = client.fetch_updates_batch(repos, since="2024-08-20")
+        self.assertEqual(client.query_count, 3)
+        self.assertEqual(sorted(updates), repos)
+
+    def test_fetch_updates_single_repo(self):
+        """
+        测试单个仓库的 fetch_updates 发出一次查询并返回三个数据流。
+        """
+        with StubServer(graphql_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url)
+            updates = client.fetch_updates("owner/repo1", since="2024-08-20", until="2024-08-22")
+        self.assertEqual(client.query_count, 1)
+        self.assertEqual([issue.number for issue in updates["issues"]], [2])
+        self.assertEqual(updates["commits"][0].sha, "owner/repo1-sha")
+
+    def test_export_progress_for_repos(self):
+        """
+        测试批量导出先用一次查询预取所有仓库再写出文件；启用事件存储时每个仓库的三个流共用一次查询。
+        """
+        work_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        self.addCleanup(shutil.rmtree, work_dir)
+        self.addCleanup(os.chdir, cwd)
+        repos = [f"owner/repo{i}" for i in range(1, 4)]
+
+        with StubServer(graphql_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url)
+            results = client.export_progress_for_repos(repos, days=1, max_workers=3)
+            self.assertEqual(client.query_count, 1)
+            self.assertEqual([repo for repo, _ in results], repos)
+            for repo, path in results:
+                self.assertIsNotNone(path)
+                with open(path) as file:
+                    self.assertIn(f"# Progress for {repo}", file.read())
+            self.assertEqual(client._prefetched, {})
+
+            client = GitHubGraphQLClient("fake_token", base_url=server.url, event_store=EventStore(':memory:'))
+            results = client.export_progress_for_repos(repos, days=1, max_workers=3)
+            self.assertTrue(all(path is not None for _, path in results))
+            self.assertEqual(client.query_count, len(repos))
+            self.assertEqual(client._prefetched, {})
+
+    def test_failed_query_keeps_sync_cursor(self):
+        """
+        测试 GraphQL 请求失败或返回错误时同步游标保持不变，只有查询成功的仓库推进游标。
+        """
+        def failing_handler(method, path, query, headers, body):
+            return 502, {}, {"message": "Bad Gateway"}
+
+        def partial_handler(method, path, query, headers, body):
+            # owner/repo1 不存在：data 中缺少它的别名，errors 的 path 指向该别名
+            status, headers, payload = graphql_handler(method, path, query, headers, body)
+            match = re.search(r'(r\d+): repository\(owner: "owner", name: "repo1"\)', json.loads(body)["query"])
+            if match:
+                payload["data"].pop(match.group(1))
+                payload["errors"] = [{"path": [match.group(1)], "message": "Could not resolve to a Repository"}]
+            return status, headers, payload
+
+        streams = ('commits', 'issues', 'pull_requests')
+        session = create_session(max_retries=0)
+        with StubServer(failing_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url, session=session,
+                                         event_store=EventStore(':memory:'))
+            client.sync_repo("owner/repo1", "2024-08-20")
+            self.assertEqual(len(server.requests), 1)  # 三个流共用一次查询
+        for stream in streams:
+            self.assertIsNone(client.event_store.get_cursor("owner/repo1", stream))
+
+        with StubServer(partial_handler) as server:
+            client = GitHubGraphQLClient("fake_token", base_url=server.url, session=session,
+                                         event_store=EventStore(':memory:'))
+            prefetched = client.fetch_updates_batch(["owner/repo0", "owner/repo1"], "2024-08-20", "2024-08-22")
+            self.assertEqual(client._context.errors, 1)
+            self.assertEqual(prefetched["owner/repo1"], {'commits': [], 'issues': [], 'pull_requests': []})
+            client.sync_repo("owner/repo1", "2024-08-20")
+            client.sync_repo("owner/repo2", "2024-08-20")
+        for stream in streams:
+            self.assertIsNone(client.event_store.get_cursor("owner/repo1", stream))
+            self.assertIsNotNone(client.event_store.get_cursor("owner/repo2", stream))
+
+if __name__ == '__main__':
+    unittest.main()
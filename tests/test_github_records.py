@@ -0,0 +1,32 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from github_records import CommitRecord, normalize_commit, pull_request_reference  # 导入要测试的记录类型与归并规则
+
+class TestGitHubRecords(unittest.TestCase):
+    def test_normalize_commit_keeps_headline(self):
+        """
+        测试提交只保留说明首行、作者名与提交时间。
+        """
+        commit = normalize_commit({"sha": "abc123", "html_url": "https://github.com/x/y/commit/abc123",
+                                   "commit": {"message": "Fix crash\n\nLong body", "author": {"name": "dev", "date": "a"},
+                                              "committer": {"date": "b"}}, "author": {"login": "dev"}})
+        self.assertEqual(commit, CommitRecord(sha="abc123", message="Fix crash", author="dev", committed_at="b",
+                                              url="https://github.com/x/y/commit/abc123"))
+
+    def test_pull_request_reference(self):
+        """
+        测试从 squash 与合并提交说明中识别 PR 编号。
+        """
+        self.assertEqual(pull_request_reference(CommitRecord(sha="a", message="Add parser (#10)")), (10, False))
+        self.assertEqual(pull_request_reference(CommitRecord(sha="b", message="Merge pull request #11 from dev/branch")),
+                         (11, True))
+        self.assertEqual(pull_request_reference(CommitRecord(sha="c", message="Bump version")), (None, False))
+        self.assertEqual(pull_request_reference(CommitRecord(sha="d")), (None, False))
+
+if __name__ == '__main__':
+    unittest.main()
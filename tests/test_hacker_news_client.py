@@ -2,12 +2,17 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import shutil
+import tempfile
 from io import StringIO
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from hacker_news_client import HackerNewsClient
+from hn_snapshot_store import StorySnapshotStore  # 导入列式快照存储
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
 from logger import LOG  # 导入日志记录器
 
 
@@ -15,7 +20,7 @@ class TestHackerNewsClient(unittest.TestCase):
     def setUp(self):
         self.client = HackerNewsClient()
 
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_top_stories_success(self, mock_get):
         # 模拟HTTP响应
         mock_response = MagicMock()
@@ -37,7 +42,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories[0]['title'], 'Story 1')
         self.assertEqual(top_stories[0]['link'], 'https://news.ycombinator.com/')
     
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_top_stories_failure(self, mock_get):
         # 模拟HTTP请求失败
         mock_get.side_effect = Exception("Connection error")
@@ -47,7 +52,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories, [])
 
     
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories(self, mock_open, mock_makedirs, mock_get):
@@ -76,7 +81,7 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open().write.assert_any_call("# Hacker News Top Stories (2024-09-01 14:00)\n\n")
         mock_open().write.assert_any_call("1. [Story 1](https://news.ycombinator.com/)\n")
 
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories_no_stories(self, mock_open, mock_makedirs, mock_get):
@@ -94,5 +99,83 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open.assert_not_called()
         self.assertIsNone(file_path)
 
+    def test_fetch_top_stories_crawls_pages_and_feeds(self):
+        """
+        测试并发抓取首页多页与其他列表，首页新闻保持原有顺序，其他列表的新增新闻追加在后，并按主机控制请求间隔。
+        """
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures')
+        with open(os.path.join(fixtures, 'hn_front_page_1.html'), encoding='utf-8') as file:
+            first_page = file.read()
+        with open(os.path.join(fixtures, 'hn_front_page_2.html'), encoding='utf-8') as file:
+            second_page = file.read()
+        front_stories = HackerNewsClient().parse_stories(first_page)
+        show_page = f'''
+        <tr class="athing"><td><span class="titleline"><a href="https://example.com/show">Show HN: New thing</a></span></td></tr>
+        <tr class="athing"><td><span class="titleline"><a href="{front_stories[0]['link']}">Duplicate</a></span></td></tr>
+        '''
+
+        def handler(method, path, query, headers, body):
+            if path == '/':
+                return 200, {}, first_page
+            if path == '/news' and query.get('p') == ['2']:
+                return 200, {}, second_page
+            if path == '/show':
+                return 200, {}, show_page
+            return 404, {}, 'not found'
+
+        with StubServer(handler) as server:
+            client = HackerNewsClient(base_url=server.url, pages=2, feeds=['show'], max_workers=4, request_interval=0.05)
+            stories = client.fetch_top_stories()
+            paths = sorted(path for _, path, _, _ in server.requests)
+
+        self.assertEqual(paths, ['/', '/news', '/show', '/show'])  # show 第 2 页返回 404，只记录日志
+        self.assertEqual(len(stories), 61)  # 两页首页 + 一条新的 Show HN
+        self.assertEqual(stories[:len(front_stories)], front_stories)  # 首页第 1 页保持原有顺序，重复链接保留首页中的条目
+        self.assertEqual(stories[len(front_stories):60], HackerNewsClient().parse_stories(second_page))
+        self.assertEqual(stories[60], {'id': None, 'rank': None, 'title': 'Show HN: New thing', 'link': 'https://example.com/show',
+                                       'points': 0, 'comments': 0, 'posted_at': None})
+
+    def test_export_top_stories_writes_delta(self):
+        """
+        测试导出时按 id 与上一次快照对比，只把新上榜和名次明显上升的新闻写入变化文件。
+        """
+        def stories(ids):
+            return [{'id': story_id, 'title': f'Story {story_id}', 'link': f'https://example.com/{story_id}',
+                     'points': 1, 'comments': 0} for story_id in ids]
+
+        work_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            client = HackerNewsClient(snapshot_store=StorySnapshotStore('hacker_news'))
+            with patch.object(client, 'fetch_top_stories', return_value=stories(range(1, 11))):
+                client.export_top_stories(date="2024-09-01", hour="08", record=True)
+            self.assertFalse(os.path.exists('hacker_news/2024-09-01/08_delta.md'))  # 没有上一次快照
+
+            # 故事 10 从第 10 名升到第 1 名，故事 11 新上榜，其余名次只下降 1 名
+            with patch.object(client, 'fetch_top_stories', return_value=stories([10, 1, 2, 3, 4, 5, 6, 7, 8, 9, 11])):
+                client.export_top_stories(date="2024-09-01", hour="12", record=True)
+            with open('hacker_news/2024-09-01/12_delta.md') as file:
+                self.assertEqual(file.read(), "# Hacker News Top Stories Delta (2024-09-01 12:00)\n\n"
+                                              "## New Stories\n1. [Story 11](https://example.com/11)\n\n"
+                                              "## Climbing Stories\n1. [Story 10](https://example.com/10) (rank 10 -> 1)\n")
+
+            # 列表没有变化时变化文件中没有条目
+            with patch.object(client, 'fetch_top_stories', return_value=stories([10, 1, 2, 3, 4, 5, 6, 7, 8, 9, 11])):
+                client.export_top_stories(date="2024-09-01", hour="16", record=True)
+            with open('hacker_news/2024-09-01/16_delta.md') as file:
+                self.assertEqual(file.read(), "# Hacker News Top Stories Delta (2024-09-01 16:00)\n\n")
+
+            # 界面等临时抓取默认不记录快照，也不写变化文件
+            with patch.object(client, 'fetch_top_stories', return_value=stories(range(20, 30))), \
+                    patch.object(client.snapshot_store, 'record') as mock_record:
+                client.export_top_stories(date="2024-09-01", hour="17")
+            mock_record.assert_not_called()
+            self.assertTrue(os.path.exists('hacker_news/2024-09-01/17.md'))
+            self.assertFalse(os.path.exists('hacker_news/2024-09-01/17_delta.md'))
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(work_dir)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import hn_parser  # 导入要测试的解析器模块
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+class TestHackerNewsParser(unittest.TestCase):
+    def test_fast_parser_matches_bs4_on_fixtures(self):
+        """
+        测试快速解析器在保存的首页上与 BeautifulSoup 解析结果完全一致。
+        """
+        for name in sorted(os.listdir(FIXTURES)):
+            if not name.startswith('hn_'):
+                continue
+            with open(os.path.join(FIXTURES, name), encoding='utf-8') as file:
+                html_content = file.read()
+            with self.subTest(fixture=name):
+                stories = hn_parser.parse_stories_fast(html_content)
+                self.assertEqual(len(stories), 30)
+                self.assertEqual(stories, hn_parser.parse_stories_bs4(html_content))
+
+    def test_fast_parser_decodes_entities_and_skips_sitebit(self):
+        """
+        测试标题与链接中的实体被解码，只取 titleline 中的第一个链接，并从副文本行读取分数、评论数与发布时间。
+        """
+        html_content = '''
+        <tr class='athing submission' id='1'><td align="right" class="title"><span class="rank">7.</span></td>
+        <td class="title"><span class="titleline">
+        <a href="https://example.com/?a=1&amp;b=2">Tom &amp; Jerry&#x27;s &lt;tag&gt;</a>
+        <span class="sitebit comhead"> (<a href="from?site=example.com"><span class="sitestr">example.com</span></a>)</span>
+        </span></td></tr>
+        <tr><td class="subtext"><span class="score" id="score_1">42 points</span>
+        <span class="age" title="2024-09-01T10:00:00"><a href="item?id=1">2 hours ago</a></span> |
+        <a href="hide?id=1">hide</a> | <a href="item?id=1">12&nbsp;comments</a></td></tr>
+        '''
+        expected = [{'id': 1, 'rank': 7, 'title': "Tom & Jerry's <tag>", 'link': "https://example.com/?a=1&b=2",
+                     'points': 42, 'comments': 12, 'posted_at': 1725184800}]
+        self.assertEqual(hn_parser.parse_stories_fast(html_content), expected)
+        self.assertEqual(hn_parser.parse_stories_bs4(html_content), expected)
+
+    def test_falls_back_to_bs4(self):
+        """
+        测试快速解析失败时回退到 BeautifulSoup。
+        """
+        html_content = '<tr class="athing"><td><span class="titleline"><a href="x">Story</a></span></td></tr>'
+        with patch.dict(hn_parser.PARSERS, {'fast': lambda html: 1 / 0}):
+            self.assertEqual(hn_parser.parse_stories(html_content),
+                             [{'id': None, 'rank': None, 'title': 'Story', 'link': 'x',
+                               'points': 0, 'comments': 0, 'posted_at': None}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hn_snapshot_store import StorySnapshotStore  # 导入要测试的快照存储
+
+
+def story(story_id, points, comments=0):
+    return {'id': story_id, 'title': f'Story {story_id}', 'link': f'https://example.com/{story_id}',
+            'points': points, 'comments': comments}
+
+
+class TestStorySnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = StorySnapshotStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_record_appends_columns(self):
+        """
+        测试每次快照追加为一组行，名次取列表位置，缺少 id 的新闻被跳过。
+        """
+        self.assertEqual(self.store.record('2024-09-01', [story(1, 10), story(2, 5)], timestamp=1000), 2)
+        self.assertEqual(self.store.record('2024-09-01', [story(2, 30), {'id': None, 'title': 'x', 'link': 'x'}, story(1, 12)],
+                                           timestamp=4600), 2)
+
+        columns = self.store.load('2024-09-01')
+        self.assertEqual(columns['story_id'].tolist(), [1, 2, 2, 1])
+        self.assertEqual(columns['rank'].tolist(), [1, 2, 1, 3])
+        self.assertEqual(columns['points'].tolist(), [10, 5, 30, 12])
+        self.assertEqual(columns['timestamp'].tolist(), [1000, 1000, 4600, 4600])
+        self.assertEqual(columns['points'].dtype, np.int32)
+        self.assertEqual(self.store.load_stories('2024-09-01')[2]['title'], 'Story 2')
+        self.assertEqual([name for name in os.listdir(os.path.join(self.root, '2024-09-01')) if name.endswith('.tmp')], [])
+
+    def test_rising_stories(self):
+        """
+        测试只保留分数增长且名次未下滑的新闻，按分数速度降序排列，并计算加速度。
+        """
+        hour = 3600
+        snapshots = [
+            [story(1, 100), story(2, 10), story(3, 50), story(4, 5)],
+            [story(1, 110), story(3, 52), story(2, 40)],
+            [story(2, 100, comments=20), story(1, 120), story(3, 53)],
+        ]
+        for index, stories in enumerate(snapshots):
+            self.store.record('2024-09-01', stories, timestamp=index * hour)
+
+        rising = self.store.rising_stories('2024-09-01')
+        # 故事 1 名次从 1 降到 2，故事 4 只出现一次，都被排除；故事 3 名次持平且分数缓慢增长
+        self.assertEqual([item['id'] for item in rising], [2, 3])
+        self.assertEqual(rising[0]['first_rank'], 2)
+        self.assertEqual(rising[0]['rank'], 1)
+        self.assertEqual(rising[0]['comments'], 20)
+        self.assertAlmostEqual(rising[0]['point_velocity'], 45.0)
+        self.assertAlmostEqual(rising[0]['rank_velocity'], 0.5)
+        self.assertAlmostEqual(rising[0]['point_acceleration'], 15.0)  # (60 - 30) / 2 小时
+
+        trends = self.store.compute_trends('2024-09-01')
+        self.assertEqual(trends['story_id'].tolist(), [1, 2, 3])
+        self.assertEqual(self.store.rising_stories('2024-09-02'), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import requests  # 导入requests库以断言超时异常
+
+from http_session import create_session, HostPacer, JitterRetry, RETRY_STATUS_CODES  # 导入要测试的会话工厂
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
+
+class TestHttpSession(unittest.TestCase):
+    def test_create_session_configures_pool_and_retry(self):
+        """
+        测试 create_session 是否为 http/https 挂载带连接池和重试策略的适配器。
+        """
+        session = create_session(pool_connections=4, pool_maxsize=16, max_retries=5, backoff_factor=1)
+        adapter = session.get_adapter('https://api.github.com/')
+        self.assertIs(adapter, session.get_adapter('http://localhost:11434/'))
+        self.assertEqual(adapter._pool_maxsize, 16)
+        self.assertEqual(adapter._pool_connections, 4)
+
+        retry = adapter.max_retries
+        self.assertIsInstance(retry, JitterRetry)
+        self.assertEqual(retry.total, 5)
+        self.assertTrue(retry.respect_retry_after_header)
+        self.assertEqual(set(retry.status_forcelist), set(RETRY_STATUS_CODES))
+        self.assertIn('POST', retry.allowed_methods)
+
+    def test_post_not_resent_after_read_timeout(self):
+        """
+        测试读超时后 GET 请求会重试，而 POST 请求只发送一次，避免服务端重复处理。
+        """
+        def slow_handler(method, path, query, headers, body):
+            time.sleep(0.5)
+            return 200, {}, {}
+
+        session = create_session(max_retries=2, backoff_factor=0)
+        with StubServer(slow_handler) as server:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.get(f"{server.url}/get", timeout=0.1)
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                session.post(f"{server.url}/post", json={}, timeout=0.1)
+            time.sleep(0.1)  # 等待服务端记录最后一次请求
+            methods = [method for method, *_ in server.requests]
+        self.assertEqual(methods.count('GET'), 3)
+        self.assertEqual(methods.count('POST'), 1)
+
+    @patch('http_session.random.uniform', return_value=0.25)
+    def test_backoff_adds_jitter(self, mock_uniform):
+        """
+        测试退避时间在指数退避的基础上叠加抖动，且复制后的实例保留抖动参数。
+        """
+        retry = JitterRetry(total=3, backoff_factor=1, jitter=0.5)
+        self.assertEqual(retry.get_backoff_time(), 0)  # 尚未发生重试时不等待
+
+        retry = retry.increment(method='GET', url='/').increment(method='GET', url='/')
+        self.assertEqual(retry.jitter, 0.5)
+        self.assertEqual(retry.get_backoff_time(), 2 + 0.25)
+        mock_uniform.assert_called_with(0, 0.5)
+
+    def test_host_pacer_spaces_requests_per_host(self):
+        """
+        测试同一主机的请求按最小间隔错开，不同主机互不影响。
+        """
+        now = [100.0]
+        sleeps = []
+        pacer = HostPacer(min_interval=1.0, clock=lambda: now[0], sleep=sleeps.append)
+        pacer.wait('https://news.ycombinator.com/')
+        pacer.wait('https://news.ycombinator.com/news?p=2')
+        pacer.wait('https://news.ycombinator.com/show')
+        pacer.wait('https://api.github.com/')
+        self.assertEqual(sleeps, [1.0, 2.0])
+
+if __name__ == '__main__':
+    unittest.main()
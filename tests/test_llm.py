@@ -1,13 +1,18 @@
+import json
 import sys
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
 # 将 src 目录添加到模块搜索路径，方便导入项目中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import Config  # 导入配置类
 from llm import LLM  # 导入要测试的 LLM 类
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
 
 class TestLLM(unittest.TestCase):
     def setUp(self):
@@ -15,6 +20,8 @@ class TestLLM(unittest.TestCase):
         在每个测试方法运行前执行，初始化 LLM 实例和测试数据。
         """
         self.config = Config()  # 初始化配置对象
+        self.config.llm_cache_dir = None  # 报告缓存在 test_report_cache 中单独测试
+        self.config.llm_metrics_file = None  # 调用指标在 test_call_metrics 中单独测试
         self.llm = LLM(self.config)  # 使用配置对象初始化 LLM 实例
 
         # 设置示例的系统提示信息
@@ -40,7 +47,7 @@ class TestLLM(unittest.TestCase):
             llm = LLM(self.config)
         mock_log_error.assert_called_with("不支持的模型类型: invalid_model")
 
-    @patch('llm.requests.post')
+    @patch('requests.Session.post')
     @patch('llm.LOG.error')
     def test_ollama_invalid_response_structure(self, mock_log_error, mock_post):
         """
@@ -75,6 +82,174 @@ class TestLLM(unittest.TestCase):
         # 检查是否记录了预期的错误日志
         mock_log_error.assert_called_with("生成报告时发生错误：OpenAI API error")
 
+    @patch('requests.Session.post')
+    def test_report_cache(self, mock_post):
+        """
+        测试相同的模型、提示、内容与参数命中缓存，新实例同样命中；内容变化或跳过缓存时重新生成。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "Generated report"}}
+        mock_post.return_value = mock_response
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.config.llm_model_type = "ollama"
+        self.config.llm_cache_dir = cache_dir
+
+        llm = LLM(self.config)
+        self.assertEqual(llm.generate_report(self.system_prompt, self.github_content), "Generated report")
+        self.assertEqual(llm.generate_report(self.system_prompt, self.github_content), "Generated report")
+        self.assertEqual(mock_post.call_count, 1)
+
+        # 守护进程重启或 Gradio 重复点击时创建的新实例也命中磁盘缓存
+        llm = LLM(self.config)
+        llm.generate_report(self.system_prompt, self.github_content)
+        self.assertEqual(mock_post.call_count, 1)
+        llm.generate_report(self.system_prompt, self.github_content + "- new issue #1")
+        llm.generate_report(self.system_prompt, self.github_content, use_cache=False)
+        self.assertEqual(mock_post.call_count, 3)
+
+        # 模型名称也是缓存键的一部分
+        self.config.ollama_model_name = "gemma2:2b"
+        LLM(self.config).generate_report(self.system_prompt, self.github_content)
+        self.assertEqual(mock_post.call_count, 4)
+
+        stats = llm.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertGreaterEqual(stats['seconds_saved'], 0)
+
+    def test_stream_report_ollama(self):
+        """
+        测试 Ollama 流式响应被逐段产出，并记录首 token 延迟与生成速度。
+        """
+        lines = [{"message": {"content": "Hello"}, "done": False}, {"message": {"content": " world"}, "done": False},
+                 {"message": {"content": ""}, "done": True, "eval_count": 2}]
+
+        def handler(method, path, query, headers, body):
+            payload = json.loads(body)
+            self.assertTrue(payload["stream"])
+            return 200, {'Content-Type': 'application/x-ndjson'}, "\n".join(json.dumps(line) for line in lines) + "\n"
+
+        with StubServer(handler) as server:
+            self.config.llm_model_type = "ollama"
+            self.config.ollama_api_url = f"{server.url}/api/chat"
+            llm = LLM(self.config)
+            chunks = list(llm.stream_report(self.system_prompt, self.github_content))
+
+        self.assertEqual(chunks, ["Hello", " world"])
+        self.assertEqual(llm.last_call_stats['tokens'], 2)  # 取自 Ollama 返回的 eval_count
+        self.assertLessEqual(llm.last_call_stats['time_to_first_token'], llm.last_call_stats['elapsed'])
+
+    def test_ollama_warm_up_and_keep_alive(self):
+        """
+        测试预热请求不带消息并携带 keep_alive，返回服务端报告的加载耗时；生成时单独记录模型加载耗时。
+        """
+        def handler(method, path, query, headers, body):
+            payload = json.loads(body)
+            self.assertEqual(payload["keep_alive"], "1h")
+            if not payload["messages"]:
+                return 200, {}, {"message": {"role": "assistant", "content": ""}, "done": True, "load_duration": 2500000000}
+            return 200, {}, {"message": {"role": "assistant", "content": "Report"}, "done": True, "load_duration": 5000000}
+
+        with StubServer(handler) as server:
+            self.config.llm_model_type = "ollama"
+            self.config.ollama_api_url = f"{server.url}/api/chat"
+            self.config.ollama_keep_alive = "1h"
+            llm = LLM(self.config)
+            self.assertEqual(llm.warm_up(), 2.5)
+            llm.warm_up(background=True).join()
+            self.assertEqual(llm.generate_report(self.system_prompt, self.github_content), "Report")
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(llm.last_call_stats['load_seconds'], 0.005)
+
+
+    def test_openai_batch(self):
+        """
+        测试通过本地替身 Batch API 离线生成报告：请求合并为一个 JSONL 文件提交，轮询完成后取回结果，
+        失败的请求返回 None，成功的结果写入缓存，再次生成时不重新提交。
+        """
+        state = {'polls': 0, 'input': []}
+
+        def handler(method, path, query, headers, body):
+            if path == '/v1/files':
+                # 从 multipart 表单中取出上传的 JSONL 请求行
+                state['input'] = [json.loads(line) for line in body.decode('utf-8').splitlines()
+                                  if line.startswith('{"custom_id"')]
+                return 200, {}, {"id": "file-in", "object": "file", "bytes": len(body), "created_at": 0,
+                                 "filename": "reports.jsonl", "purpose": "batch", "status": "processed"}
+            if path == '/v1/batches' or path == '/v1/batches/batch-1':
+                if path != '/v1/batches':
+                    state['polls'] += 1
+                status = "completed" if state['polls'] >= 2 else "in_progress"
+                return 200, {}, {"id": "batch-1", "object": "batch", "endpoint": "/v1/chat/completions",
+                                 "input_file_id": "file-in", "completion_window": "24h", "created_at": 0,
+                                 "status": status, "output_file_id": "file-out" if status == "completed" else None,
+                                 "error_file_id": "file-err" if status == "completed" else None}
+            outputs, errors = [], []
+            for line in state['input']:
+                user_content = line['body']['messages'][1]['content']
+                if user_content == 'broken':
+                    errors.append({"custom_id": line['custom_id'],
+                                   "response": {"status_code": 400, "body": {"error": {"message": "bad request"}}}})
+                else:
+                    outputs.append({"custom_id": line['custom_id'], "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": f"Report: {user_content}"}}]}}})
+            lines = outputs if path == '/v1/files/file-out/content' else errors
+            return 200, {'Content-Type': 'application/jsonl'}, "\n".join(json.dumps(line) for line in lines) + "\n"
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        with StubServer(handler) as server, patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            self.config.llm_model_type = "openai"
+            self.config.openai_base_url = f"{server.url}/v1"
+            self.config.llm_cache_dir = cache_dir
+            llm = LLM(self.config)
+            requests = {"0": (self.system_prompt, "repo a"), "1": (self.system_prompt, "broken"),
+                        "2": (self.system_prompt, "repo c")}
+            reports = llm.generate_reports_batch(requests, poll_interval=0.01)
+
+            self.assertEqual(reports, {"0": "Report: repo a", "1": None, "2": "Report: repo c"})
+            self.assertEqual([line['custom_id'] for line in state['input']], ["0", "1", "2"])
+            self.assertEqual(state['input'][0]['url'], "/v1/chat/completions")
+            self.assertEqual(state['input'][0]['body']['model'], self.config.openai_model_name)
+            self.assertEqual(state['polls'], 2)
+
+            # 成功的报告已缓存，只重新提交失败的请求
+            state['polls'] = 0
+            llm.generate_reports_batch(requests, poll_interval=0.01)
+            self.assertEqual([line['custom_id'] for line in state['input']], ["1"])
+
+
+    def test_call_metrics(self):
+        """
+        测试每次调用写入一条指标：token 数与各阶段耗时取自 Ollama 响应，缓存命中单独标记。
+        """
+        def handler(method, path, query, headers, body):
+            return 200, {}, {"message": {"role": "assistant", "content": "Report"}, "done": True,
+                             "prompt_eval_count": 120, "eval_count": 40, "load_duration": 1000000000,
+                             "prompt_eval_duration": 200000000, "eval_duration": 2000000000}
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with StubServer(handler) as server:
+            self.config.llm_model_type = "ollama"
+            self.config.ollama_api_url = f"{server.url}/api/chat"
+            self.config.llm_cache_dir = os.path.join(directory, 'cache')
+            self.config.llm_metrics_file = os.path.join(directory, 'metrics.jsonl')
+            llm = LLM(self.config)
+            llm.generate_report(self.system_prompt, self.github_content, label="github", queue_seconds=0.5)
+            llm.generate_report(self.system_prompt, self.github_content, label="github")
+
+        call, hit = llm.metrics.load()
+        self.assertEqual((call['label'], call['backend'], call['model']), ("github", "ollama", self.config.ollama_model_name))
+        self.assertEqual((call['prompt_tokens'], call['completion_tokens']), (120, 40))
+        self.assertEqual((call['load_seconds'], call['prompt_eval_seconds'], call['generation_seconds']), (1.0, 0.2, 2.0))
+        self.assertEqual(call['tokens_per_second'], 20.0)
+        self.assertEqual(call['queue_seconds'], 0.5)
+        self.assertTrue(hit['cache_hit'])
+        self.assertEqual(llm.last_call_stats['prompt_tokens'], 120)
+
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from llm_metrics import LLMMetrics, format_summary, summarize  # 导入要测试的调用指标模块
+
+
+class TestLLMMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.metrics = LLMMetrics(os.path.join(self.directory, 'logs', 'llm_metrics.jsonl'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record_and_load(self):
+        """
+        测试记录逐行追加到指标文件，按时间过滤，损坏的行被跳过。
+        """
+        first = self.metrics.record(label="github", wall_seconds=1.0)
+        with open(self.metrics.path, 'a') as file:
+            file.write('{"broken\n')
+        self.metrics.record(label="github", wall_seconds=2.0)
+
+        self.assertEqual([record['wall_seconds'] for record in self.metrics.load()], [1.0, 2.0])
+        self.assertEqual(self.metrics.load(since=first['timestamp'] + 3600), [])
+        self.assertEqual(LLMMetrics(os.path.join(self.directory, 'missing.jsonl')).load(), [])
+
+    def test_summarize(self):
+        """
+        测试按报告类型、后端与模型汇总：缓存命中与失败的调用不计入耗时与吞吐量。
+        """
+        common = {'label': 'github', 'backend': 'ollama', 'model': 'llama3'}
+        records = [
+            dict(common, wall_seconds=4.0, queue_seconds=1.0, time_to_first_token=1.0, prompt_tokens=1000,
+                 completion_tokens=100, prompt_eval_seconds=0.5, generation_seconds=3.0),
+            dict(common, wall_seconds=6.0, queue_seconds=0.0, time_to_first_token=2.0, prompt_tokens=1000,
+                 completion_tokens=200, prompt_eval_seconds=1.5, generation_seconds=3.0),
+            dict(common, cache_hit=True, wall_seconds=0.001),
+            dict(common, error='ReadTimeout', wall_seconds=300.0),
+            {'label': 'hacker_news_daily_report', 'backend': 'openai', 'model': 'gpt-4o-mini', 'wall_seconds': 2.0,
+             'prompt_tokens': 500, 'completion_tokens': 100, 'generation_seconds': 2.0},
+        ]
+        github, daily = summarize(records)
+
+        self.assertEqual((github['calls'], github['cache_hits'], github['errors']), (4, 1, 1))
+        self.assertEqual((github['wall_p50'], github['wall_p95'], github['wall_total']), (4.0, 6.0, 10.0))
+        self.assertEqual(github['queue_mean'], 0.25)
+        self.assertEqual(github['ttft_p50'], 1.0)
+        self.assertEqual((github['prompt_tokens'], github['completion_tokens']), (2000, 300))
+        self.assertEqual(github['tokens_per_second'], 50.0)
+        self.assertEqual(github['prompt_tokens_per_second'], 1000.0)
+        self.assertEqual(daily['model'], 'gpt-4o-mini')
+        self.assertIsNone(daily['prompt_tokens_per_second'])  # OpenAI 不返回输入处理耗时
+
+        table = format_summary([github, daily]).splitlines()
+        self.assertEqual(len(table), 3)
+        self.assertTrue(table[1].startswith('github'))
+        self.assertEqual(format_summary([]), "没有 LLM 调用记录。")
+
+if __name__ == '__main__':
+    unittest.main()
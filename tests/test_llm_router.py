@@ -0,0 +1,190 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# 将 src 目录添加到模块搜索路径，方便导入项目中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from config import Config  # 导入配置类
+from disk_cache import DiskCache  # 导入磁盘缓存
+from http_session import create_session  # 导入HTTP会话工厂
+from llm import LLM  # 导入单个模型后端
+from llm_router import BackendStats, LLMRouter, create_llm  # 导入要测试的路由器
+from stub_server import StubServer  # 导入本地 HTTP 替身服务
+
+
+def ollama_handler(content, delay=0.0, status=200):
+    """
+    返回模拟 Ollama 的处理函数：等待 delay 秒后返回 content。
+    """
+    def handler(method, path, query, headers, body):
+        time.sleep(delay)
+        if status != 200:
+            return status, {}, {"error": "model crashed"}
+        return 200, {}, {"message": {"role": "assistant", "content": content}, "done": True}
+    return handler
+
+
+class TestLLMRouter(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.llm_cache_dir = None
+        self.config.llm_metrics_file = None
+        self.config.llm_request_timeout = 5
+        self.session = create_session(max_retries=0)  # 关闭重试，失败立即交给路由器处理
+
+    def backend(self, name, server):
+        return LLM(self.config, session=self.session, model_type='ollama', api_url=f"{server.url}/api/chat", name=name)
+
+    def test_routes_to_fastest_backend(self):
+        """
+        测试没有样本的后端先各尝试一次，之后请求都路由到 p50 延迟最低的后端。
+        """
+        with StubServer(ollama_handler("slow report", delay=0.2)) as slow, \
+                StubServer(ollama_handler("fast report")) as fast:
+            router = LLMRouter([self.backend('slow', slow), self.backend('fast', fast)], hedge_after=None)
+            reports = [router.generate_report("prompt", f"content {n}") for n in range(4)]
+
+        self.assertEqual(reports, ["slow report"] + ["fast report"] * 3)
+        self.assertEqual(len(slow.requests), 1)
+        self.assertEqual(len(fast.requests), 3)
+        self.assertEqual(router.last_call_stats['backend'], 'fast')
+        stats = router.backend_stats()
+        self.assertGreaterEqual(stats['slow']['p50'], 0.2)
+        self.assertLess(stats['fast']['p95'], stats['slow']['p50'])
+
+    def test_hedged_request(self):
+        """
+        测试主请求超过 hedge_after 仍未返回时向次优后端发起对冲请求，取先返回的结果。
+        """
+        with StubServer(ollama_handler("stalled report", delay=1.0)) as stalled, \
+                StubServer(ollama_handler("hedged report")) as fast:
+            router = LLMRouter([self.backend('stalled', stalled), self.backend('fast', fast)], hedge_after=0.1)
+            start = time.monotonic()
+            report = router.generate_report("prompt", "content")
+            elapsed = time.monotonic() - start
+
+            self.assertEqual(report, "hedged report")
+            self.assertLess(elapsed, 0.8)
+            self.assertEqual(len(stalled.requests), 1)
+            self.assertEqual(len(fast.requests), 1)
+
+    def test_failover_timeout_and_health(self):
+        """
+        测试失败或超时的后端被跳过并转到下一个后端，错误率过高的后端暂停使用，全部失败时抛出错误。
+        """
+        self.config.llm_request_timeout = 0.2
+        with StubServer(ollama_handler("", delay=1.0)) as hung, \
+                StubServer(ollama_handler("", status=500)) as broken, \
+                StubServer(ollama_handler("good report")) as good:
+            backends = [self.backend('hung', hung), self.backend('broken', broken), self.backend('good', good)]
+            router = LLMRouter(backends, hedge_after=None)
+            for n in range(3):
+                self.assertEqual(router.generate_report("prompt", f"content {n}"), "good report")
+
+            stats = router.backend_stats()
+            self.assertFalse(stats['hung']['healthy'])
+            self.assertFalse(stats['broken']['healthy'])
+            self.assertTrue(stats['good']['healthy'])
+            # 暂停使用的后端不再被优先尝试
+            requests_before = len(hung.requests) + len(broken.requests)
+            router.generate_report("prompt", "content 3")
+            self.assertEqual(len(hung.requests) + len(broken.requests), requests_before)
+
+            router = LLMRouter([self.backend('broken', broken)], hedge_after=None)
+            with self.assertRaises(Exception):
+                router.generate_report("prompt", "content")
+
+    def test_respects_backend_concurrency(self):
+        """
+        测试并发请求时最快的后端满载后转到其他后端，且每个后端进行中的请求数不超过自身的并发上限。
+        """
+        self.config.llm_concurrency = {'ollama': 1}
+        peaks = {}
+
+        def counting_handler(name):
+            active = [0]
+            lock = threading.Lock()
+
+            def handler(method, path, query, headers, body):
+                with lock:
+                    active[0] += 1
+                    peaks[name] = max(peaks.get(name, 0), active[0])
+                time.sleep(0.1)
+                with lock:
+                    active[0] -= 1
+                return 200, {}, {"message": {"role": "assistant", "content": f"{name} report"}, "done": True}
+            return handler
+
+        with StubServer(counting_handler('fast')) as fast, StubServer(counting_handler('slow')) as slow:
+            router = LLMRouter([self.backend('fast', fast), self.backend('slow', slow)], hedge_after=None)
+            router.stats['fast'].record(0.01, ok=True)
+            router.stats['slow'].record(1.0, ok=True)
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                reports = list(executor.map(lambda n: router.generate_report("prompt", f"content {n}"), range(6)))
+
+        self.assertEqual(peaks, {'fast': 1, 'slow': 1})
+        self.assertEqual(len(fast.requests) + len(slow.requests), 6)
+        self.assertGreater(len(slow.requests), 0)  # 最快的后端满载时请求转到其他后端
+        self.assertEqual(set(reports), {'fast report', 'slow report'})
+
+    def test_cache_precheck_counts_one_miss(self):
+        """
+        测试路由前查看各后端缓存不计入未命中，一次实际生成只计一次未命中，再次请求命中缓存。
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        cache = DiskCache(cache_dir)
+        with StubServer(ollama_handler("first")) as first, StubServer(ollama_handler("second")) as second:
+            backends = [LLM(self.config, session=self.session, cache=cache, model_type='ollama',
+                            api_url=f"{server.url}/api/chat", name=name)
+                        for name, server in (('first', first), ('second', second))]
+            router = LLMRouter(backends, hedge_after=None)
+            report = router.generate_report("prompt", "content")
+            self.assertEqual(router.cache_stats()['misses'], 1)
+            self.assertEqual(router.generate_report("prompt", "content"), report)
+            self.assertEqual(len(first.requests) + len(second.requests), 1)
+
+        stats = router.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_backend_stats_cooldown(self):
+        """
+        测试错误率达到上限后进入冷却期，冷却结束后恢复可用。
+        """
+        now = [0.0]
+        stats = BackendStats(window=10, max_error_rate=0.5, cooldown=60, clock=lambda: now[0])
+        stats.record(1.0, ok=True)
+        stats.record(0, ok=False)
+        self.assertTrue(stats.healthy)  # 样本不足时不判定
+        stats.record(0, ok=False)
+        self.assertFalse(stats.healthy)
+        now[0] = 61.0
+        self.assertTrue(stats.healthy)
+        self.assertEqual(stats.latency(0.95), 1.0)
+        self.assertIsNone(stats.latency(0.95, min_samples=3))
+
+    def test_create_llm_from_config(self):
+        """
+        测试配置了 llm.backends 时创建路由器，未配置时创建单个 LLM。
+        """
+        self.assertIsInstance(create_llm(self.config), LLM)
+        self.config.llm_backends = [
+            {"name": "gpu", "model_type": "ollama", "api_url": "http://gpu:11434/api/chat"},
+            {"model_type": "ollama", "api_url": "http://cpu:11434/api/chat", "model_name": "llama3:8b"},
+        ]
+        router = create_llm(self.config)
+        self.assertIsInstance(router, LLMRouter)
+        self.assertEqual([backend.name for backend in router.backends], ["gpu", "http://cpu:11434/api/chat"])
+        self.assertEqual(router.backends[1].model_name, "llama3:8b")
+        self.assertEqual(router.model, "ollama")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from rate_limiter import RateLimitScheduler  # 导入要测试的 RateLimitScheduler 类
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestRateLimitScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RateLimitScheduler(reserve=10, burst=2, clock=self.clock)
+
+    def test_no_pacing_without_headers(self):
+        """
+        测试尚未收到配额头部时不限速。
+        """
+        self.assertIsNone(self.scheduler.pace())
+        self.assertEqual(self.scheduler._wait_time(), 0)
+
+    def test_no_pacing_when_budget_covers_run(self):
+        """
+        测试剩余配额足以完成本次运行时不放慢请求。
+        """
+        self.scheduler.plan(50)
+        self.scheduler.update({'X-RateLimit-Remaining': '100', 'X-RateLimit-Limit': '5000', 'X-RateLimit-Reset': '4600'})
+        self.assertIsNone(self.scheduler.pace())
+        self.assertEqual(self.scheduler.metrics()['projected_finish'], self.clock.now)
+
+    def test_paces_when_budget_is_short(self):
+        """
+        测试剩余配额不足时将请求均匀分摊到重置前。
+        """
+        self.scheduler.plan(500)
+        self.scheduler.update({'X-RateLimit-Remaining': '370', 'X-RateLimit-Limit': '5000', 'X-RateLimit-Reset': '4600'})
+        self.assertAlmostEqual(self.scheduler.pace(), 360 / 3600)
+
+        # 令牌桶容量为 2：前两个请求立即放行，第三个需要等待一个令牌的时间
+        self.scheduler._consume()
+        self.scheduler._consume()
+        self.assertAlmostEqual(self.scheduler._wait_time(), 3600 / 358, places=3)
+
+    def test_blocks_until_reset_when_exhausted(self):
+        """
+        测试配额低于预留值时暂停到重置时间，重置后恢复。
+        """
+        self.scheduler.update({'X-RateLimit-Remaining': '5', 'X-RateLimit-Limit': '5000', 'X-RateLimit-Reset': '1300'})
+        self.assertEqual(self.scheduler._wait_time(), 300)
+
+        self.clock.now = 1300
+        self.assertEqual(self.scheduler._wait_time(), 0)
+        self.assertEqual(self.scheduler.remaining, 5000)
+
+    def test_backoff_and_metrics(self):
+        """
+        测试二级限流的退避时间与预计完成时间。
+        """
+        self.scheduler.plan(30)
+        self.scheduler.backoff(60)
+        self.assertEqual(self.scheduler._wait_time(), 60)
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics['pending_requests'], 30)
+        self.assertEqual(metrics['projected_finish'], self.clock.now + 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import asyncio
 import sys
 import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -16,6 +19,7 @@ class TestReportGenerator(unittest.TestCase):
         # 创建一个模拟的 LLM（大语言模型）对象
         self.mock_llm = MagicMock()
         self.mock_llm.model = "mock_model"  # 确保mock对象有一个有效的模型名称
+        self.mock_llm.input_token_budget.return_value = 100000  # 默认输入不超出上下文预算
 
         # 模拟提示内容
         self.mock_prompts = {
@@ -90,7 +94,7 @@ class TestReportGenerator(unittest.TestCase):
 
         # 模拟 LLM 返回的报告内容
         mock_report = "This is a generated report."
-        self.mock_llm.generate_report.return_value = mock_report
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter([mock_report])
 
         # 调用 generate_github_report 方法
         report, report_file_path = self.report_generator.generate_github_report(self.test_markdown_file_path)
@@ -104,8 +108,15 @@ class TestReportGenerator(unittest.TestCase):
             content = file.read()
             self.assertEqual(content, mock_report)
 
-        # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
+        # 验证 LLM 的 stream_report 方法是否被正确调用，且传入了正确的参数
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content,
+                                                            use_cache=True, label="github")
+
+        # use_cache 为 False 时跳过报告缓存重新生成
+        self.mock_llm.stream_report.reset_mock()
+        self.report_generator.generate_github_report(self.test_markdown_file_path, use_cache=False)
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content,
+                                                            use_cache=False, label="github")
 
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_topic_report(self, mock_preload_prompts):
@@ -118,7 +129,7 @@ class TestReportGenerator(unittest.TestCase):
 
         # 模拟 LLM 返回的报告内容
         mock_report = "This is a generated Hacker News topic report."
-        self.mock_llm.generate_report.return_value = mock_report
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter([mock_report])
 
         # 调用 generate_hn_topic_report 方法
         report, report_file_path = self.report_generator.generate_hn_topic_report(self.test_hn_topic_file_path)
@@ -132,8 +143,9 @@ class TestReportGenerator(unittest.TestCase):
             content = file.read()
             self.assertEqual(content, mock_report)
 
-        # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content)
+        # 验证 LLM 的 stream_report 方法是否被正确调用，且传入了正确的参数
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content,
+                                                            use_cache=True, label="hacker_news_hours_topic")
 
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_daily_report(self, mock_preload_prompts):
@@ -146,7 +158,7 @@ class TestReportGenerator(unittest.TestCase):
 
         # 模拟 LLM 返回的报告内容
         mock_report = "This is a generated Hacker News daily trends report."
-        self.mock_llm.generate_report.return_value = mock_report
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter([mock_report])
 
         # 调用 generate_hn_daily_report 方法
         report, report_file_path = self.report_generator.generate_hn_daily_report(self.test_hn_daily_dir_path)
@@ -160,9 +172,213 @@ class TestReportGenerator(unittest.TestCase):
             content = file.read()
             self.assertEqual(content, mock_report)
 
-        # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
+        # 验证 LLM 的 stream_report 方法是否被正确调用，且传入了正确的参数
         aggregated_content = self.report_generator._aggregate_topic_reports(self.test_hn_daily_dir_path)
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], aggregated_content)
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], aggregated_content,
+                                                            use_cache=True, label="hacker_news_daily_report")
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_hn_daily_report_empty_stream(self, mock_preload_prompts):
+        """
+        测试模型没有返回任何内容时抛出明确的错误。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter([])
+
+        with self.assertRaisesRegex(ValueError, "没有返回任何内容"):
+            self.report_generator.generate_hn_daily_report(self.test_hn_daily_dir_path)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_hn_daily_report_prefers_rising_stories(self, mock_preload_prompts):
+        """
+        测试目录中存在 rising.md 时，每日汇总报告只使用上升的新闻作为输入。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter(["Rising trends."])
+
+        rising_content = "# Hacker News Rising Stories (2024-09-01)\n\n1. [Story](https://example.com) - 100 points\n"
+        with open(os.path.join(self.test_hn_daily_dir_path, 'rising.md'), 'w') as file:
+            file.write(rising_content)
+
+        self.report_generator.generate_hn_daily_report(self.test_hn_daily_dir_path)
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], rising_content,
+                                                            use_cache=True, label="hacker_news_daily_report")
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_hn_topic_report_delta(self, mock_preload_prompts):
+        """
+        测试增量模式只把变化的新闻与上一期报告交给 LLM，列表没有变化时不调用 LLM。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter(["Updated topics."])
+
+        previous_report = "# Hacker News 热门话题\n\n1. **Rust**"
+        with open(os.path.join(self.test_hn_daily_dir_path, "08_topic.md"), 'w') as file:
+            file.write(previous_report)
+        markdown_file_path = os.path.join(self.test_hn_daily_dir_path, "12.md")
+        with open(markdown_file_path, 'w') as file:
+            file.write(self.markdown_content)
+        delta_content = "# Hacker News Top Stories Delta (2024-09-01 12:00)\n\n## New Stories\n1. [Zig 1.0](https://ziglang.org)\n"
+        with open(os.path.join(self.test_hn_daily_dir_path, "12_delta.md"), 'w') as file:
+            file.write(delta_content)
+
+        report, report_file_path = self.report_generator.generate_hn_topic_report(markdown_file_path, delta=True)
+        self.assertEqual(report_file_path, os.path.join(self.test_hn_daily_dir_path, "12_topic.md"))
+        system_prompt, content = self.mock_llm.stream_report.call_args[0]
+        self.assertTrue(system_prompt.startswith(self.mock_prompts["hacker_news_hours_topic"]))
+        self.assertEqual(content, f"# 上一期热门话题\n\n{previous_report}\n\n# 本期变化\n\n{delta_content}")
+
+        # 下一次快照没有变化：直接返回最近一期报告，不调用 LLM
+        self.mock_llm.stream_report.reset_mock()
+        markdown_file_path = os.path.join(self.test_hn_daily_dir_path, "16.md")
+        with open(markdown_file_path, 'w') as file:
+            file.write(self.markdown_content)
+        with open(os.path.join(self.test_hn_daily_dir_path, "16_delta.md"), 'w') as file:
+            file.write("# Hacker News Top Stories Delta (2024-09-01 16:00)\n\n")
+        report, report_file_path = self.report_generator.generate_hn_topic_report(markdown_file_path, delta=True)
+        self.assertEqual((report, report_file_path), ("Updated topics.", os.path.join(self.test_hn_daily_dir_path, "12_topic.md")))
+        self.mock_llm.stream_report.assert_not_called()
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_stream_github_report_writes_incrementally(self, mock_preload_prompts):
+        """
+        测试流式生成时逐段产出并写入文件，中途失败时已生成的内容保留在 .partial 文件中。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        report_file_path = os.path.splitext(self.test_markdown_file_path)[0] + "_report.md"
+        partial_path = report_file_path + ".partial"
+
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter(["# 报告\n", "- 修复 #123\n"])
+        stream = self.report_generator.stream_github_report(self.test_markdown_file_path)
+        self.assertEqual(next(stream), ("# 报告\n", None))
+        with open(partial_path) as file:
+            self.assertEqual(file.read(), "# 报告\n")  # 第一段已写入磁盘
+        self.assertEqual(list(stream), [("# 报告\n- 修复 #123\n", None), ("# 报告\n- 修复 #123\n", report_file_path)])
+        self.assertFalse(os.path.exists(partial_path))
+
+        def interrupted(*args, **kwargs):
+            yield "# 新报告\n"
+            raise TimeoutError("read timed out")
+
+        self.mock_llm.stream_report.side_effect = interrupted
+        with self.assertRaises(TimeoutError):
+            self.report_generator.generate_github_report(self.test_markdown_file_path)
+        self.addCleanup(os.remove, partial_path)
+        with open(partial_path) as file:
+            self.assertEqual(file.read(), "# 新报告\n")
+        with open(report_file_path) as file:
+            self.assertEqual(file.read(), "# 报告\n- 修复 #123\n")  # 上一次的完整报告不受影响
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_reports_concurrently(self, mock_preload_prompts):
+        """
+        测试批量生成按完成顺序产出报告，并发请求数不超过上限，单个失败不影响其他报告。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        delays = {"repo_a": 0.2, "repo_b": 0.05, "repo_c": 0.25, "broken": 0.0}
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def generate_report(system_prompt, content, use_cache=True, label=None, queue_seconds=0.0):
+            name = content.strip()
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(delays[name])
+            with lock:
+                state['active'] -= 1
+            if name == "broken":
+                raise TimeoutError("model timed out")
+            return f"Report for {name}"
+
+        self.mock_llm.generate_report.side_effect = generate_report
+        paths = []
+        for name in delays:
+            path = os.path.join(self.test_hn_daily_dir_path, f"{name}.md")
+            with open(path, 'w') as file:
+                file.write(name)
+            paths.append(path)
+
+        async def collect():
+            return [result async for result in self.report_generator.generate_github_reports(paths, max_concurrency=2)]
+
+        results = asyncio.run(collect())
+        self.assertEqual(state['peak'], 2)
+        # a 与 b 先并发执行，b 完成后 c 开始，随后 a、broken、c 依次完成
+        self.assertEqual([os.path.basename(path) for path, _, _ in results], ["repo_b.md", "repo_a.md", "broken.md", "repo_c.md"])
+        self.assertEqual(results[0][1:], ("Report for repo_b", os.path.join(self.test_hn_daily_dir_path, "repo_b_report.md")))
+        self.assertEqual(results[2][1:], (None, None))
+        with open(os.path.join(self.test_hn_daily_dir_path, "repo_c_report.md")) as file:
+            self.assertEqual(file.read(), "Report for repo_c")
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_reports_batch(self, mock_preload_prompts):
+        """
+        测试离线批处理一次提交所有项目的报告，结果按输入顺序写入报告文件，失败的项目返回 None。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        paths = []
+        for name in ["repo_a", "broken", "repo_c"]:
+            path = os.path.join(self.test_hn_daily_dir_path, f"{name}.md")
+            with open(path, 'w') as file:
+                file.write(name)
+            paths.append(path)
+
+        def generate_reports_batch(requests, use_cache=True, label=None):
+            return {custom_id: None if content == "broken" else f"Report for {content}"
+                    for custom_id, (_, content) in requests.items()}
+
+        self.mock_llm.generate_reports_batch.side_effect = generate_reports_batch
+        results = self.report_generator.generate_github_reports_batch(paths)
+
+        self.assertEqual(self.mock_llm.generate_reports_batch.call_count, 1)
+        self.assertEqual(results[0], (paths[0], "Report for repo_a", os.path.join(self.test_hn_daily_dir_path, "repo_a_report.md")))
+        self.assertEqual(results[1], (paths[1], None, None))
+        with open(os.path.join(self.test_hn_daily_dir_path, "repo_c_report.md")) as file:
+            self.assertEqual(file.read(), "Report for repo_c")
+        self.mock_llm.generate_report.assert_not_called()
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_oversized_input_is_map_reduced(self, mock_preload_prompts):
+        """
+        测试输入超出上下文预算时按预算分块并发摘要，再用各部分摘要生成最终报告。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.input_token_budget.return_value = 200
+        markdown_content = "".join(f"- Fix parser bug number {n} in module {n} #{n}\n" for n in range(100))
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write(markdown_content)
+
+        lock = threading.Lock()
+        chunks = []
+
+        def summarize(system_prompt, content, use_cache=True, label=None, queue_seconds=0.0):
+            with lock:
+                chunks.append(content)
+            return f"summary of {content.splitlines()[0]}"
+
+        self.mock_llm.generate_report.side_effect = summarize
+        self.mock_llm.stream_report.side_effect = lambda *args, **kwargs: iter(["Final report."])
+
+        report, _ = self.report_generator.generate_github_report(self.test_markdown_file_path)
+
+        self.assertEqual(report, "Final report.")
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(sorted(chunks, key=markdown_content.index)), markdown_content)  # 各块覆盖完整输入
+        map_prompt = self.mock_llm.generate_report.call_args_list[0][0][0]
+        self.assertIn(self.mock_prompts["github"], map_prompt)
+        self.assertEqual(self.mock_llm.generate_report.call_args_list[0][1]['label'], "github/map")
+        system_prompt, reduced = self.mock_llm.stream_report.call_args[0]
+        self.assertEqual(system_prompt, self.mock_prompts["github"])
+        self.assertTrue(reduced.startswith("## 第 1 部分摘要\n\nsummary of - Fix parser bug number 0 in module 0 #0"))
+        self.assertEqual(reduced.count("部分摘要"), len(chunks))
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,36 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from token_counter import chunk_text, count_tokens  # 导入要测试的 token 计数与分块函数
+
+class TestTokenCounter(unittest.TestCase):
+    def test_count_tokens(self):
+        """
+        测试空文本为 0，文本越长 token 数越多，中文按字符计数。
+        """
+        self.assertEqual(count_tokens(""), 0)
+        short = count_tokens("- Fix bug #1")
+        self.assertGreater(short, 0)
+        self.assertGreater(count_tokens("- Fix bug #1\n" * 10), short)
+        self.assertGreaterEqual(count_tokens("新增功能"), 4)
+
+    def test_chunk_text(self):
+        """
+        测试分块按行切分且每块不超过上限，超长的单行按字符切分，拼接后与原文一致。
+        """
+        text = "".join(f"- Fix parser bug number {n} in module {n}\n" for n in range(50)) + "x" * 400 + "\n"
+        chunks = chunk_text(text, 40)
+        self.assertEqual("".join(chunks), text)
+        self.assertGreater(len(chunks), 5)
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk), 40)
+        self.assertTrue(chunks[0].endswith("\n"))  # 普通行不会被截断
+        self.assertEqual(chunk_text("short", 40), ["short"])
+        self.assertEqual(chunk_text("", 40), [])
+
+if __name__ == '__main__':
+    unittest.main()